@@ -3,20 +3,28 @@ import logging
 import os
 import uuid
 from collections import defaultdict
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from backend.graph import Graph
+from backend.graph import get_graph, run_research
+from backend.services.job_scheduler import JobScheduler, QueueFullError
+from backend.services.metrics import REGISTRY
 from backend.services.mongodb import MongoDBService
 from backend.services.pdf_service import PDFService
+from backend.services.progress import get_progress_bus
+from backend.services.providers import get_providers
+from backend.services.search_cache import get_search_cache
+from backend.services.social_index import PLATFORMS, close_social_index, get_social_index
 from backend.services.websocket_manager import WebSocketManager
+from backend.services.worker_pool import WorkerPool
 
 # Load environment variables from .env file at startup
 env_path = Path(__file__).parent / '.env'
@@ -29,19 +37,64 @@ logger.setLevel(logging.INFO)
 console_handler = logging.StreamHandler()
 logger.addHandler(console_handler)
 
-app = FastAPI(title="Brand Reputation Check API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    maintenance = None
+    if worker_pool:
+        # The graph and provider clients live in the worker processes
+        await worker_pool.start()
+    else:
+        # Build the shared research graph once, before the first job arrives
+        try:
+            # Also deletes abandoned jobs' checkpoints and scrape output from time to time
+            maintenance = asyncio.create_task(get_graph().maintain())
+        except Exception as e:
+            logger.warning(f"Failed to build research graph at startup: {e}")
+        # Open keep-alive connections to every provider before the first job
+        await get_providers().warmup()
+    await scheduler.start()
+    yield
+    await scheduler.stop()
+    if worker_pool:
+        await worker_pool.stop()
+    else:
+        if maintenance:
+            maintenance.cancel()
+        await get_graph().aclose()
+        await get_providers().aclose()
+        get_search_cache().close()
+        close_social_index()
+
+app = FastAPI(title="Brand Reputation Check API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
 
 manager = WebSocketManager()
+# Progress events from research runs in this process go to the job's WebSockets
+get_progress_bus().subscribe(manager.send_event)
 pdf_service = PDFService({"pdf_output_dir": "pdfs"})
 
+# RESEARCH_WORKER_PROCESSES > 0 runs the graph in that many worker processes;
+# this process then only queues jobs and relays their progress
+worker_pool = None
+if worker_processes := int(os.getenv("RESEARCH_WORKER_PROCESSES", "0")):
+    worker_pool = WorkerPool(worker_processes, websocket_manager=manager)
+
+# Bounded admission: at most RESEARCH_WORKER_SLOTS pipelines run at once,
+# RESEARCH_QUEUE_SIZE more may wait, anything beyond that gets HTTP 429
+scheduler = JobScheduler(
+    runner=lambda job_id, job: process_research(job_id, *job),
+    worker_slots=int(os.getenv("RESEARCH_WORKER_SLOTS", "2")),
+    max_queue=int(os.getenv("RESEARCH_QUEUE_SIZE", "20")),
+    websocket_manager=manager
+)
+
 job_status = defaultdict(lambda: {
     "status": "pending",
     "result": None,
@@ -65,11 +118,28 @@ class ResearchRequest(BaseModel):
     company_url: str | None = None
     industry: str | None = None
     hq_location: str | None = None
+    priority: int = 0  # lower runs first
 
 class PDFGenerationRequest(BaseModel):
     report_content: str
     company_name: str | None = None
 
+class SocialLinksOverride(BaseModel):
+    youtube: str | None = None
+    facebook: str | None = None
+    tiktok: str | None = None
+    aliases: list[str] = []
+
+def require_admin(token: str | None, write: bool = False) -> None:
+    """Admin reads are open unless ADMIN_TOKEN is set; writes need it set and matched."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        if write:
+            raise HTTPException(status_code=403, detail="Admin writes are disabled until ADMIN_TOKEN is set")
+        return
+    if token != expected:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
 @app.options("/research")
 async def preflight():
     response = JSONResponse(content=None, status_code=200)
@@ -83,12 +153,25 @@ async def research(data: ResearchRequest):
     try:
         logger.info(f"Received research request for {data.company}")
         job_id = str(uuid.uuid4())
-        asyncio.create_task(process_research(job_id, data)) # run concurrently, in event loop
+        try:
+            position = scheduler.submit(job_id, (data, False), priority=data.priority)
+        except QueueFullError as e:
+            logger.warning(f"Rejected research request for {data.company}: {e}")
+            return JSONResponse(
+                status_code=429,
+                content={"status": "rejected", "message": "Research queue is full. Please retry later."},
+                headers={
+                    "Retry-After": str(e.retry_after),
+                    "Access-Control-Allow-Origin": "*"
+                }
+            )
+        job_status[job_id].update({"status": "queued", "request": data.dict()})
 
         response = JSONResponse(content={
             "status": "accepted",
             "job_id": job_id,
-            "message": "Research started. Connect to WebSocket for updates.",
+            "message": "Research queued. Connect to WebSocket for updates.",
+            "queue_position": position,
             "websocket_url": f"/research/ws/{job_id}"
         })
         response.headers["Access-Control-Allow-Origin"] = "*"
@@ -100,30 +183,28 @@ async def research(data: ResearchRequest):
         logger.error(f"Error initiating research: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-async def process_research(job_id: str, data: ResearchRequest):
+async def process_research(job_id: str, data: ResearchRequest, resume: bool = False):
     try:
-        if mongodb:
-            mongodb.create_job(job_id, data.dict())
+        if mongodb and not resume:
+            # pymongo is synchronous; keep it off the event loop
+            await asyncio.to_thread(mongodb.create_job, job_id, data.dict())
         await asyncio.sleep(1)  # Allow WebSocket connection
 
-        await manager.send_status_update(job_id, status="processing", message="Starting research")
-
-        # Run LangGraph
-        graph = Graph(
-            company=data.company,
-            url=data.company_url,
-            industry=data.industry,
-            hq_location=data.hq_location,
-            websocket_manager=manager,
-            job_id=job_id
+        job_status[job_id]["status"] = "processing"
+        await manager.send_status_update(
+            job_id,
+            status="processing",
+            message="Resuming research" if resume else "Starting research"
         )
 
-        state = {}
-        async for s in graph.run(thread={}):
-            state.update(s)
-        
-        # Look for the compiled report in either location.
-        report_content = state.get('report') or (state.get('editor') or {}).get('report')
+        # Run LangGraph, either in a worker process or on this process's shared graph
+        if worker_pool:
+            result = await worker_pool.run(job_id, data.dict(), resume=resume)
+        else:
+            result = await run_research(job_id, data.dict(), resume=resume)
+
+        job_status[job_id]["metrics"] = result.get('metrics')
+        report_content = result.get('report')
         if report_content:
             logger.info(f"Found report in final state (length: {len(report_content)})")
             job_status[job_id].update({
@@ -133,8 +214,9 @@ async def process_research(job_id: str, data: ResearchRequest):
                 "last_update": datetime.now().isoformat()
             })
             if mongodb:
-                mongodb.update_job(job_id=job_id, status="completed")
-                mongodb.store_report(job_id=job_id, report_data={"report": report_content})
+                await asyncio.to_thread(mongodb.update_job, job_id=job_id, status="completed",
+                                        result={"metrics": result.get('metrics')})
+                await asyncio.to_thread(mongodb.store_report, job_id=job_id, report_data={"report": report_content})
             await manager.send_status_update(
                 job_id=job_id,
                 status="completed",
@@ -145,14 +227,17 @@ async def process_research(job_id: str, data: ResearchRequest):
                 }
             )
         else:
-            logger.error(f"Research completed without finding report. State keys: {list(state.keys())}")
-            logger.error(f"Editor state: {state.get('editor', {})}")
+            logger.error(f"Research completed without finding report. Nodes run: {result.get('nodes')}")
             
             # Check if there was a specific error in the state
             error_message = "No report found"
-            if error := state.get('error'):
+            if error := result.get('error'):
                 error_message = f"Error: {error}"
             
+            job_status[job_id].update({"status": "failed", "error": error_message})
+            if mongodb:
+                await asyncio.to_thread(mongodb.update_job, job_id=job_id, status="failed", error=error_message,
+                                        result={"metrics": result.get('metrics')})
             await manager.send_status_update(
                 job_id=job_id,
                 status="failed",
@@ -162,6 +247,7 @@ async def process_research(job_id: str, data: ResearchRequest):
 
     except Exception as e:
         logger.error(f"Research failed: {str(e)}")
+        job_status[job_id].update({"status": "failed", "error": str(e)})
         await manager.send_status_update(
             job_id=job_id,
             status="failed",
@@ -169,11 +255,106 @@ async def process_research(job_id: str, data: ResearchRequest):
             error=str(e)
         )
         if mongodb:
-            mongodb.update_job(job_id=job_id, status="failed", error=str(e))
+            await asyncio.to_thread(mongodb.update_job, job_id=job_id, status="failed", error=str(e))
+
+@app.options("/research/{job_id}/resume")
+async def resume_preflight(job_id: str):
+    response = JSONResponse(content=None, status_code=200)
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    return response
+
+@app.post("/research/{job_id}/resume")
+async def resume_research(job_id: str):
+    """Continue a failed job from its last checkpoint instead of starting over."""
+    request = job_status[job_id].get("request") if job_id in job_status else None
+    if request is None and mongodb:
+        if job := await asyncio.to_thread(mongodb.get_job, job_id):
+            request = job.get("inputs")
+    if request is None:
+        raise HTTPException(status_code=404, detail="Research job not found")
+    if job_status[job_id]["status"] in ("queued", "processing", "completed"):
+        raise HTTPException(status_code=409, detail=f"Research job is {job_status[job_id]['status']}")
+
+    data = ResearchRequest(**request)
+    try:
+        position = scheduler.submit(job_id, (data, True), priority=data.priority)
+    except QueueFullError as e:
+        return JSONResponse(
+            status_code=429,
+            content={"status": "rejected", "message": "Research queue is full. Please retry later."},
+            headers={
+                "Retry-After": str(e.retry_after),
+                "Access-Control-Allow-Origin": "*"
+            }
+        )
+    job_status[job_id].update({"status": "queued", "request": request, "error": None})
+
+    response = JSONResponse(content={
+        "status": "accepted",
+        "job_id": job_id,
+        "message": "Research resuming from the last checkpoint.",
+        "queue_position": position,
+        "websocket_url": f"/research/ws/{job_id}"
+    })
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    return response
+
 @app.get("/")
 async def ping():
     return {"message": "Alive"}
 
+@app.get("/queue/stats")
+async def queue_stats():
+    """Research queue depth, slot usage and wait-time statistics."""
+    return scheduler.stats()
+
+@app.get("/providers/stats")
+async def provider_stats():
+    """Connection pool saturation per external provider."""
+    return get_providers().stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Node, step and provider call metrics in the Prometheus text format."""
+    snapshots = worker_pool.metric_snapshots() if worker_pool else []
+    return PlainTextResponse(REGISTRY.render(*snapshots), media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/social-links")
+async def list_social_links(x_admin_token: str | None = Header(None)):
+    """Every brand in the social profile index."""
+    require_admin(x_admin_token)
+    return [profile.to_dict() for profile in await get_social_index().profiles()]
+
+@app.get("/admin/social-links/{brand}")
+async def get_social_links(brand: str, x_admin_token: str | None = Header(None)):
+    """The indexed profile a research job for this brand name would use."""
+    require_admin(x_admin_token)
+    if not (profile := await get_social_index().lookup(brand)):
+        raise HTTPException(status_code=404, detail="Brand not indexed")
+    return profile.to_dict()
+
+@app.put("/admin/social-links/{brand}")
+async def override_social_links(brand: str, data: SocialLinksOverride, x_admin_token: str | None = Header(None)):
+    """Pin a brand's social links; research jobs use them instead of searching SerpAPI."""
+    require_admin(x_admin_token, write=True)
+    links = {platform: getattr(data, platform) for platform in PLATFORMS if getattr(data, platform)}
+    if not links:
+        raise HTTPException(status_code=422, detail="At least one social link is required")
+    await get_social_index().override(brand, links, data.aliases)
+    return (await get_social_index().lookup(brand)).to_dict()
+
+@app.delete("/admin/social-links/{brand}")
+async def delete_social_links(brand: str, x_admin_token: str | None = Header(None)):
+    """Forget a brand, so the next job discovers its links again."""
+    require_admin(x_admin_token, write=True)
+    if not await get_social_index().delete(brand):
+        raise HTTPException(status_code=404, detail="Brand not indexed")
+    return {"status": "deleted", "brand": brand}
+
 @app.get("/research/pdf/{filename}")
 async def get_pdf(filename: str):
     pdf_path = os.path.join("pdfs", filename)
@@ -196,6 +377,7 @@ async def websocket_endpoint(websocket: WebSocket, job_id: str):
                 error=status["error"],
                 result=status["result"]
             )
+        await scheduler.send_position(job_id)
 
         while True:
             try:
@@ -212,7 +394,7 @@ async def websocket_endpoint(websocket: WebSocket, job_id: str):
 async def get_research(job_id: str):
     if not mongodb:
         raise HTTPException(status_code=501, detail="Database persistence not configured")
-    job = mongodb.get_job(job_id)
+    job = await asyncio.to_thread(mongodb.get_job, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Research job not found")
     return job
@@ -226,7 +408,7 @@ async def get_research_report(job_id: str):
                 return {"report": report}
         raise HTTPException(status_code=404, detail="Report not found")
     
-    report = mongodb.get_report(job_id)
+    report = await asyncio.to_thread(mongodb.get_report, job_id)
     if not report:
         raise HTTPException(status_code=404, detail="Research report not found")
     return report
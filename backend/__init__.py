@@ -27,6 +27,6 @@ if not os.getenv("OPENAI_API_KEY"):
 if not os.getenv("GEMINI_API_KEY"):
     logger.warning("GEMINI_API_KEY environment variable is not set.")
 
-from .graph import Graph
+from .graph import Graph, build_input_state, get_graph, run_research
 
-__all__ = ["Graph"]
+__all__ = ["Graph", "build_input_state", "get_graph", "run_research"]
@@ -1,5 +1,12 @@
-from typing import TypedDict, NotRequired, Required, Dict, List, Any
-from backend.services.websocket_manager import WebSocketManager
+from typing import Annotated, TypedDict, NotRequired, Required, Dict, List, Any
+
+from langgraph.graph.message import add_messages
+
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer that merges dict updates written by parallel branches."""
+    return {**(left or {}), **(right or {})}
+
 
 #Define the input state
 class InputState(TypedDict, total=False):
@@ -7,16 +14,18 @@ class InputState(TypedDict, total=False):
     company_url: NotRequired[str]
     hq_location: NotRequired[str]
     industry: NotRequired[str]
-    websocket_manager: NotRequired[WebSocketManager]
     job_id: NotRequired[str]
 
 class ResearchState(InputState):
     site_scrape: Dict[str, Any]
-    messages: List[Any]
-    financial_data: Dict[str, Any]
-    news_data: Dict[str, Any]
-    industry_data: Dict[str, Any]
-    company_data: Dict[str, Any]
+    # Search queries per analyst type, written by the query planner
+    analyst_queries: Dict[str, List[str]]
+    messages: Annotated[List[Any], add_messages]
+    # Written concurrently by the analyst branches
+    financial_data: Annotated[Dict[str, Any], merge_dicts]
+    news_data: Annotated[Dict[str, Any], merge_dicts]
+    industry_data: Annotated[Dict[str, Any], merge_dicts]
+    company_data: Annotated[Dict[str, Any], merge_dicts]
     curated_financial_data: Dict[str, Any]
     curated_news_data: Dict[str, Any]
     curated_industry_data: Dict[str, Any]
@@ -26,7 +35,11 @@ class ResearchState(InputState):
     industry_briefing: str
     company_briefing: str
     references: List[str]
+    reference_titles: Dict[str, str]
+    reference_info: Dict[str, Dict[str, Any]]
     briefings: Dict[str, Any]
     report: str
+    error: str
     #
-    social_links: Dict[str, Any]
\ No newline at end of file
+    social_links: Dict[str, Any]
+    scrape_dir: str
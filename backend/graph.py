@@ -1,10 +1,11 @@
+import asyncio
 import logging
-from typing import Any, AsyncIterator, Dict
+from typing import Any, AsyncIterator, Dict, Optional
 
 from langchain_core.messages import SystemMessage
-from langgraph.graph import StateGraph
+from langgraph.graph import START, StateGraph
 
-from .classes.state import InputState
+from .classes.state import InputState, ResearchState
 from .nodes import GroundingNode
 from .nodes.researchers import (
     CompanyAnalyzer,
@@ -12,96 +13,258 @@ from .nodes.researchers import (
     IndustryAnalyzer,
     NewsScanner,
 )
+from .nodes.query_planner import QueryPlanner
 from .nodes.collector import Collector
 from .nodes.curator import Curator
 from .nodes.enricher import Enricher
 from .nodes.briefing import Briefing
 from .nodes.editor import Editor
+from .services.checkpoints import CHECKPOINT_TTL, close_checkpointer, create_checkpointer, expired_threads, thread_ids
+from .services.metrics import start_job_metrics, track_node
+from .services.progress import StateEvent, bind_job, emit_event, get_progress_bus
 
 logger = logging.getLogger(__name__)
 
+# Seconds between sweeps for abandoned jobs' checkpoints and scrape output
+SWEEP_INTERVAL = 3600
+
+
+def build_input_state(company=None, url=None, hq_location=None, industry=None,
+                      job_id=None) -> InputState:
+    """Build the per-job input state for a research run."""
+    return InputState(
+        company=company,
+        company_url=url,
+        hq_location=hq_location,
+        industry=industry,
+        job_id=job_id,
+        messages=[
+            SystemMessage(content="Expert researcher starting investigation")
+        ]
+    )
+
+
 class Graph:
-    def __init__(self, company=None, url=None, hq_location=None, industry=None,
-                 websocket_manager=None, job_id=None):
-        self.websocket_manager = websocket_manager
-        self.job_id = job_id
-        
-        # Initialize InputState
-        self.input_state = InputState(
-            company=company,
-            company_url=url,
-            hq_location=hq_location,
-            industry=industry,
-            websocket_manager=websocket_manager,
-            job_id=job_id,
-            messages=[
-                SystemMessage(content="Expert researcher starting investigation")
-            ]
-        )
+    """Node registry and compiled research workflow.
 
-        # Initialize nodes with WebSocket manager and job ID
+    The graph holds no per-job data: company and job ID arrive through the
+    input state and progress leaves through the progress bus, so one
+    instance is shared by every job in the process (see ``get_graph``).
+    """
+
+    # Analyst branches that search the planned queries; they run
+    # concurrently with the company analyst
+    search_analyst_nodes = ("financial_analyst", "news_scanner", "industry_analyst")
+
+    def __init__(self):
         self._init_nodes()
         self._build_workflow()
+        self.checkpointer = create_checkpointer()
+        self.compiled_graph = self.workflow.compile(checkpointer=self.checkpointer)
 
     def _init_nodes(self):
         """Initialize all workflow nodes"""
-        self.ground = GroundingNode()
-        self.financial_analyst = FinancialAnalyst()
-        self.news_scanner = NewsScanner()
-        self.industry_analyst = IndustryAnalyzer()
-        self.company_analyst = CompanyAnalyzer()
-        self.collector = Collector()
-        self.curator = Curator()
-        self.enricher = Enricher()
-        self.briefing = Briefing()
-        self.editor = Editor()
+        collector = Collector()
+        self.nodes = {
+            "grounding": GroundingNode(),
+            "query_planner": QueryPlanner(),
+            "financial_analyst": FinancialAnalyst(),
+            "news_scanner": NewsScanner(),
+            "industry_analyst": IndustryAnalyzer(),
+            "company_analyst": CompanyAnalyzer(collector=collector),
+            "collector": collector,
+            "curator": Curator(),
+            "enricher": Enricher(),
+            "briefing": Briefing(),
+            "editor": Editor(),
+        }
 
     def _build_workflow(self):
         """Configure the state graph workflow"""
-        self.workflow = StateGraph(InputState)
-        
+        self.workflow = StateGraph(ResearchState, input=InputState)
+
         # Add nodes with their respective processing functions
-        self.workflow.add_node("grounding", self.ground.run)
-        self.workflow.add_node("company_analyst", self.company_analyst.run)
-        self.workflow.add_node("collector", self.collector.run)
-        self.workflow.add_node("editor", self.editor.run)
+        for name, node in self.nodes.items():
+            self.workflow.add_node(name, self._instrument(name, node.run))
+        self.workflow.add_node("scrape_join", self._instrument("scrape_join", self.nodes["collector"].join_scrape))
 
-        # Configure workflow edges
-        self.workflow.set_entry_point("grounding")
+        # Configure workflow edges; query planning runs alongside grounding
+        self.workflow.add_edge(START, "grounding")
+        self.workflow.add_edge(START, "query_planner")
         self.workflow.set_finish_point("editor")
 
-        # Connect remaining nodes
+        # Fan out: the company analyst that finds social links starts as soon
+        # as grounding is done and launches the scrapers itself; the searching
+        # analysts also wait for their queries. Nodes run in supersteps, so a
+        # node after company_analyst would only start with the slowest analyst
         self.workflow.add_edge("grounding", "company_analyst")
-        self.workflow.add_edge("company_analyst", "collector")
-        self.workflow.add_edge("collector", "editor")
-
-    async def run(self, thread: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
-        """Execute the research workflow"""
-        compiled_graph = self.workflow.compile()
-        
-        async for state in compiled_graph.astream(
-            self.input_state,
-            thread
-        ):
-            if self.websocket_manager and self.job_id:
-                await self._handle_ws_update(state)
-            yield state
+        for analyst in self.search_analyst_nodes:
+            self.workflow.add_edge(["grounding", "query_planner"], analyst)
+        self.workflow.add_edge("company_analyst", "collector")  # reports the scrapers started
 
-    async def _handle_ws_update(self, state: Dict[str, Any]):
-        """Handle WebSocket updates based on state changes"""
-        update = {
-            "type": "state_update",
-            "data": {
-                "current_node": state.get("current_node", "unknown"),
-                "progress": state.get("progress", 0),
-                "keys": list(state.keys())
-            }
-        }
-        await self.websocket_manager.broadcast_to_job(
-            self.job_id,
-            update
+        # Fan in: curation waits for the slowest branch
+        self.workflow.add_edge(
+            ["financial_analyst", "news_scanner", "industry_analyst", "collector"],
+            "curator"
         )
-    
+        self.workflow.add_edge("curator", "enricher")
+        self.workflow.add_edge("enricher", "briefing")
+        self.workflow.add_edge("briefing", "scrape_join")  # the editor needs the scraped data
+        self.workflow.add_edge("scrape_join", "editor")
+
+    @staticmethod
+    def _instrument(name: str, func):
+        """Wrap a node function with latency, error and in-flight metrics."""
+        async def node(state: ResearchState) -> Dict[str, Any]:
+            async with track_node(name) as span:
+                update = await func(state)
+                # Nodes report most failures in state rather than raising
+                span.failed = isinstance(update, dict) and bool(update.get('error'))
+                return update
+        return node
+
+    async def run(self, input_state: Optional[InputState], thread: Dict[str, Any],
+                  job_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Execute the research workflow for a single job.
+
+        Passing ``input_state=None`` continues the job's thread from its last
+        checkpoint instead of starting over.
+        """
+        if input_state is not None:
+            job_id = input_state.get('job_id')
+
+        reported = False
+        try:
+            async for state in self.compiled_graph.astream(
+                input_state,
+                thread
+            ):
+                if job_id:
+                    self._publish_update(job_id, state)
+                reported = reported or bool((state.get('editor') or {}).get('report'))
+                yield state
+        finally:
+            # Stop scrapers left behind by a failed run. Their output stays
+            # as long as the job can be resumed (a resumed editor reads it);
+            # the TTL sweep removes it with the checkpoints otherwise
+            collector = self.nodes["collector"]
+            collector.discard(job_id or 'default')
+            if reported:
+                collector.cleanup(job_id or 'default')
+        # A job with its report can no longer be resumed; its checkpoints only take space
+        if reported and self.checkpointer is not None:
+            await self.checkpointer.adelete_thread(thread["configurable"]["thread_id"])
+
+    async def resume(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Continue a failed job from the last node that completed."""
+        if self.checkpointer is None:
+            raise ValueError("Checkpointing is not enabled")
+        thread = self.thread_config(job_id)
+        snapshot = await self.compiled_graph.aget_state(thread)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for job {job_id}")
+        if not snapshot.next:
+            if snapshot.values.get('report'):
+                raise ValueError(f"Job {job_id} already completed")
+            # The run finished without a report: run the editor again on the saved state
+            thread = await self.compiled_graph.aupdate_state(thread, None, as_node="scrape_join")
+
+        logger.info(f"Resuming job {job_id} at {list(snapshot.next) or ['editor']}")
+        async for state in self.run(None, thread, job_id=job_id):
+            yield state
+
+    async def sweep(self, ttl: float = CHECKPOINT_TTL) -> None:
+        """Delete the checkpoints and scrape output of jobs abandoned for ``ttl`` seconds."""
+        collector = self.nodes["collector"]
+        resumable = set()
+        if self.checkpointer is not None:
+            for thread_id in await expired_threads(self.checkpointer, ttl):
+                logger.info(f"Deleting checkpoints of abandoned job {thread_id}")
+                await self.checkpointer.adelete_thread(thread_id)
+                collector.cleanup(thread_id)
+            resumable = set(await thread_ids(self.checkpointer))
+        # Output of jobs that were never checkpointed; a resumable job keeps its own
+        collector.sweep(ttl, keep=resumable)
+
+    async def maintain(self, interval: float = SWEEP_INTERVAL) -> None:
+        """Sweep abandoned jobs every ``interval`` seconds; runs until cancelled."""
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Sweeping abandoned jobs failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def thread_config(job_id: str) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": job_id}}
+
+    async def aclose(self) -> None:
+        await close_checkpointer(self.checkpointer)
+
+    def _publish_update(self, job_id: str, state: Dict[str, Any]):
+        """Announce each node that finished and the state keys it wrote"""
+        for node, update in state.items():
+            keys = list(update.keys()) if isinstance(update, dict) else []
+            emit_event(StateEvent(job_id=job_id, node=node, keys=keys))
+
     def compile(self):
-        graph = self.workflow.compile()
-        return graph
\ No newline at end of file
+        return self.compiled_graph
+
+
+_graph: Optional[Graph] = None
+
+
+def get_graph() -> Graph:
+    """Return the process-wide graph, building it on first use."""
+    global _graph
+    if _graph is None:
+        logger.info("Building research graph")
+        _graph = Graph()
+    return _graph
+
+
+async def run_research(job_id: str, request: Dict[str, Any], resume: bool = False) -> Dict[str, Any]:
+    """Run (or resume) one research job on the shared graph and summarise its outcome.
+
+    Progress goes to the process's progress bus; only plain data is
+    returned, so the result can cross a process boundary.
+    """
+    # Nodes (and the tasks they spawn) emit progress for this job
+    bind_job(job_id)
+
+    graph = get_graph()
+    if resume:
+        stream = graph.resume(job_id)
+    else:
+        input_state = build_input_state(
+            company=request.get('company'),
+            url=request.get('company_url'),
+            industry=request.get('industry'),
+            hq_location=request.get('hq_location'),
+            job_id=job_id
+        )
+        stream = graph.run(input_state, thread=graph.thread_config(job_id))
+
+    # Node, step and provider timings of this job, kept with its record
+    job_metrics = start_job_metrics()
+
+    # Each streamed item maps a node name to the update it wrote
+    updates = {}
+    try:
+        async for update in stream:
+            updates.update(update)
+    finally:
+        # Deliver this job's progress before its final status goes out
+        await get_progress_bus().drain()
+
+    error = next(
+        (u['error'] for u in updates.values() if isinstance(u, dict) and u.get('error')),
+        None
+    )
+    return {
+        "report": (updates.get('editor') or {}).get('report'),
+        "error": error,
+        "nodes": list(updates.keys()),
+        "metrics": job_metrics.summary()
+    }
@@ -1,11 +1,11 @@
 import asyncio
 import logging
 import os
-from typing import Any, Dict, List, Union
-
-import google.generativeai as genai
+from typing import Any, Dict, List, Optional, Union
 
 from ..classes import ResearchState
+from ..services.progress import emit
+from ..services.providers import get_providers
 
 logger = logging.getLogger(__name__)
 
@@ -14,17 +14,20 @@ class Briefing:
     
     def __init__(self) -> None:
         self.max_doc_length = 8000  # Maximum document content length
+        # Characters of the company website each briefing category reads; news and
+        # financial briefings rely on dated third-party coverage and skip it
+        self.site_budgets = {'company': self.max_doc_length, 'industry': 3000}
         self.gemini_key = os.getenv("GEMINI_API_KEY")
         if not self.gemini_key:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
         
-        # Configure Gemini
-        genai.configure(api_key=self.gemini_key)
-        self.gemini_model = genai.GenerativeModel('gemini-2.0-flash')
+        # Shared, pooled Gemini client
+        self.gemini_client = get_providers().gemini
+        self.gemini_model = 'gemini-2.0-flash'
 
     async def generate_category_briefing(
         self, docs: Union[Dict[str, Any], List[Dict[str, Any]]], 
-        category: str, context: Dict[str, Any]
+        category: str, context: Dict[str, Any], site: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         company = context.get('company', 'Unknown')
         industry = context.get('industry', 'Unknown')
@@ -32,18 +35,15 @@ class Briefing:
         logger.info(f"Generating {category} briefing for {company} using {len(docs)} documents")
 
         # Send category start status
-        if websocket_manager := context.get('websocket_manager'):
-            if job_id := context.get('job_id'):
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="briefing_start",
-                    message=f"Generating {category} briefing",
-                    result={
-                        "step": "Briefing",
-                        "category": category,
-                        "total_docs": len(docs)
-                    }
-                )
+        emit(
+            status="briefing_start",
+            message=f"Generating {category} briefing",
+            result={
+                "step": "Briefing",
+                "category": category,
+                "total_docs": len(docs)
+            }
+        )
 
         prompts = {
             'company': f"""Create a focused company briefing for {company}, a {industry} company based in {hq_location}.
@@ -149,6 +149,17 @@ Key requirements:
         items = list(docs.items()) if isinstance(docs, dict) else [
             (doc.get('url', f'doc_{i}'), doc) for i, doc in enumerate(docs)
         ]
+
+        # References to the company website resolve to the single site document
+        doc_texts = []
+        site_budget = self.site_budgets.get(category, 0)
+        if site and site_budget and any(doc.get('site_ref') == site.get('id') for _, doc in items):
+            content = site.get('raw_content', '')
+            if len(content) > site_budget:
+                content = content[:site_budget] + "... [content truncated]"
+            doc_texts.append(f"Title: {site.get('title', '')}\n\nContent: {content}")
+        items = [(url, doc) for url, doc in items if not doc.get('site_ref')]
+
         # Sort documents by evaluation score (highest first)
         sorted_items = sorted(
             items, 
@@ -156,8 +167,7 @@ Key requirements:
             reverse=True
         )
         
-        doc_texts = []
-        total_length = 0
+        total_length = sum(len(doc_entry) for doc_entry in doc_texts)
         for _ , doc in sorted_items:
             title = doc.get('title', '')
             content = doc.get('raw_content') or doc.get('content', '')
@@ -181,51 +191,41 @@ Analyze the following documents and extract key information. Provide only the br
         
         try:
             logger.info("Sending prompt to LLM")
-            response = self.gemini_model.generate_content(prompt)
-            content = response.text.strip()
+            response = await self.gemini_client.generate_content(prompt, model=self.gemini_model)
+            content = response.strip()
             if not content:
                 logger.error(f"Empty response from LLM for {category} briefing")
                 return {'content': ''}
 
             # Send completion status
-            if websocket_manager := context.get('websocket_manager'):
-                if job_id := context.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="briefing_complete",
-                        message=f"Completed {category} briefing",
-                        result={
-                            "step": "Briefing",
-                            "category": category
-                        }
-                    )
+            emit(
+                status="briefing_complete",
+                message=f"Completed {category} briefing",
+                result={
+                    "step": "Briefing",
+                    "category": category
+                }
+            )
 
             return {'content': content}
         except Exception as e:
             logger.error(f"Error generating {category} briefing: {e}")
             return {'content': ''}
 
-    async def create_briefings(self, state: ResearchState) -> ResearchState:
+    async def create_briefings(self, state: ResearchState) -> Dict[str, Any]:
         """Create briefings for all categories in parallel."""
         company = state.get('company', 'Unknown Company')
-        websocket_manager = state.get('websocket_manager')
-        job_id = state.get('job_id')
-        
         # Send initial briefing status
-        if websocket_manager and job_id:
-            await websocket_manager.send_status_update(
-                job_id=job_id,
-                status="processing",
-                message="Starting research briefings",
-                result={"step": "Briefing"}
-            )
+        emit(
+            status="processing",
+            message="Starting research briefings",
+            result={"step": "Briefing"}
+        )
 
         context = {
             "company": company,
             "industry": state.get('industry', 'Unknown'),
-            "hq_location": state.get('hq_location', 'Unknown'),
-            "websocket_manager": websocket_manager,
-            "job_id": job_id
+            "hq_location": state.get('hq_location', 'Unknown')
         }
         logger.info(f"Creating section briefings for {company}")
         
@@ -238,12 +238,16 @@ Analyze the following documents and extract key information. Provide only the br
         }
         
         briefings = {}
+        updates = {}
 
         # Create tasks for parallel processing
         briefing_tasks = []
         for data_field, (cat, briefing_key) in categories.items():
             curated_key = f'curated_{data_field}'
             curated_data = state.get(curated_key, {})
+            if not self.site_budgets.get(cat):
+                # A website reference alone is no reason to write this briefing
+                curated_data = {url: doc for url, doc in curated_data.items() if not doc.get('site_ref')}
             
             if curated_data:
                 logger.info(f"Processing {data_field} with {len(curated_data)} documents")
@@ -257,35 +261,32 @@ Analyze the following documents and extract key information. Provide only the br
                 })
             else:
                 logger.info(f"No data available for {data_field}")
-                state[briefing_key] = ""
+                updates[briefing_key] = ""
 
-        # Process briefings in parallel with rate limiting
+        # Process briefings in parallel; Gemini calls share the provider's adaptive concurrency limit
         if briefing_tasks:
-            # Rate limiting semaphore for LLM API
-            briefing_semaphore = asyncio.Semaphore(2)  # Limit to 2 concurrent briefings
-            
             async def process_briefing(task: Dict[str, Any]) -> Dict[str, Any]:
-                """Process a single briefing with rate limiting."""
-                async with briefing_semaphore:
-                    result = await self.generate_category_briefing(
-                        task['curated_data'],
-                        task['category'],
-                        context
-                    )
-                    
-                    if result['content']:
-                        briefings[task['category']] = result['content']
-                        state[task['briefing_key']] = result['content']
-                        logger.info(f"Completed {task['data_field']} briefing ({len(result['content'])} characters)")
-                    else:
-                        logger.error(f"Failed to generate briefing for {task['data_field']}")
-                        state[task['briefing_key']] = ""
-                    
-                    return {
-                        'category': task['category'],
-                        'success': bool(result['content']),
-                        'length': len(result['content']) if result['content'] else 0
-                    }
+                """Process a single briefing."""
+                result = await self.generate_category_briefing(
+                    task['curated_data'],
+                    task['category'],
+                    context,
+                    site=state.get('site_scrape')
+                )
+                
+                if result['content']:
+                    briefings[task['category']] = result['content']
+                    updates[task['briefing_key']] = result['content']
+                    logger.info(f"Completed {task['data_field']} briefing ({len(result['content'])} characters)")
+                else:
+                    logger.error(f"Failed to generate briefing for {task['data_field']}")
+                    updates[task['briefing_key']] = ""
+                
+                return {
+                    'category': task['category'],
+                    'success': bool(result['content']),
+                    'length': len(result['content']) if result['content'] else 0
+                }
 
             # Process all briefings in parallel
             results = await asyncio.gather(*[
@@ -298,8 +299,8 @@ Analyze the following documents and extract key information. Provide only the br
             total_length = sum(r['length'] for r in results)
             logger.info(f"Generated {successful_briefings}/{len(briefing_tasks)} briefings with total length {total_length}")
 
-        state['briefings'] = briefings
-        return state
+        updates['briefings'] = briefings
+        return updates
 
-    async def run(self, state: ResearchState) -> ResearchState:
+    async def run(self, state: ResearchState) -> Dict[str, Any]:
         return await self.create_briefings(state)
\ No newline at end of file
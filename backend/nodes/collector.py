@@ -1,97 +1,178 @@
+from typing import Any, Collection, Dict, List
+
 from langchain_core.messages import AIMessage
 
 from ..classes import ResearchState
-import subprocess, asyncio
+from ..services.metrics import track_step
+from ..services.progress import emit
+import asyncio
 import logging
-from functools import partial
 import shutil, os
+import signal
+import sys
+import time
 
 logger = logging.getLogger(__name__)
 
 class Collector:
-    """Collects and organizes all scraped data before curation."""
+    """Runs the social media scrapers in the background and joins them before the editor.
 
-    async def collect(self, state: ResearchState) -> ResearchState:
-        """Collect and verify all scraped data is present."""
+    The company analyst starts a job's scrapers (``start``) as soon as its
+    social links are known; ``scrape_join`` waits for them.
+    """
 
-        company = state.get('company', 'Unknown Company')
-        msg = [f"📦 Collecting scraped data for {company}:"]
+    # Interpreter of the scraper venv and the folder holding scripts/ and data/
+    python_exe = os.getenv("SCRAPE_PYTHON", r".venv\Scripts\python.exe") # windows
+    base_cwd = os.getenv("SCRAPE_DIR", r"scrape")
+    scrapers = {
+        'youtube': "scripts/youtube_scrape.py",
+        'tiktok': "scripts/tiktok_scrape.py",
+        'facebook': "scripts/fb_scrape.py",
+    }
 
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="processing",
-                    message=f"Collecting scraped data for {company}",
-                    result={"step": "Collecting"}
-                )
+    def __init__(self) -> None:
+        # Scrapes still running, keyed by job ID; shared by every job in the process
+        self._scrapes: Dict[str, asyncio.Task] = {}
 
-        # Chuyển sang dict_links
-        dict_links = state['social_links']
+    def _data_dir(self, job_id: str) -> str:
+        return os.path.join(self.base_cwd, "data", job_id)
 
-        # TODO
-        try:
-            python_exe = r".venv\Scripts\python.exe" # windows
-            base_cwd = r"scrape"
-            data_dir = base_cwd + "/data"
+    def start(self, job_id: str, dict_links: Dict[str, str]) -> str:
+        """Start a job's scrapers in the background and return their output folder."""
+        data_dir = self._data_dir(job_id)
+        self.discard(job_id)
+        self._scrapes[job_id] = asyncio.create_task(self.scrape(dict_links, data_dir))
+        return data_dir
 
-            # Delete old files
-            shutil.rmtree(data_dir)
+    async def scrape(self, dict_links: Dict[str, str], data_dir: str) -> None:
+        """Run the scrapers for every resolved social link, writing into data_dir."""
+        try:
+            # Start from an empty output folder for this job
+            shutil.rmtree(data_dir, ignore_errors=True)
             os.makedirs(data_dir)
+            # Scrapers run with cwd=scrape, so hand them a path relative to it
+            output_dir = os.path.relpath(data_dir, self.base_cwd)
 
-            loop = asyncio.get_running_loop()
-
-            # Tạo 3 tasks subprocess chạy song song
+            # Tạo tasks subprocess chạy song song
             tasks = []
-            if 'youtube' in dict_links:
-                tasks.append(
-                    loop.run_in_executor(
-                        None,
-                        partial(subprocess.run, [python_exe, "scripts/youtube_scrape.py", "--link", dict_links['youtube']], cwd=base_cwd)
+            for source, script in self.scrapers.items():
+                if dict_links.get(source):
+                    tasks.append(
+                        self._run_scraper(source, [self.python_exe, script, "--link", dict_links[source], "--output-dir", output_dir])
                     )
-                )
-            if 'tiktok' in dict_links:
-                tasks.append(
-                    loop.run_in_executor(
-                        None,
-                        partial(subprocess.run, [python_exe, "scripts/tiktok_scrape.py", "--link", dict_links['tiktok']], cwd=base_cwd)
-                    )
-                )
-            if 'facebook' in dict_links:
-                tasks.append(
-                    loop.run_in_executor(
-                        None,
-                        partial(subprocess.run, [python_exe, "scripts/fb_scrape.py", "--link", dict_links['facebook']], cwd=base_cwd)
-                    )
-                )              
 
             # Chờ tất cả xong
             await asyncio.gather(*tasks)
 
         except Exception as e:
-            logger.error(f"🔥 PYTHON RUNTIME ERROR: {repr(e)}")                
-        
-        # Check each type of research data
-        research_types = {
-            'financial_data': '💰 Financial',
-            'news_data': '📰 News',
-            'industry_data': '🏭 Industry',
-            'company_data': '🏢 Company'
-        }
-        
-        for data_field, label in research_types.items():
-            data = state.get(data_field, {})
-            if data:
-                msg.append(f"• {label}: {len(data)} documents collected")
+            logger.error(f"🔥 PYTHON RUNTIME ERROR: {repr(e)}")
+
+    async def _run_scraper(self, source: str, command: List[str]) -> None:
+        async with track_step(f"scrape_{source}") as span:
+            # Own process group, so the browser it launches can be stopped with it
+            process = await asyncio.create_subprocess_exec(
+                *command, cwd=self.base_cwd, start_new_session=sys.platform != "win32")
+            try:
+                returncode = await process.wait()
+            except BaseException:
+                # Cancelled (failed or discarded job): the scraper must not outlive its task
+                await self._stop(process)
+                raise
+            span.failed = returncode != 0
+
+    @staticmethod
+    async def _stop(process: asyncio.subprocess.Process, grace: float = 5.0) -> None:
+        """Terminate a scraper and its browser, killing them after ``grace`` seconds."""
+        if process.returncode is not None:
+            return
+        logger.warning(f"Stopping scraper process {process.pid}")
+        try:
+            if sys.platform == "win32":
+                # taskkill /T also ends the Chrome processes started by the scraper
+                killer = await asyncio.create_subprocess_exec("taskkill", "/F", "/T", "/PID", str(process.pid))
+                await killer.wait()
             else:
-                msg.append(f"• {label}: No data found")
-        
-        # Update state with collection message
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        
-        return state
-
-    async def run(self, state: ResearchState) -> ResearchState:
-        return await self.collect(state)
\ No newline at end of file
+                os.killpg(process.pid, signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), grace)
+        except ProcessLookupError:
+            return
+        except asyncio.TimeoutError:
+            try:
+                if sys.platform == "win32":
+                    process.kill()
+                else:
+                    os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    async def collect(self, state: ResearchState) -> Dict[str, Any]:
+        """Report the scrapers started by the company analyst and the data collected so far."""
+
+        company = state.get('company', 'Unknown Company')
+        msg = [f"📦 Collecting scraped data for {company}:"]
+
+        emit(
+            status="processing",
+            message=f"Collecting scraped data for {company}",
+            result={"step": "Collecting"}
+        )
+
+        # The browsers run while search, curation and briefing proceed;
+        # join_scrape waits for them right before the editor
+        dict_links = state.get('social_links', {})
+        msg.append(f"• Social scrapers started for: {', '.join(s for s in self.scrapers if dict_links.get(s))}")
+
+        # Only the company analyst has finished on this branch; the curator
+        # reports every category's documents once the analysts join
+        if data := state.get('company_data', {}):
+            msg.append(f"• 🏢 Company: {len(data)} documents collected")
+        else:
+            msg.append("• 🏢 Company: No data found")
+
+        return {'messages': [AIMessage(content="\n".join(msg))]}
+
+    async def join_scrape(self, state: ResearchState) -> Dict[str, Any]:
+        """Wait for this job's background scrapers to finish."""
+        job_id = state.get('job_id') or 'default'
+        task = self._scrapes.pop(job_id, None)
+        if task is None:
+            # Nothing running in this process (e.g. a resumed job): scrape now
+            logger.info(f"No background scrape for job {job_id}, scraping inline")
+            await self.scrape(state.get('social_links', {}), state.get('scrape_dir') or self._data_dir(job_id))
+        else:
+            if not task.done():
+                emit(
+                    status="processing",
+                    message="Waiting for social media scrapers to finish",
+                    result={"step": "Collecting"}
+                )
+            await task
+        return {}
+
+    def discard(self, job_id: str) -> None:
+        """Cancel a job's background scrape if it is still pending."""
+        if task := self._scrapes.pop(job_id, None):
+            task.cancel()
+
+    def cleanup(self, job_id: str) -> None:
+        """Drop a finished job's scrape task and output folder."""
+        self.discard(job_id)
+        shutil.rmtree(self._data_dir(job_id), ignore_errors=True)
+
+    def sweep(self, ttl: float, keep: Collection[str] = ()) -> None:
+        """Delete output folders untouched for ``ttl`` seconds whose job is neither scraping nor in ``keep``."""
+        root = os.path.join(self.base_cwd, "data")
+        cutoff = time.time() - ttl
+        try:
+            entries = list(os.scandir(root))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if (entry.is_dir() and entry.name not in self._scrapes and entry.name not in keep
+                    and entry.stat().st_mtime < cutoff):
+                logger.info(f"Removing abandoned scrape output {entry.path}")
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    async def run(self, state: ResearchState) -> Dict[str, Any]:
+        return await self.collect(state)
@@ -1,119 +1,122 @@
 import logging
-from typing import Dict
-from urllib.parse import urljoin, urlparse
+import math
+from typing import Any, Dict, List, Tuple
 
+import numpy as np
 from langchain_core.messages import AIMessage
 
 from ..classes import ResearchState
+from ..services.progress import emit
 from ..utils.references import process_references_from_search_results
+from ..utils.minhash import MinHashIndex
+from ..utils.urls import canonical_url
 
 logger = logging.getLogger(__name__)
 
+
+def _score(doc: Dict[str, Any]) -> float:
+    try:
+        return float(doc.get('score', 0))
+    except (TypeError, ValueError):
+        return math.nan
+
+
 class Curator:
     def __init__(self) -> None:
         self.relevance_threshold = 0.4  # Fixed initialization of class attribute
-        logger.info("Curator initialized with relevance threshold: {relevance_threshhold}")
-
-    async def evaluate_documents(self, state: ResearchState, docs: list, context: Dict[str, str]) -> list:
-        """Evaluate documents based on Tavily's scoring."""
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                logger.info(f"Sending initial curation status update for job {job_id}")
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="processing",
-                    message="Evaluating documents",
-                    result={
-                        "step": "Curation",
-                    }
-                )
-        
+        self.max_docs_per_category = 30
+        # Word overlap (Jaccard) at which two documents count as the same content
+        self.duplicate_similarity = 0.7
+        logger.info(f"Curator initialized with relevance threshold: {self.relevance_threshold}")
+
+    def find_near_duplicates(self, docs: List[Dict[str, Any]], order: np.ndarray) -> Dict[int, List[int]]:
+        """Group near-identical documents (by MinHash of title and snippet) under their first in ``order``.
+
+        Returns the duplicates' indices keyed by the index of the document
+        kept in their place.
+        """
+        index = MinHashIndex(self.duplicate_similarity)
+        duplicates: Dict[int, List[int]] = {}
+        order = order.tolist()
+        signatures = index.signatures([f"{docs[i].get('title', '')} {docs[i].get('content', '')}" for i in order])
+        for i, signature in zip(order, signatures):
+            if signature is None:
+                continue
+            if (original := index.find(signature)) is not None:
+                duplicates.setdefault(original, []).append(i)
+            else:
+                index.add(signature, i)
+        return duplicates
+
+    def evaluate_documents(self, batches: Dict[str, List[Dict[str, Any]]]
+                           ) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, int]]:
+        """Select each category's best documents by Tavily score, highest first.
+
+        The scores of all categories go into one array; documents below
+        the relevance threshold are dropped, near-duplicates across all
+        categories collapse into their best-scored copy, and each
+        category's top ``max_docs_per_category`` are picked with
+        ``argpartition``. Also returns the duplicates dropped per category.
+        """
+        fields = list(batches)
+        docs = [doc for field in fields for doc in batches[field]]
         if not docs:
-            return []
-
-        logger.info(f"Evaluating {len(docs)} documents")
-        
-        evaluated_docs = []
-        try:
-            # Evaluate each document using Tavily's score
-            for doc in docs:
-                try:
-                    # Ensure score is a valid float
-                    tavily_score = float(doc.get('score', 0))  # Default to 0 if no score
-                    
-                    # Keep documents with good Tavily score
-                    if tavily_score >= self.relevance_threshold:
-                        logger.info(f"Document passed threshold with score {tavily_score:.4f} for '{doc.get('title', 'No title')}'")
-                        
-                        evaluated_doc = {
-                            **doc,
-                            "evaluation": {
-                                "overall_score": tavily_score,  # Store as float
-                                "query": doc.get('query', '')
-                            }
-                        }
-                        evaluated_docs.append(evaluated_doc)
-                        
-                        # Send incremental update for kept document
-                        if websocket_manager := state.get('websocket_manager'):
-                            if job_id := state.get('job_id'):
-                                await websocket_manager.send_status_update(
-                                    job_id=job_id,
-                                    status="document_kept",
-                                    message=f"Kept document: {doc.get('title', 'No title')}",
-                                    result={
-                                        "step": "Curation",
-                                        "doc_type": doc.get('doc_type', 'unknown'),
-                                        "title": doc.get('title', 'No title'),
-                                        "score": tavily_score
-                                    }
-                                )
-                    else:
-                        logger.info(f"Document below threshold with score {tavily_score:.4f} for '{doc.get('title', 'No title')}'")
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Error processing score for document: {e}")
-                    continue
-                    
-        except Exception as e:
-            logger.error(f"Error during document evaluation: {e}")
-            return []
-
-        # Sort evaluated docs by score before returning
-        evaluated_docs.sort(key=lambda x: float(x['evaluation']['overall_score']), reverse=True)
-        logger.info(f"Returning {len(evaluated_docs)} evaluated documents")
-        
-        return evaluated_docs
-
-    async def curate_data(self, state: ResearchState) -> ResearchState:
+            return {field: [] for field in fields}, {field: 0 for field in fields}
+
+        # Unparseable scores become NaN, which never passes the threshold
+        scores = np.fromiter((_score(doc) for doc in docs), dtype=float, count=len(docs))
+        categories = np.repeat(np.arange(len(fields)), [len(batches[field]) for field in fields])
+        relevant = scores >= self.relevance_threshold
+
+        # Syndicated copies keep one representative that lists the others as alternate references
+        candidates = np.flatnonzero(relevant)
+        duplicates = self.find_near_duplicates(docs, candidates[np.argsort(-scores[candidates], kind="stable")])
+        dropped = [i for copies in duplicates.values() for i in copies]
+        relevant[dropped] = False
+        dropped_per_category = np.bincount(categories[dropped], minlength=len(fields))
+
+        selected = {}
+        for category, field in enumerate(fields):
+            indices = np.flatnonzero(relevant & (categories == category))
+            if len(indices) > self.max_docs_per_category:
+                top = np.argpartition(-scores[indices], self.max_docs_per_category - 1)
+                indices = indices[top[:self.max_docs_per_category]]
+            indices = indices[np.argsort(-scores[indices], kind="stable")]
+            selected[field] = [
+                {
+                    **docs[i],
+                    "evaluation": {
+                        "overall_score": float(scores[i]),
+                        "query": docs[i].get('query', '')
+                    },
+                    **({"alternates": [
+                        {"url": docs[j].get('url'), "title": docs[j].get('title', ''), "doc_type": docs[j].get('doc_type')}
+                        for j in duplicates[i]
+                    ]} if i in duplicates else {})
+                }
+                for i in indices
+            ]
+        return selected, {field: int(count) for field, count in zip(fields, dropped_per_category)}
+
+    async def curate_data(self, state: ResearchState) -> Dict[str, Any]:
         """Curate all collected data based on Tavily scores."""
         company = state.get('company', 'Unknown Company')
         logger.info(f"Starting curation for company: {company}")
         
         # Send initial status update through WebSocket
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                logger.info(f"Sending initial curation status update for job {job_id}")
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="processing",
-                    message=f"Starting document curation for {company}",
-                    result={
-                        "step": "Curation",
-                        "doc_counts": {
-                            "company": {"initial": 0, "kept": 0},
-                            "industry": {"initial": 0, "kept": 0},
-                            "financial": {"initial": 0, "kept": 0},
-                            "news": {"initial": 0, "kept": 0}
-                        }
-                    }
-                )
-
-        industry = state.get('industry', 'Unknown')
-        context = {
-            "company": company,
-            "industry": industry,
-            "hq_location": state.get('hq_location', 'Unknown')
-        }
+        emit(
+            status="processing",
+            message=f"Starting document curation for {company}",
+            result={
+                "step": "Curation",
+                "doc_counts": {
+                    "company": {"initial": 0, "kept": 0},
+                    "industry": {"initial": 0, "kept": 0},
+                    "financial": {"initial": 0, "kept": 0},
+                    "news": {"initial": 0, "kept": 0}
+                }
+            }
+        )
 
         msg = [f"🔍 Curating research data for {company}"]
         
@@ -131,64 +134,52 @@ class Curator:
             if not data:
                 continue
 
-            # Filter and normalize URLs
+            # Key documents by canonical URL; each keeps the URL it was found at
             unique_docs = {}
             for url, doc in data.items():
-                try:
-                    parsed = urlparse(url)
-                    if not parsed.scheme:
-                        url = urljoin('https://', url)
-                    clean_url = parsed._replace(query='', fragment='').geturl()
-                    if clean_url not in unique_docs:
-                        doc['url'] = clean_url
-                        doc['doc_type'] = doc_type
-                        unique_docs[clean_url] = doc
-                except Exception:
-                    continue
-
-            docs = list(unique_docs.values())
-            curation_tasks.append((data_field, emoji, doc_type, unique_docs.keys(), docs))
+                clean_url = canonical_url(doc.get('url') or url)
+                if clean_url and clean_url not in unique_docs:
+                    doc.setdefault('url', url)
+                    doc['doc_type'] = doc_type
+                    unique_docs[clean_url] = doc
+
+            # The company website reference has no search score; the briefing decides where it is used
+            site_refs = {url: doc for url, doc in unique_docs.items() if doc.get('site_ref')}
+            docs = [doc for doc in unique_docs.values() if not doc.get('site_ref')]
+            curation_tasks.append((data_field, emoji, doc_type, site_refs, docs))
 
         # Track document counts for each type
         doc_counts = {}
+        curated = {}
 
-        for data_field, emoji, doc_type, urls, docs in curation_tasks:
-            msg.append(f"\n{emoji}: Found {len(docs)} documents")
-
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="category_start",
-                        message=f"Processing {doc_type} documents",
-                        result={
-                            "step": "Curation",
-                            "doc_type": doc_type,
-                            "initial_count": len(docs)
-                        }
-                    )
-
-            evaluated_docs = await self.evaluate_documents(state, docs, context)
-
-            if not evaluated_docs:
-                msg.append("  ⚠️ No relevant documents found")
-                doc_counts[data_field] = {"initial": len(docs), "kept": 0}
-                continue
+        selected, duplicates = self.evaluate_documents(
+            {data_field: docs for data_field, _, _, _, docs in curation_tasks})
 
-            # Filter and sort by Tavily score
-            relevant_docs = {url: doc for url, doc in zip(urls, evaluated_docs)}
-            sorted_items = sorted(relevant_docs.items(), key=lambda item: item[1]['evaluation']['overall_score'], reverse=True)
-            
-            # Limit to top 30 documents per category
-            if len(sorted_items) > 30:
-                sorted_items = sorted_items[:30]
-            relevant_docs = dict(sorted_items)
+        for data_field, emoji, doc_type, site_refs, docs in curation_tasks:
+            relevant_docs = {canonical_url(doc['url']): doc for doc in selected[data_field]}
+            msg.append(f"\n{emoji}: Found {len(docs)} documents")
 
             doc_counts[data_field] = {
                 "initial": len(docs),
                 "kept": len(relevant_docs)
             }
 
+            # One summary per category instead of an event per kept document
+            emit(
+                status="category_curated",
+                message=f"Kept {len(relevant_docs)} of {len(docs)} {doc_type} documents",
+                result={
+                    "step": "Curation",
+                    "doc_type": doc_type,
+                    "initial_count": len(docs),
+                    "kept": len(relevant_docs),
+                    "duplicates": duplicates[data_field],
+                    "top_score": selected[data_field][0]['evaluation']['overall_score'] if relevant_docs else None
+                }
+            )
+
+            if duplicates[data_field]:
+                msg.append(f"  ♻️ Dropped {duplicates[data_field]} near-duplicate documents")
             if relevant_docs:
                 msg.append(f"  ✓ Kept {len(relevant_docs)} relevant documents")
                 logger.info(f"Kept {len(relevant_docs)} documents for {doc_type} with scores above threshold")
@@ -196,40 +187,38 @@ class Curator:
                 msg.append("  ⚠️ No documents met relevance threshold")
                 logger.info(f"No documents met relevance threshold for {doc_type}")
 
-            # Store curated documents in state
-            state[f'curated_{data_field}'] = relevant_docs
+            # Store curated documents for the state update
+            if site_refs or relevant_docs:
+                curated[f'curated_{data_field}'] = {**site_refs, **relevant_docs}
             
         # Process references using the references module
-        top_reference_urls, reference_titles, reference_info = process_references_from_search_results(state)
+        scored = {field: {url: doc for url, doc in docs.items() if not doc.get('site_ref')}
+                  for field, docs in curated.items()}
+        top_reference_urls, reference_titles, reference_info = process_references_from_search_results(scored)
         logger.info(f"Selected top {len(top_reference_urls)} references for the report")
-        
-        # Update state with references and their titles
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        state['references'] = top_reference_urls
-        state['reference_titles'] = reference_titles
-        state['reference_info'] = reference_info
 
         # Send final curation stats
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="curation_complete",
-                    message="Document curation complete",
-                    result={
-                        "step": "Curation",
-                        "doc_counts": {
-                            "company": doc_counts.get('company_data', {"initial": 0, "kept": 0}),
-                            "industry": doc_counts.get('industry_data', {"initial": 0, "kept": 0}),
-                            "financial": doc_counts.get('financial_data', {"initial": 0, "kept": 0}),
-                            "news": doc_counts.get('news_data', {"initial": 0, "kept": 0})
-                        }
-                    }
-                )
-
-        return state
-
-    async def run(self, state: ResearchState) -> ResearchState:
+        emit(
+            status="curation_complete",
+            message="Document curation complete",
+            result={
+                "step": "Curation",
+                "doc_counts": {
+                    "company": doc_counts.get('company_data', {"initial": 0, "kept": 0}),
+                    "industry": doc_counts.get('industry_data', {"initial": 0, "kept": 0}),
+                    "financial": doc_counts.get('financial_data', {"initial": 0, "kept": 0}),
+                    "news": doc_counts.get('news_data', {"initial": 0, "kept": 0})
+                }
+            }
+        )
+
+        return {
+            **curated,
+            'messages': [AIMessage(content="\n".join(msg))],
+            'references': top_reference_urls,
+            'reference_titles': reference_titles,
+            'reference_info': reference_info
+        }
+
+    async def run(self, state: ResearchState) -> Dict[str, Any]:
         return await self.curate_data(state)
@@ -4,9 +4,11 @@ from typing import Any, Dict
 from pathlib import Path
 
 from langchain_core.messages import AIMessage
-from openai import AsyncOpenAI
 
 from ..classes import ResearchState
+from ..services.metrics import timed_step
+from ..services.progress import emit
+from ..services.providers import get_providers
 from ..utils.references import format_references_section
 
 logger = logging.getLogger(__name__)
@@ -22,39 +24,22 @@ class Editor:
         if not self.openai_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
         
-        # Configure OpenAI
-        self.openai_client = AsyncOpenAI(api_key=self.openai_key)
-        
-        # Initialize context dictionary for use across methods
-        self.context = {
-            "company": "Unknown Company",
-            "industry": "Unknown",
-            "hq_location": "Unknown"
-        }
+        # Shared, pooled OpenAI client
+        self.openai_client = get_providers().openai
 
-    async def compile_briefings(self, state: ResearchState) -> ResearchState:
+    async def compile_briefings(self, state: ResearchState) -> Dict[str, Any]:
         """Compile individual briefing categories from state into a final report."""
         company = state.get('company', 'Unknown Company')
         
-        # Update context with values from state
-        self.context = {
-            "company": company,
-            "industry": state.get('industry', 'Unknown'),
-            "hq_location": state.get('hq_location', 'Unknown')
-        }
-        
         # Send initial compilation status
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="processing",
-                    message=f"Starting report compilation for {company}",
-                    result={
-                        "step": "Editor",
-                        "substep": "initialization"
-                    }
-                )
+        emit(
+            status="processing",
+            message=f"Starting report compilation for {company}",
+            result={
+                "step": "Editor",
+                "substep": "initialization"
+            }
+        )
 
         context = {
             "company": company,
@@ -73,80 +58,68 @@ class Editor:
         }
 
         # Send briefing collection status
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="processing",
-                    message="Collecting section briefings",
-                    result={
-                        "step": "Editor",
-                        "substep": "collecting_briefings"
-                    }
-                )
-
-        # TODO
+        emit(
+            status="processing",
+            message="Collecting section briefings",
+            result={
+                "step": "Editor",
+                "substep": "collecting_briefings"
+            }
+        )
+
+        updates = {'messages': [AIMessage(content="\n".join(msg))]}
         try:
             compiled_report = await self.edit_report(state, context)
             if not compiled_report or not compiled_report.strip():
                 logger.error("Compiled report is empty!")
             else:
                 logger.info(f"Successfully compiled report with {len(compiled_report)} characters")
+                updates['report'] = compiled_report
         except Exception as e:
             logger.error(f"Error during report compilation: {e}")
 
-        state.setdefault('messages', []).append(AIMessage(content="\n".join(msg)))
-        return state
+        return updates
     
     async def edit_report(self, state: ResearchState, context: Dict[str, Any]) -> str:
         """Compile section briefings into a final report and update the state."""
         try:
-            company = self.context["company"]
+            company = context["company"]
             
             # Step 1: Initial Compilation
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message="Compiling initial research report",
-                        result={
-                            "step": "Editor",
-                            "substep": "compilation"
-                        }
-                    )
-
-            edited_report = await self.compile_content(state, company)
+            emit(
+                status="processing",
+                message="Compiling initial research report",
+                result={
+                    "step": "Editor",
+                    "substep": "compilation"
+                }
+            )
+
+            edited_report = await self.compile_content(state, context)
             if not edited_report:
                 logger.error("Initial compilation failed")
                 return ""
 
             # Step 2: Deduplication and Cleanup
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message="Cleaning up and organizing report",
-                        result={
-                            "step": "Editor",
-                            "substep": "cleanup"
-                        }
-                    )
+            emit(
+                status="processing",
+                message="Cleaning up and organizing report",
+                result={
+                    "step": "Editor",
+                    "substep": "cleanup"
+                }
+            )
 
             # Step 3: Formatting Final Report
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message="Formatting final report",
-                        result={
-                            "step": "Editor",
-                            "substep": "format"
-                        }
-                    )
-            final_report = await self.content_sweep(state, edited_report, company)
+            emit(
+                status="processing",
+                message="Formatting final report",
+                result={
+                    "step": "Editor",
+                    "substep": "format"
+                }
+            )
+            final_report = await self.content_sweep(state, edited_report, context)
             
             final_report = final_report or ""
             
@@ -158,42 +131,37 @@ class Editor:
             logger.info("Final report preview:")
             logger.info(final_report[:500])
             
-            # Update state with the final report in two locations
-            state['report'] = final_report
-            state['status'] = "editor_complete"
-            if 'editor' not in state or not isinstance(state['editor'], dict):
-                state['editor'] = {}
-            state['editor']['report'] = final_report
-            logger.info(f"Report length in state: {len(state.get('report', ''))}")
-            
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="editor_complete",
-                        message="Research report completed",
-                        result={
-                            "step": "Editor",
-                            "report": final_report,
-                            "company": company,
-                            "is_final": True,
-                            "status": "completed"
-                        }
-                    )
+            emit(
+                status="editor_complete",
+                message="Research report completed",
+                result={
+                    "step": "Editor",
+                    "report": final_report,
+                    "company": company,
+                    "is_final": True,
+                    "status": "completed"
+                }
+            )
             
             return final_report
         except Exception as e:
             logger.error(f"Error in edit_report: {e}")
             return ""
     
-    async def compile_content(self, state: ResearchState, company: str) -> str:
+    @timed_step("compile_content")
+    async def compile_content(self, state: ResearchState, context: Dict[str, Any]) -> str:
         """Initial compilation of research sections."""
 
-        # TODO
-        # combined_content = "\n\n".join(content for content in briefings.values())
-        base_path = Path("scrape/data")
+        # Section briefings from the analyst branches come first
+        chunks = [
+            f"{category} briefing\n{content}"
+            for category, content in state.get('briefings', {}).items()
+            if content
+        ]
+
+        # Written by this job's background scrapers (see Collector)
+        base_path = Path(state.get('scrape_dir') or "scrape/data")
         files = ["fb.txt", "tiktok.txt", "youtube.txt"]
-        chunks = []
 
         for file in files:
             file_path = base_path / file
@@ -224,10 +192,10 @@ class Editor:
             reference_text = format_references_section(references, reference_info, reference_titles)
             logger.info(f"Added {len(references)} references during compilation")
         
-        # Use values from centralized context
-        company = self.context["company"]
-        industry = self.context["industry"]
-        hq_location = self.context["hq_location"]
+        # Use values from the per-job context
+        company = context["company"]
+        industry = context["industry"]
+        hq_location = context["hq_location"]
 
         youtube_link = state['social_links']['youtube']
         fb_link = state['social_links']['facebook']
@@ -286,12 +254,13 @@ class Editor:
             logger.error(f"Error in initial compilation: {e}")
             return (combined_content or "").strip()
         
-    async def content_sweep(self, state: ResearchState, content: str, company: str) -> str:
+    @timed_step("content_sweep")
+    async def content_sweep(self, state: ResearchState, content: str, context: Dict[str, Any]) -> str:
         """Sweep the content for any redundant information."""
-        # Use values from centralized context
-        company = self.context["company"]
-        industry = self.context["industry"]
-        hq_location = self.context["hq_location"]
+        # Use values from the per-job context
+        company = context["company"]
+        industry = context["industry"]
+        hq_location = context["hq_location"]
         
         prompt = f"""You are an expert briefing editor. You are given a report on {company}.
 
@@ -346,14 +315,11 @@ class Editor:
             accumulated_text = ""
             buffer = ""
             
-            async for chunk in response:
-                if chunk.choices[0].finish_reason == "stop":
-                    websocket_manager = state.get('websocket_manager')
-                    if websocket_manager and buffer:
-                        job_id = state.get('job_id')
-                        if job_id:
-                            await websocket_manager.send_status_update(
-                                job_id=job_id,
+            try:
+                async for chunk in response:
+                    if chunk.choices[0].finish_reason == "stop":
+                        if buffer:
+                            emit(
                                 status="report_chunk",
                                 message="Formatting final report",
                                 result={
@@ -361,37 +327,33 @@ class Editor:
                                     "step": "Editor"
                                 }
                             )
-                    break
+                        break
                     
-                chunk_text = chunk.choices[0].delta.content
-                if chunk_text:
-                    accumulated_text += chunk_text
-                    buffer += chunk_text
+                    chunk_text = chunk.choices[0].delta.content
+                    if chunk_text:
+                        accumulated_text += chunk_text
+                        buffer += chunk_text
                     
-                    if any(char in buffer for char in ['.', '!', '?', '\n']) and len(buffer) > 10:
-                        if websocket_manager := state.get('websocket_manager'):
-                            if job_id := state.get('job_id'):
-                                await websocket_manager.send_status_update(
-                                    job_id=job_id,
-                                    status="report_chunk",
-                                    message="Formatting final report",
-                                    result={
-                                        "chunk": buffer,
-                                        "step": "Editor"
-                                    }
-                                )
-                        buffer = ""
-            
+                        if any(char in buffer for char in ['.', '!', '?', '\n']) and len(buffer) > 10:
+                            emit(
+                                status="report_chunk",
+                                message="Formatting final report",
+                                result={
+                                    "chunk": buffer,
+                                    "step": "Editor"
+                                }
+                            )
+                            buffer = ""
+            finally:
+                # Stopping at the "stop" chunk leaves the body unread; release its connection
+                await response.close()
+
             return (accumulated_text or "").strip()
         except Exception as e:
             logger.error(f"Error in formatting: {e}")
             return (content or "").strip()
 
-    async def run(self, state: ResearchState) -> ResearchState:
-        state = await self.compile_briefings(state)
-        # Ensure the Editor node's output is stored both top-level and under "editor"
-        if 'report' in state:
-            if 'editor' not in state or not isinstance(state['editor'], dict):
-                state['editor'] = {}
-            state['editor']['report'] = state['report']
-        return state
+    async def run(self, state: ResearchState) -> Dict[str, Any]:
+        # The update is streamed under the "editor" key, where
+        # process_research looks for the report
+        return await self.compile_briefings(state)
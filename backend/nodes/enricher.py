@@ -1,11 +1,17 @@
 import asyncio
+import logging
 import os
-from typing import Dict, List
+from typing import Any, Dict, List
 
+import httpx
 from langchain_core.messages import AIMessage
-from tavily import AsyncTavilyClient
 
 from ..classes import ResearchState
+from ..services.progress import emit
+from ..services.providers import RETRY_STATUSES, ProviderError, get_providers
+from ..utils.urls import canonical_url
+
+logger = logging.getLogger(__name__)
 
 
 class Enricher:
@@ -15,94 +21,150 @@ class Enricher:
         tavily_key = os.getenv("TAVILY_API_KEY")
         if not tavily_key:
             raise ValueError("TAVILY_API_KEY environment variable is not set")
-        self.tavily_client = AsyncTavilyClient(api_key=tavily_key)
+        self.tavily_client = get_providers().tavily
         self.batch_size = 20
 
-    async def fetch_single_content(self, url: str, websocket_manager=None, job_id=None, category=None) -> Dict[str, str]:
+    async def fetch_single_content(self, url: str, category=None) -> Dict[str, str]:
         """Fetch raw content for a single URL."""
         try:
-            if websocket_manager and job_id:
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="extracting",
-                    message=f"Extracting content from {url}",
+            emit(
+                status="extracting",
+                message=f"Extracting content from {url}",
+                result={
+                    "step": "Enriching",
+                    "url": url,
+                    "category": category
+                }
+            )
+
+            result = await self.tavily_client.extract(url)
+            if result and result.get('results'):
+                emit(
+                    status="extracted",
+                    message=f"Successfully extracted content from {url}",
                     result={
                         "step": "Enriching",
                         "url": url,
-                        "category": category
+                        "category": category,
+                        "success": True
                     }
                 )
-
-            result = await self.tavily_client.extract(url)
-            if result and result.get('results'):
-                if websocket_manager and job_id:
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="extracted",
-                        message=f"Successfully extracted content from {url}",
-                        result={
-                            "step": "Enriching",
-                            "url": url,
-                            "category": category,
-                            "success": True
-                        }
-                    )
                 return {url: result['results'][0].get('raw_content', '')}
         except Exception as e:
             print(f"Error fetching raw content for {url}: {e}")
             error_msg = str(e)
-            if websocket_manager and job_id:
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
+            emit(
+                status="extraction_error",
+                message=f"Failed to extract content from {url}: {error_msg}",
+                result={
+                    "step": "Enriching",
+                    "url": url,
+                    "category": category,
+                    "success": False,
+                    "error": error_msg
+                }
+            )
+            return {url: '', "error": error_msg}
+        return {url: ''}
+
+    async def _extract_batch(self, urls: List[str]) -> Dict[str, Any]:
+        """One multi-URL extract request, tried once more if the provider was overloaded or unreachable.
+
+        The retry waits for a slot of Tavily's adaptive concurrency limit,
+        which has shrunk after the failure.
+        """
+        try:
+            return await self.tavily_client.extract(urls)
+        except (ProviderError, httpx.TransportError) as e:
+            if isinstance(e, ProviderError) and e.status_code not in RETRY_STATUSES:
+                raise
+            logger.warning(f"Extract request for {len(urls)} URLs failed ({e}); retrying once")
+            return await self.tavily_client.extract(urls)
+
+    async def fetch_batch_content(self, urls: List[str], category=None) -> Dict[str, Any]:
+        """Fetch raw content for a batch of URLs with one multi-URL extract request.
+
+        URLs missing from the response are fetched again one by one.
+        Failures are returned as ``{'error': message}``; when the request
+        itself fails, that is every URL of the batch.
+        """
+        for url in urls:
+            emit(
+                status="extracting",
+                message=f"Extracting content from {url}",
+                result={
+                    "step": "Enriching",
+                    "url": url,
+                    "category": category
+                }
+            )
+
+        contents = {}
+        try:
+            result = await self._extract_batch(urls)
+        except Exception as e:
+            # Splitting a rejected batch into single-URL requests would only add load
+            logger.error(f"Error fetching raw content for batch of {len(urls)} URLs: {e}")
+            for url in urls:
+                emit(
                     status="extraction_error",
-                    message=f"Failed to extract content from {url}: {error_msg}",
+                    message=f"Failed to extract content from {url}: {e}",
                     result={
                         "step": "Enriching",
                         "url": url,
                         "category": category,
                         "success": False,
-                        "error": error_msg
+                        "error": str(e)
+                    }
+                )
+            return {url: {'error': str(e)} for url in urls}
+
+        # Tavily may return a URL in another form than it was requested
+        requested = {canonical_url(url): url for url in urls}
+        for item in result.get('results') or []:
+            url = requested.get(canonical_url(item.get('url') or ''))
+            if url and item.get('raw_content') and url not in contents:
+                contents[url] = item['raw_content']
+                emit(
+                    status="extracted",
+                    message=f"Successfully extracted content from {url}",
+                    result={
+                        "step": "Enriching",
+                        "url": url,
+                        "category": category,
+                        "success": True
                     }
                 )
-            return {url: '', "error": error_msg}
-        return {url: ''}
 
-    async def fetch_raw_content(self, urls: List[str], websocket_manager=None, job_id=None, category=None) -> Dict[str, str]:
-        """Fetch raw content for multiple URLs in parallel."""
+        # URLs the batch could not extract fall back to single-URL requests
+        retries = [url for url in urls if url not in contents]
+        for single in await asyncio.gather(*[self.fetch_single_content(url, category) for url in retries]):
+            error = single.pop("error", None)
+            for url, content in single.items():
+                contents[url] = {'error': error} if error else content
+        return contents
+
+    async def fetch_raw_content(self, urls: List[str], category=None) -> Dict[str, Any]:
+        """Fetch raw content for multiple URLs, one extract request per batch, batches in parallel."""
         raw_contents = {}
         total_batches = (len(urls) + self.batch_size - 1) // self.batch_size
 
         # Create batches
         batches = [urls[i:i + self.batch_size] for i in range(0, len(urls), self.batch_size)]
         
-        # Process batches in parallel with rate limiting
-        semaphore = asyncio.Semaphore(3)  # Limit concurrent batches to 3
-        
-        async def process_batch(batch_num: int, batch_urls: List[str]) -> Dict[str, str]:
-            async with semaphore:
-                if websocket_manager and job_id:
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="batch_start",
-                        message=f"Processing batch {batch_num + 1}/{total_batches}",
-                        result={
-                            "step": "Enriching",
-                            "batch": batch_num + 1,
-                            "total_batches": total_batches,
-                            "category": category
-                        }
-                    )
-
-                # Process URLs in batch concurrently
-                tasks = [self.fetch_single_content(url, websocket_manager, job_id, category) for url in batch_urls]
-                results = await asyncio.gather(*tasks)
-                
-                # Combine results from batch
-                batch_contents = {}
-                for result in results:
-                    batch_contents.update(result)
-                
-                return batch_contents
+        # Extractions are throttled by the provider's adaptive concurrency limit
+        async def process_batch(batch_num: int, batch_urls: List[str]) -> Dict[str, Any]:
+            emit(
+                status="batch_start",
+                message=f"Processing batch {batch_num + 1}/{total_batches}",
+                result={
+                    "step": "Enriching",
+                    "batch": batch_num + 1,
+                    "total_batches": total_batches,
+                    "category": category
+                }
+            )
+            return await self.fetch_batch_content(batch_urls, category)
 
         # Process all batches
         batch_results = await asyncio.gather(*[
@@ -116,22 +178,18 @@ class Enricher:
 
         return raw_contents
 
-    async def enrich_data(self, state: ResearchState) -> ResearchState:
+    async def enrich_data(self, state: ResearchState) -> Dict[str, Any]:
         """Enrich curated documents with raw content."""
         company = state.get('company', 'Unknown Company')
-        websocket_manager = state.get('websocket_manager')
-        job_id = state.get('job_id')
-
-        if websocket_manager and job_id:
-            await websocket_manager.send_status_update(
-                job_id=job_id,
-                status="processing",
-                message=f"Starting content enrichment for {company}",
-                result={
-                    "step": "Enriching",
-                    "substep": "initialization"
-                }
-            )
+
+        emit(
+            status="processing",
+            message=f"Starting content enrichment for {company}",
+            result={
+                "step": "Enriching",
+                "substep": "initialization"
+            }
+        )
 
         msg = [f"📚 Enriching curated data for {company}:"]
 
@@ -143,8 +201,9 @@ class Enricher:
             'company_data': ('🏢 Company', 'company')
         }
 
-        # Create tasks for parallel processing
+        # Create tasks for parallel processing; a page curated into several categories is fetched once
         enrichment_tasks = []
+        claimed = set()
         for data_field, (label, category) in data_types.items():
             curated_field = f'curated_{data_field}'
             curated_docs = state.get(curated_field, {})
@@ -153,9 +212,9 @@ class Enricher:
                 msg.append(f"\n• No curated {label} documents to enrich")
                 continue
 
-            # Find documents needing enrichment
-            docs_needing_content = {url: doc for url, doc in curated_docs.items() 
-                                  if not doc.get('raw_content')}
+            # Find documents needing enrichment; the company website was extracted by grounding
+            docs_needing_content = {url: doc for url, doc in curated_docs.items()
+                                  if not doc.get('raw_content') and not doc.get('site_ref')}
             
             if not docs_needing_content:
                 msg.append(f"\n• All {label} documents already have raw content")
@@ -163,17 +222,22 @@ class Enricher:
             
             msg.append(f"\n• Enriching {len(docs_needing_content)} {label} documents...")
 
-            if websocket_manager and job_id:
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="category_start",
-                    message=f"Processing {label} documents",
-                    result={
-                        "step": "Enriching",
-                        "category": category,
-                        "count": len(docs_needing_content)
-                    }
-                )
+            emit(
+                status="category_start",
+                message=f"Processing {label} documents",
+                result={
+                    "step": "Enriching",
+                    "category": category,
+                    "count": len(docs_needing_content)
+                }
+            )
+
+            # Fetch the URL each document was found at; its canonical form may not be served
+            fetch_urls = []
+            for url, doc in docs_needing_content.items():
+                if (key := canonical_url(url)) not in claimed:
+                    claimed.add(key)
+                    fetch_urls.append(doc.get('url') or url)
 
             # Create task for this category
             enrichment_tasks.append({
@@ -181,17 +245,18 @@ class Enricher:
                 'category': category,
                 'label': label,
                 'docs': docs_needing_content,
+                'fetch': fetch_urls,
                 'curated_docs': curated_docs
             })
 
         # Process all categories in parallel
+        enriched = {}
+        extracted = {}
         if enrichment_tasks:
             async def process_category(task):
                 try:
                     raw_contents = await self.fetch_raw_content(
-                        list(task['docs'].keys()),
-                        websocket_manager,
-                        job_id,
+                        task['fetch'],
                         task['category']
                     )
                     
@@ -204,24 +269,24 @@ class Enricher:
                             error_count += 1
                         elif content_or_error:
                             # This is a successful content
-                            task['curated_docs'][url]['raw_content'] = content_or_error
+                            key = canonical_url(url)
+                            task['curated_docs'][key]['raw_content'] = content_or_error
+                            extracted[key] = content_or_error
                             enriched_count += 1
 
-                    # Update state with enriched documents
-                    state[task['field']] = task['curated_docs']
+                    # Collect enriched documents for the state update
+                    enriched[task['field']] = task['curated_docs']
                     
-                    if websocket_manager and job_id:
-                        await websocket_manager.send_status_update(
-                            job_id=job_id,
-                            status="category_complete",
-                            message=f"Completed {task['label']} documents",
-                            result={
-                                "step": "Enriching",
-                                "category": task['category'],
-                                "enriched": enriched_count,
-                                "total": len(task['docs'])
-                            }
-                        )
+                    emit(
+                        status="category_complete",
+                        message=f"Completed {task['label']} documents",
+                        result={
+                            "step": "Enriching",
+                            "category": task['category'],
+                            "enriched": enriched_count,
+                            "total": len(task['docs'])
+                        }
+                    )
                     
                     return {
                         'category': task['category'],
@@ -241,42 +306,44 @@ class Enricher:
 
             # Process all categories in parallel
             results = await asyncio.gather(*[process_category(task) for task in enrichment_tasks])
-            
+
+            # Pages claimed by an earlier category share its extraction
+            shared_count = 0
+            for task in enrichment_tasks:
+                for url, doc in task['docs'].items():
+                    if not doc.get('raw_content') and (content := extracted.get(canonical_url(url))):
+                        doc['raw_content'] = content
+                        enriched[task['field']] = task['curated_docs']
+                        shared_count += 1
+
             # Calculate totals
-            total_enriched = sum(r['enriched'] for r in results)
+            total_enriched = sum(r['enriched'] for r in results) + shared_count
             total_documents = sum(r['total'] for r in results)
             total_errors = sum(r.get('errors', 0) for r in results)
 
             # Send final status update
-            if websocket_manager and job_id:
-                status_message = f"Content enrichment complete. Successfully enriched {total_enriched}/{total_documents} documents"
-                if total_errors > 0:
-                    status_message += f". Skipped {total_errors} documents."
-                
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="enrichment_complete",
-                    message=status_message,
-                    result={
-                        "step": "Enriching",
-                        "total_enriched": total_enriched,
-                        "total_documents": total_documents,
-                        "total_errors": total_errors
-                    }
-                )
+            status_message = f"Content enrichment complete. Successfully enriched {total_enriched}/{total_documents} documents"
+            if total_errors > 0:
+                status_message += f". Skipped {total_errors} documents."
+            
+            emit(
+                status="enrichment_complete",
+                message=status_message,
+                result={
+                    "step": "Enriching",
+                    "total_enriched": total_enriched,
+                    "total_documents": total_documents,
+                    "total_errors": total_errors
+                }
+            )
 
-        # Update state with enrichment message
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        
-        return state
+        return {**enriched, 'messages': [AIMessage(content="\n".join(msg))]}
 
-    async def run(self, state: ResearchState) -> ResearchState:
+    async def run(self, state: ResearchState) -> Dict[str, Any]:
         try:
             return await self.enrich_data(state)
         except Exception as e:
             # Log the error but don't fail the research process
             print(f"Error in enrichment process: {e}")
-            # Return the original state without any enrichment
-            return state 
\ No newline at end of file
+            # Leave the curated documents without any enrichment
+            return {} 
\ No newline at end of file
@@ -1,10 +1,11 @@
 import logging
-import os
 
 from langchain_core.messages import AIMessage
-from tavily import AsyncTavilyClient
 
 from ..classes import InputState, ResearchState
+from ..services.progress import emit
+from ..services.providers import get_providers
+from ..services.site_cache import get_site_cache
 
 logger = logging.getLogger(__name__)
 
@@ -12,26 +13,17 @@ class GroundingNode:
     """Gathers social media links of the company."""
     
     def __init__(self) -> None:
-        self.tavily_client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        self.tavily_client = get_providers().tavily
 
     async def initial_search(self, state: InputState) -> ResearchState:
-        # Add debug logging at the start to check websocket manager
-        if websocket_manager := state.get('websocket_manager'):
-            logger.info("Websocket manager found in state")
-        else:
-            logger.warning("No websocket manager found in state")
-        
         company = state.get('company', 'Unknown Company')
         msg = f"🎯 Initiating research for {company}...\n"
         
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="processing",
-                    message=f"🎯 Initiating research for {company}",
-                    result={"step": "Initializing"}
-                )
+        emit(
+            status="processing",
+            message=f"🎯 Initiating research for {company}",
+            result={"step": "Initializing"}
+        )
 
         site_scrape = {}
 
@@ -41,78 +33,61 @@ class GroundingNode:
             logger.info(f"Starting website analysis for {url}")
             
             # Send initial briefing status
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message="Analyzing company website",
-                        result={"step": "Initial Site Scrape"}
-                    )
+            emit(
+                status="processing",
+                message="Analyzing company website",
+                result={"step": "Initial Site Scrape"}
+            )
 
             try:
                 logger.info("Initiating Tavily extraction")
-                site_extraction = await self.tavily_client.extract(url, extract_depth="basic")
-                
-                raw_contents = []
-                for item in site_extraction.get("results", []):
-                    if content := item.get("raw_content"):
-                        raw_contents.append(content)
-                
-                if raw_contents:
+                # Shared across jobs; analysts reference this document by its id
+                site = await get_site_cache().extract(self.tavily_client, url, extract_depth="basic")
+
+                if site:
                     site_scrape = {
+                        'id': site.id,
+                        'url': url,
                         'title': company,
-                        'raw_content': "\n\n".join(raw_contents)
+                        'raw_content': site.content
                     }
-                    logger.info(f"Successfully extracted {len(raw_contents)} content sections")
+                    logger.info(f"Successfully extracted website content ({site.id})")
                     msg += "\n✅ Successfully extracted content from website"
-                    if websocket_manager := state.get('websocket_manager'):
-                        if job_id := state.get('job_id'):
-                            await websocket_manager.send_status_update(
-                                job_id=job_id,
-                                status="processing",
-                                message="Successfully extracted content from website",
-                                result={"step": "Initial Site Scrape"}
-                            )
+                    emit(
+                        status="processing",
+                        message="Successfully extracted content from website",
+                        result={"step": "Initial Site Scrape"}
+                    )
                 else:
                     logger.warning("No content found in extraction results")
                     msg += "\n⚠️ No content found in website extraction"
-                    if websocket_manager := state.get('websocket_manager'):
-                        if job_id := state.get('job_id'):
-                            await websocket_manager.send_status_update(
-                                job_id=job_id,
-                                status="processing",
-                                message="⚠️ No content found in provided URL",
-                                result={"step": "Initial Site Scrape"}
-                            )
+                    emit(
+                        status="processing",
+                        message="⚠️ No content found in provided URL",
+                        result={"step": "Initial Site Scrape"}
+                    )
             except Exception as e:
                 error_str = str(e)
                 logger.error(f"Website extraction error: {error_str}", exc_info=True)
                 error_msg = f"⚠️ Error extracting website content: {error_str}"
                 print(error_msg)
                 msg += f"\n{error_msg}"
-                if websocket_manager := state.get('websocket_manager'):
-                    if job_id := state.get('job_id'):
-                        await websocket_manager.send_status_update(
-                            job_id=job_id,
-                            status="website_error",
-                            message=error_msg,
-                            result={
-                                "step": "Initial Site Scrape", 
-                                "error": error_str,
-                                "continue_research": True  # Continue with research even if website extraction fails
-                            }
-                        )
+                emit(
+                    status="website_error",
+                    message=error_msg,
+                    result={
+                        "step": "Initial Site Scrape", 
+                        "error": error_str,
+                        "continue_research": True  # Continue with research even if website extraction fails
+                    }
+                )
         else:
             msg += "\n⏩ Proceeding to research phase"
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message="Proceeding to research phase",
-                        result={"step": "Initializing"}
-                    )
+            emit(
+                status="processing",
+                message="Proceeding to research phase",
+                result={"step": "Initializing"}
+            )
         # Add context about what information we have
         context_data = {}
         if hq := state.get('hq_location'):
@@ -132,8 +107,6 @@ class GroundingNode:
             # Initialize research fields
             "messages": [AIMessage(content=msg)],
             "site_scrape": site_scrape,
-            # Pass through websocket info
-            "websocket_manager": state.get('websocket_manager'),
             "job_id": state.get('job_id')
         }
 
@@ -0,0 +1,112 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from ..classes import ResearchState
+from ..services.progress import emit
+from ..services.providers import get_providers
+from .researchers import FinancialAnalyst, IndustryAnalyzer, NewsScanner
+from .researchers.base import BaseResearcher
+
+logger = logging.getLogger(__name__)
+
+
+class QueryPlanner:
+    """Writes the search queries of every analyst in one structured LLM call.
+
+    Replaces one streamed query-generation call per analyst with a single
+    JSON response; each analyst picks its list from ``analyst_queries`` and
+    falls back to generating its own queries if the plan has none.
+    """
+
+    # JSON key -> (analyst type, analyst class holding the topic prompt)
+    analysts = {
+        "financial": ("financial_analyzer", FinancialAnalyst),
+        "news": ("news_analyzer", NewsScanner),
+        "industry": ("industry_analyzer", IndustryAnalyzer),
+    }
+
+    def __init__(self) -> None:
+        self.openai_client = get_providers().openai
+
+    def _prompt(self, state: ResearchState) -> str:
+        company = state.get('company', 'Unknown Company')
+        industry = state.get('industry') or 'Unknown Industry'
+        hq = state.get('hq_location') or 'Unknown HQ'
+
+        sections = []
+        for key, (_, analyst) in self.analysts.items():
+            topic = analyst.query_prompt.replace("{company}", company).replace("{industry}", industry)
+            sections.append(f'"{key}":{topic}')
+
+        return f"""Plan the web research on {company}, a company in the {industry} industry headquartered in {hq}.
+
+Write up to {BaseResearcher.max_queries} distinct web search queries for each of these analysts:
+
+{chr(10).join(sections)}
+
+Every query must name {company} and be ready to send to a search engine; add the year {datetime.now().year} where recency matters.
+Respond with a JSON object with exactly the keys {", ".join(f'"{key}"' for key in self.analysts)}, each mapping to a list of query strings."""
+
+    def _parse(self, content: str) -> Dict[str, List[str]]:
+        plan = json.loads(content)
+        queries = {}
+        for key, (analyst_type, _) in self.analysts.items():
+            planned = plan.get(key) or []
+            if isinstance(planned, str):
+                planned = [planned]
+            planned = [str(query).strip() for query in planned if str(query).strip()]
+            if planned:
+                queries[analyst_type] = planned[:BaseResearcher.max_queries]
+        return queries
+
+    async def plan(self, state: ResearchState) -> Dict[str, Any]:
+        company = state.get('company', 'Unknown Company')
+        emit(
+            status="processing",
+            message=f"Planning research queries for {company}",
+            result={"step": "Query Planning"}
+        )
+
+        try:
+            response = await self.openai_client.chat.completions.create(
+                model="gpt-4.1",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You plan web research for a team of company analysts and answer in JSON only."
+                    },
+                    {
+                        "role": "user",
+                        "content": self._prompt(state)
+                    }
+                ],
+                temperature=0,
+                response_format={"type": "json_object"},
+                stream=False
+            )
+            queries = self._parse(response.choices[0].message.content or "{}")
+        except Exception as e:
+            # The analysts generate their own queries without a plan
+            logger.error(f"Query planning failed for {company}: {e}")
+            return {'analyst_queries': {}}
+
+        for analyst_type, planned in queries.items():
+            for number, query in enumerate(planned, 1):
+                emit(
+                    status="query_generated",
+                    message="Generated new research query",
+                    result={
+                        "query": query,
+                        "query_number": number,
+                        "category": analyst_type,
+                        "is_complete": True
+                    }
+                )
+        logger.info(f"Planned queries for {company}: {queries}")
+
+        return {'analyst_queries': queries}
+
+    async def run(self, state: ResearchState) -> Dict[str, Any]:
+        return await self.plan(state)
@@ -2,16 +2,23 @@ import asyncio
 import logging
 import os
 from datetime import datetime
-from typing import Any, Dict, List
-
-from openai import AsyncOpenAI
-from tavily import AsyncTavilyClient
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from ...classes import ResearchState
+from ...services.progress import emit
+from ...services.providers import get_providers
+from ...services.search_cache import get_search_cache
 from ...utils.references import clean_title
+from ...utils.urls import canonical_url
 
 logger = logging.getLogger(__name__)
 
+# Tavily topic per analyst; the others search the general index
+SEARCH_TOPICS = {
+    "news_analyzer": "news",
+    "financial_analyzer": "finance",
+}
+
 class BaseResearcher:
     def __init__(self):
         tavily_key = os.getenv("TAVILY_API_KEY")
@@ -20,8 +27,9 @@ class BaseResearcher:
         if not tavily_key or not openai_key:
             raise ValueError("Missing API keys")
             
-        self.tavily_client = AsyncTavilyClient(api_key=tavily_key)
-        self.openai_client = AsyncOpenAI(api_key=openai_key)
+        providers = get_providers()
+        self.tavily_client = providers.tavily
+        self.openai_client = providers.openai
         self.analyst_type = "base_researcher"  # Default type
 
     @property
@@ -34,13 +42,20 @@ class BaseResearcher:
     def analyst_type(self, value: str):
         self._analyst_type = value
 
-    async def generate_queries(self, state: Dict, prompt: str) -> List[str]:
+    # Queries kept per analyst; generation stops once this many are complete
+    max_queries = 3
+
+    async def stream_queries(self, state: Dict, prompt: str) -> AsyncIterator[str]:
+        """Yield each research query as soon as the LLM finishes its line.
+
+        Lets callers start searching the first query while the model is
+        still writing the next ones.
+        """
         company = state.get("company", "Unknown Company")
         industry = state.get("industry", "Unknown Industry")
         hq = state.get("hq", "Unknown HQ")
         current_year = datetime.now().year
-        websocket_manager = state.get('websocket_manager')
-        job_id = state.get('job_id')
+        queries = []
         
         try:
             logger.info(f"Generating queries for {company} as {self.analyst_type}")
@@ -64,24 +79,22 @@ class BaseResearcher:
                 stream=True
             )
             
-            queries = []
             current_query = ""
             current_query_number = 1
 
-            async for chunk in response:
-                if chunk.choices[0].finish_reason == "stop":
-                    break
-                    
-                content = chunk.choices[0].delta.content
-                if content:
-                    # TODO
-                    # content = "Youtube: https://www.youtube.com/@raumamix4106\nTiktok: https://www.tiktok.com/@raumamix.official\nFacebook: https://www.facebook.com/Raumamix"
-                    current_query += content
-                    
-                    # Stream the current state to the UI.
-                    if websocket_manager and job_id:
-                        await websocket_manager.send_status_update(
-                            job_id=job_id,
+            try:
+                async for chunk in response:
+                    if chunk.choices[0].finish_reason == "stop":
+                        break
+                        
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        # TODO
+                        # content = "Youtube: https://www.youtube.com/@raumamix4106\nTiktok: https://www.tiktok.com/@raumamix.official\nFacebook: https://www.facebook.com/Raumamix"
+                        current_query += content
+                        
+                        # Stream the current state to the UI.
+                        emit(
                             status="query_generating",
                             message="Generating research query",
                             result={
@@ -91,19 +104,17 @@ class BaseResearcher:
                                 "is_complete": False
                             }
                         )
-                    
-                    # If a newline is detected, treat it as a complete query.
-                    if '\n' in current_query:
-                        parts = current_query.split('\n')
-                        current_query = parts[-1]  # The last part is the start of the next query.
                         
-                        for query in parts[:-1]:
-                            query = query.strip()
-                            if query:
-                                queries.append(query)
-                                if websocket_manager and job_id:
-                                    await websocket_manager.send_status_update(
-                                        job_id=job_id,
+                        # If a newline is detected, treat it as a complete query.
+                        if '\n' in current_query:
+                            parts = current_query.split('\n')
+                            current_query = parts[-1]  # The last part is the start of the next query.
+                            
+                            for query in parts[:-1]:
+                                query = query.strip()
+                                if query:
+                                    queries.append(query)
+                                    emit(
                                         status="query_generated",
                                         message="Generated new research query",
                                         result={
@@ -113,49 +124,66 @@ class BaseResearcher:
                                             "is_complete": True
                                         }
                                     )
-                                current_query_number += 1
-                    
-                    # break # TODO: remember to remove
+                                    current_query_number += 1
+                                    yield query
+                                    if len(queries) >= self.max_queries:
+                                        # Later lines would be dropped anyway; stop decoding them
+                                        current_query = ""
+                                        break
+                            if len(queries) >= self.max_queries:
+                                break
+                        
+                        # break # TODO: remember to remove
+            finally:
+                await response.close()
 
             # Add any remaining query (even if not newline terminated)
             if current_query.strip():
                 query = current_query.strip()
                 queries.append(query)
-                if websocket_manager and job_id:
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="query_generated",
-                        message="Generated final research query",
-                        result={
-                            "query": query,
-                            "query_number": len(queries),
-                            "category": self.analyst_type,
-                            "is_complete": True
-                        }
-                    )
+                emit(
+                    status="query_generated",
+                    message="Generated final research query",
+                    result={
+                        "query": query,
+                        "query_number": len(queries),
+                        "category": self.analyst_type,
+                        "is_complete": True
+                    }
+                )
                 current_query_number += 1
+                yield query
             
             logger.info(f"Generated {len(queries)} queries for {self.analyst_type}: {queries}")
 
             if not queries:
                 raise ValueError(f"No queries generated for {company}")
-
-            # Limit to at most 3 queries.
-            queries = queries[:3]
-            logger.info(f"Final queries for {self.analyst_type}: {queries}")
-            
-            return queries
             
         except Exception as e:
             logger.error(f"Error generating queries for {company}: {e}")
-            if websocket_manager and job_id:
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="error",
-                    message=f"Failed to generate research queries: {str(e)}",
-                    error=f"Query generation failed: {str(e)}"
-                )
-            return []
+            emit(
+                status="error",
+                message=f"Failed to generate research queries: {str(e)}",
+                error=f"Query generation failed: {str(e)}"
+            )
+
+    async def generate_queries(self, state: Dict, prompt: str) -> List[str]:
+        return [query async for query in self.stream_queries(state, prompt)]
+
+    async def generate_and_search(self, state: ResearchState, prompt: str) -> Tuple[List[str], Dict[str, Any]]:
+        """Search this analyst's planned queries, or generate queries and search each as soon as it is complete."""
+        if planned := (state.get('analyst_queries') or {}).get(self.analyst_type):
+            return planned, await self.search_documents(state, planned)
+
+        queries = []
+
+        async def generated() -> AsyncIterator[str]:
+            async for query in self.stream_queries(state, prompt):
+                queries.append(query)
+                yield query
+
+        documents = await self.search_documents(state, generated())
+        return queries, documents
 
     def _format_query_prompt(self, prompt, company, hq, year):
         return f"""{prompt}
@@ -177,190 +205,242 @@ class BaseResearcher:
             f"{company} industry analysis {year}"
         ]
 
-    async def search_single_query(self, query: str, websocket_manager=None, job_id=None) -> Dict[str, Any]:
+    @staticmethod
+    def site_reference(state: ResearchState, query: str) -> Dict[str, Any]:
+        """Entry pointing at the company website extracted by grounding, or {} without one.
+
+        The text stays in ``site_scrape``; the briefing decides which
+        categories include it.
+        """
+        site_scrape = state.get('site_scrape') or {}
+        if not site_scrape.get('id'):
+            return {}
+        company_url = site_scrape.get('url') or state.get('company_url') or ''
+        return {
+            canonical_url(company_url) or 'company-website': {
+                'title': site_scrape.get('title') or state.get('company', 'Unknown Company'),
+                'url': company_url or 'company-website',
+                'site_ref': site_scrape['id'],
+                'query': query,
+                'source': 'company_site'
+            }
+        }
+
+    async def _search(self, query: str) -> Dict[str, Any]:
+        """Tavily search for this analyst's topic, through the shared search cache."""
+        return await get_search_cache().search(
+            self.tavily_client,
+            query,
+            topic=SEARCH_TOPICS.get(self.analyst_type, "general"),
+            search_depth="basic",
+            max_results=5,
+            include_raw_content=False
+        )
+
+    @staticmethod
+    def _documents(query: str, results: Dict[str, Any], seen: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Normalise a Tavily response into documents keyed by canonical URL, skipping keys in ``seen``.
+
+        Each document keeps the URL Tavily returned; the canonical form is
+        only used to key and deduplicate.
+        """
+        docs = {}
+        for result in results.get("results", []):
+            if not result.get("content") or not result.get("url"):
+                continue
+                
+            url = result["url"]
+            key = canonical_url(url)
+            if seen is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            title = result.get("title", "")
+            
+            # Clean up and validate the title using the references module
+            if title:
+                title = clean_title(title)
+                # If title is the same as URL or empty, set to empty to trigger extraction later
+                if title.lower() in (url.lower(), key.lower()) or not title.strip():
+                    title = ""
+            
+            docs[key] = {
+                "title": title,
+                "content": result.get("content", ""),
+                "query": query,
+                "url": url,
+                "source": "web_search",
+                "score": result.get("score", 0.0)
+            }
+        return docs
+
+    async def search_single_query(self, query: str) -> Dict[str, Any]:
         """Execute a single search query with proper error handling."""
         if not query or len(query.split()) < 3:
             return {}
 
         try:
-            if websocket_manager and job_id:
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="query_searching",
-                    message=f"Searching: {query}",
-                    result={
-                        "step": "Searching",
-                        "query": query
-                    }
-                )
+            emit(
+                status="query_searching",
+                message=f"Searching: {query}",
+                result={
+                    "step": "Searching",
+                    "query": query
+                }
+            )
 
-            # Add news topic for news analysts
-            search_params = {
-                "search_depth": "basic",
-                "include_raw_content": False,
-                "max_results": 5
-            }
-            
-            if self.analyst_type == "news_analyst":
-                search_params["topic"] = "news"
-            elif self.analyst_type == "financial_analyst":
-                search_params["topic"] = "finance"
-
-            results = await self.tavily_client.search(
-                query,
-                **search_params
+            results = await self._search(query)
+            docs = self._documents(query, results)
+            logger.info(f"Tavily search for '{query}' returned {len(docs)} documents")
+
+            emit(
+                status="query_searched",
+                message=f"Found {len(docs)} results for: {query}",
+                result={
+                    "step": "Searching",
+                    "query": query,
+                    "results_count": len(docs)
+                }
             )
+
+            return docs
             
-            docs = {}
-            for result in results.get("results", []):
-                if not result.get("content") or not result.get("url"):
-                    continue
-                    
-                url = result.get("url")
-                title = result.get("title", "")
-                
-                # Clean up and validate the title using the references module
-                if title:
-                    title = clean_title(title)
-                    # If title is the same as URL or empty, set to empty to trigger extraction later
-                    if title.lower() == url.lower() or not title.strip():
-                        title = ""
-                
-                logger.info(f"Tavily search result for '{query}': URL={url}, Title='{title}'")
-                
-                docs[url] = {
-                    "title": title,
-                    "content": result.get("content", ""),
+        except Exception as e:
+            logger.error(f"Error searching query '{query}': {e}")
+            emit(
+                status="query_error",
+                message=f"Search failed for: {query}",
+                result={
+                    "step": "Searching",
                     "query": query,
-                    "url": url,
-                    "source": "web_search",
-                    "score": result.get("score", 0.0)
+                    "error": str(e)
                 }
+            )
+            return {}
 
-            if websocket_manager and job_id:
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="query_searched",
-                    message=f"Found {len(docs)} results for: {query}",
+    async def stream_search(self, queries: Union[Iterable[str], AsyncIterable[str]]
+                            ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Search every query in parallel and yield ``(query, documents)`` as each search completes.
+
+        ``queries`` may be an async iterable such as ``stream_queries``; each
+        search then starts as soon as its query arrives. A URL is yielded only
+        once, with the first query that found it. A failed search yields no
+        documents and does not stop the others.
+        """
+        completed: asyncio.Queue = asyncio.Queue()
+        search_tasks: Dict[str, asyncio.Task] = {}
+
+        async def search(query: str) -> None:
+            try:
+                results = await self._search(query)
+            except Exception as e:
+                logger.error(f"Error searching query '{query}': {e}")
+                emit(
+                    status="query_error",
+                    message=f"Search failed for: {query}",
                     result={
                         "step": "Searching",
                         "query": query,
-                        "results_count": len(docs)
+                        "error": str(e)
                     }
                 )
+                results = {}
+            completed.put_nowait((query, results))
 
-            return docs
-            
-        except Exception as e:
-            logger.error(f"Error searching query '{query}': {e}")
-            if websocket_manager and job_id:
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="query_error",
-                    message=f"Search failed for: {query}",
+        def start(query: str) -> None:
+            # Repeated queries are searched once; across jobs the search cache answers them
+            if query not in search_tasks:
+                search_tasks[query] = asyncio.create_task(search(query))
+
+        async def feed() -> None:
+            try:
+                if isinstance(queries, AsyncIterable):
+                    async for query in queries:
+                        start(query)
+                else:
+                    for query in queries:
+                        start(query)
+                if search_tasks:
+                    # Sent once every query is known; the first searches may already have finished
+                    emit(
+                        status="queries_generated",
+                        message=f"Generated {len(search_tasks)} queries for {self.analyst_type}",
+                        result={
+                            "step": "Searching",
+                            "analyst": self.analyst_type,
+                            "queries": list(search_tasks),
+                            "total_queries": len(search_tasks)
+                        }
+                    )
+                    emit(
+                        status="search_started",
+                        message=f"Using Tavily to search for {len(search_tasks)} queries",
+                        result={
+                            "step": "Searching",
+                            "total_queries": len(search_tasks)
+                        }
+                    )
+            finally:
+                # Tells the consumer how many results to wait for
+                completed.put_nowait((None, None))
+
+        feeder = asyncio.create_task(feed())
+        seen: Set[str] = set()
+        received, expected = 0, None
+        try:
+            while expected is None or received < expected:
+                query, results = await completed.get()
+                if query is None:
+                    expected = len(search_tasks)
+                    continue
+                received += 1
+                docs = self._documents(query, results, seen)
+                emit(
+                    status="query_searched",
+                    message=f"Found {len(docs)} new results for: {query}",
                     result={
                         "step": "Searching",
                         "query": query,
-                        "error": str(e)
+                        "results_count": len(docs)
                     }
                 )
-            return {}
+                yield query, docs
+            # Surface an error raised by the query source
+            await feeder
+        finally:
+            feeder.cancel()
+            for task in search_tasks.values():
+                task.cancel()
 
-    async def search_documents(self, state: ResearchState, queries: List[str]) -> Dict[str, Any]:
+    async def search_documents(self, state: ResearchState,
+                               queries: Union[Iterable[str], AsyncIterable[str]]) -> Dict[str, Any]:
         """
-        Execute all Tavily searches in parallel at maximum speed
+        Execute all Tavily searches in parallel and merge their documents by URL.
+
+        Collects ``stream_search``; see there for how ``queries`` is consumed.
         """
-        websocket_manager = state.get('websocket_manager')
-        job_id = state.get('job_id')
+        merged_docs = {}
+        searched = []
+        async for query, docs in self.stream_search(queries):
+            searched.append(query)
+            merged_docs.update(docs)
 
-        if not queries:
+        if not searched:
             logger.error("No valid queries to search")
             return {}
 
-        # Send status update for generated queries
-        if websocket_manager and job_id:
-            await websocket_manager.send_status_update(
-                job_id=job_id,
-                status="queries_generated",
-                message=f"Generated {len(queries)} queries for {self.analyst_type}",
-                result={
-                    "step": "Searching",
-                    "analyst": self.analyst_type,
-                    "queries": queries,
-                    "total_queries": len(queries)
-                }
-            )
-
-        # Prepare all search parameters upfront
-        search_params = {
-            "search_depth": "basic",
-            "include_raw_content": False,
-            "max_results": 5
-        }
-        
-        if self.analyst_type == "news_analyst":
-            search_params["topic"] = "news"
-        elif self.analyst_type == "financial_analyst":
-            search_params["topic"] = "finance"
-
-        if websocket_manager and job_id:
-            await websocket_manager.send_status_update(
-                job_id=job_id,
-                status="search_started",
-                message=f"Using Tavily to search for {len(queries)} queries",
-                result={
-                    "step": "Searching",
-                    "total_queries": len(queries)
-                }
-            )
-        # Create all API calls upfront - direct Tavily client calls without the extra wrapper
-        search_tasks = [
-            self.tavily_client.search(query, **search_params)
-            for query in queries
-        ]
-
-        # Execute all API calls in parallel
-        try:
-            results = await asyncio.gather(*search_tasks)
-        except Exception as e:
-            logger.error(f"Error during parallel search execution: {e}")
-            return {}
-
-        # Process results
-        merged_docs = {}
-        for query, result in zip(queries, results):
-            for item in result.get("results", []):
-                if not item.get("content") or not item.get("url"):
-                    continue
-                    
-                url = item.get("url")
-                title = item.get("title", "")
-                
-                if title:
-                    title = clean_title(title)
-                    if title.lower() == url.lower() or not title.strip():
-                        title = ""
-
-                merged_docs[url] = {
-                    "title": title,
-                    "content": item.get("content", ""),
-                    "query": query,
-                    "url": url,
-                    "source": "web_search",
-                    "score": item.get("score", 0.0)
-                }
-
         # Send completion status
-        if websocket_manager and job_id:
-            await websocket_manager.send_status_update(
-                job_id=job_id,
-                status="search_complete",
-                message=f"Search completed with {len(merged_docs)} documents found",
-                result={
-                    "step": "Searching",
-                    "total_documents": len(merged_docs),
-                    "queries_processed": len(queries)
-                }
-            )
+        emit(
+            status="search_complete",
+            message=f"Search completed with {len(merged_docs)} documents found",
+            result={
+                "step": "Searching",
+                "analyst": self.analyst_type,
+                "queries": searched,
+                "total_documents": len(merged_docs),
+                "queries_processed": len(searched)
+            }
+        )
 
         return merged_docs
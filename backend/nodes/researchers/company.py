@@ -1,11 +1,14 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from langchain_core.messages import AIMessage
 
 from ...classes import ResearchState
+from ..collector import Collector
+from ...services.metrics import timed_step
+from ...services.progress import emit
+from ...services.providers import get_providers
+from ...services.social_index import SocialProfile, get_social_index
 from .base import BaseResearcher
-import subprocess, asyncio, os
-import requests
 from urllib.parse import urlparse
 import logging
 
@@ -13,26 +16,31 @@ logger = logging.getLogger(__name__)
 
 
 class CompanyAnalyzer(BaseResearcher):
-    def __init__(self) -> None:
+    def __init__(self, collector: Optional[Collector] = None) -> None:
         super().__init__()
         self.analyst_type = "company_analyzer"
-        self.serp_key = os.getenv("SERP_API_KEY")
-
-    async def find_social_links(self, state: Dict):
-
-        websocket_manager = state.get('websocket_manager')
-        job_id = state.get('job_id')
-        company = state.get('company')
+        self.serpapi_client = get_providers().serpapi
+        # Starts the social scrapers as soon as the links are known
+        self.collector = collector
 
+    async def _discover_social_links(self, company: str, known: Optional[SocialProfile] = None):
+        """Find the brand's profiles on SerpAPI and remember them in the social index."""
         # Serp API ====================================================
         params = {
             "q": "site:facebook.com OR site:youtube.com OR site:tiktok.com " + company,
-            "api_key": self.serp_key,
             "num": 10 # 10 result
         }
 
-        response = requests.get("https://serpapi.com/search.json", params=params)
-        results = response.json()
+        try:
+            results = await self.serpapi_client.search(params)
+        except Exception as e:
+            # A failed lookup (ProviderError on 4xx/5xx, timeouts) must not fail the research job
+            if known is None:
+                logger.error(f"SerpAPI lookup for {company} failed, continuing without social links: {e}")
+                return {"youtube": "", "facebook": "", "tiktok": ""}
+            # Outdated links beat no links
+            logger.warning(f"SerpAPI lookup for {company} failed, using stale indexed links: {e}")
+            return known.links
 
         # Get the right link ===========================================
         youtube = ""
@@ -59,6 +67,32 @@ class CompanyAnalyzer(BaseResearcher):
                 if "/video/" not in link:
                     tiktok = link
 
+        links = {"youtube": youtube, "facebook": facebook, "tiktok": tiktok}
+        if youtube or facebook or tiktok:
+            await get_social_index().record(company, links)
+        elif known is not None:
+            # Keep the indexed entry stale so the next job tries again
+            logger.warning(f"SerpAPI found no social links for {company}, using stale indexed links")
+            return known.links
+        return links
+
+    @timed_step("find_social_links")
+    async def find_social_links(self, state: Dict):
+
+        company = state.get('company')
+
+        # Known brands skip discovery; stale entries are looked up again
+        known = await get_social_index().lookup(company)
+        if known and not known.stale:
+            logger.info(f"Using indexed social links of {known.brand} for {company}")
+            links = known.links
+        else:
+            links = await self._discover_social_links(company, known)
+
+        youtube = links.get("youtube", "")
+        facebook = links.get("facebook", "")
+        tiktok = links.get("tiktok", "")
+
         result = [
             f"Youtube: {youtube}",
             f"Facebook: {facebook}",
@@ -74,18 +108,16 @@ class CompanyAnalyzer(BaseResearcher):
                     query = query.strip()
                     if query:
                         queries.append(query)
-                        if websocket_manager and job_id:
-                            await websocket_manager.send_status_update(
-                                job_id=job_id,
-                                status="query_generating",
-                                message="Generated new research query",
-                                result={
-                                    "query": query,
-                                    "query_number": len(queries),
-                                    "category": self.analyst_type,
-                                    "is_complete": False
-                                }
-                            )
+                        emit(
+                            status="query_generating",
+                            message="Generated new research query",
+                            result={
+                                "query": query,
+                                "query_number": len(queries),
+                                "category": self.analyst_type,
+                                "is_complete": False
+                            }
+                        )
             
             logger.info(f"Generated {len(queries)} queries for {self.analyst_type}: {queries}")
 
@@ -100,13 +132,11 @@ class CompanyAnalyzer(BaseResearcher):
             
         except Exception as e:
             logger.error(f"Error generating queries for {company}: {e}")
-            if websocket_manager and job_id:
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="error",
-                    message=f"Failed to generate research queries: {str(e)}",
-                    error=f"Query generation failed: {str(e)}"
-                )
+            emit(
+                status="error",
+                message=f"Failed to generate research queries: {str(e)}",
+                error=f"Query generation failed: {str(e)}"
+            )
             return []
         
 
@@ -124,6 +154,12 @@ class CompanyAnalyzer(BaseResearcher):
             source, link = q.split(":", 1)
             dict_links[source.strip().lower()] = link.strip()
 
+        # The scrapers get a head start on the analysts still searching;
+        # scrape_join waits for them before the editor
+        updates = {}
+        if self.collector is not None:
+            updates['scrape_dir'] = self.collector.start(state.get('job_id') or 'default', dict_links)
+
         # TODO
         # queries = [
         #     "Youtube: https://www.youtube.com/@raumamix4106",
@@ -133,35 +169,24 @@ class CompanyAnalyzer(BaseResearcher):
 
         # Add message to show subqueries with emojis
         # subqueries_msg = "🔍 Subqueries for company analysis:\n" + "\n".join([f"• {query}" for query in queries])
-        messages = state.get('messages', [])
-        # messages.append(AIMessage(content=subqueries_msg))
-        state['messages'] = messages
 
         # Send queries through WebSocket
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="processing",
-                    message="Company analysis: find social media links",
-                    result={
-                        "step": "Company Analyst",
-                        "analyst_type": "Company Analyst",
-                        "queries": queries
-                    }
-                )
+        emit(
+            status="processing",
+            message="Company analysis: find social media links",
+            result={
+                "step": "Company Analyst",
+                "analyst_type": "Company Analyst",
+                "queries": queries
+            }
+        )
         
         company_data = {}
         
-        # If we have site_scrape data, include it first
-        if site_scrape := state.get('site_scrape'):
+        # Reference the company website first; its text stays in site_scrape
+        if site_ref := self.site_reference(state, f'Company overview and information about {company}'):
             msg.append("\n📊 Including site scrape data in company analysis...")
-            company_url = state.get('company_url', 'company-website')
-            company_data[company_url] = {
-                'title': state.get('company', 'Unknown Company'),
-                'raw_content': site_scrape,
-                'query': f'Company overview and information about {company}'  # Add a default query for site scrape
-            }
+            company_data.update(site_ref)
         
         # TODO
         # # Perform additional research with comprehensive search
@@ -190,16 +215,13 @@ class CompanyAnalyzer(BaseResearcher):
         # except Exception as e:
         #     msg.append(f"\n⚠️ Error during research: {str(e)}")
         
-        # Update state with our findings
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        state['company_data'] = company_data
-        
+        # Only this branch's updates are returned; parallel branches merge
         return {
             'message': msg,
+            'messages': [AIMessage(content="\n".join(msg))],
             'company_data': company_data,
-            'social_links': dict_links
+            'social_links': dict_links,
+            **updates
         }
 
     async def run(self, state: ResearchState) -> Dict[str, Any]:
@@ -3,10 +3,20 @@ from typing import Any, Dict
 from langchain_core.messages import AIMessage
 
 from ...classes import ResearchState
+from ...services.progress import emit
 from .base import BaseResearcher
 
 
 class IndustryAnalyzer(BaseResearcher):
+    # Topic of this analyst's research queries; also used by the query planner
+    query_prompt = """
+    Generate queries on the industry analysis of {company} in the {industry} industry such as:
+    - Market position
+    - Competitors
+    - {industry} industry trends and challenges
+    - Market size and growth
+    """
+
     def __init__(self) -> None:
         super().__init__()
         self.analyst_type = "industry_analyzer"
@@ -16,80 +26,54 @@ class IndustryAnalyzer(BaseResearcher):
         industry = state.get('industry', 'Unknown Industry')
         msg = [f"🏭 Industry Analyzer analyzing {company} in {industry}"]
         
-        # Generate search queries using LLM
-        queries = await self.generate_queries(state, """
-        Generate queries on the industry analysis of {company} in the {industry} industry such as:
-        - Market position
-        - Competitors
-        - {industry} industry trends and challenges
-        - Market size and growth
-        """)
+        # Generate search queries using LLM; each search starts as soon as its query is complete
+        queries, documents = await self.generate_and_search(state, self.query_prompt)
 
         subqueries_msg = "🔍 Subqueries for industry analysis:\n" + "\n".join([f"• {query}" for query in queries])
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content=subqueries_msg))
-        state['messages'] = messages
+        messages = [AIMessage(content=subqueries_msg)]
 
         # Send queries through WebSocket
-        if websocket_manager := state.get('websocket_manager'):
-            if job_id := state.get('job_id'):
-                await websocket_manager.send_status_update(
-                    job_id=job_id,
-                    status="processing",
-                    message="Industry analysis queries generated",
-                    result={
-                        "step": "Industry Analyst",
-                        "analyst_type": "Industry Analyst",
-                        "queries": queries
-                    }
-                )
+        emit(
+            status="processing",
+            message="Industry analysis queries generated",
+            result={
+                "step": "Industry Analyst",
+                "analyst_type": "Industry Analyst",
+                "queries": queries
+            }
+        )
         
         industry_data = {}
         
-        # If we have site_scrape data, include it first
-        if site_scrape := state.get('site_scrape'):
+        # Reference the company website first; its text stays in site_scrape
+        if site_ref := self.site_reference(state, f'Industry analysis on {company}'):
             msg.append("\n📊 Including site scrape data in company analysis...")
-            company_url = state.get('company_url', 'company-website')
-            industry_data[company_url] = {
-                'title': state.get('company', 'Unknown Company'),
-                'raw_content': site_scrape,
-                'query': f'Industry analysis on {company}'  # Add a default query for site scrape
-            }
+            industry_data.update(site_ref)
         
         # Perform additional research with increased search depth
         try:
-            # Store documents with their respective queries
-            for query in queries:
-                documents = await self.search_documents(state, [query])
-                if documents:  # Only process if we got results
-                    for url, doc in documents.items():
-                        doc['query'] = query  # Associate each document with its query
-                        industry_data[url] = doc
+            # Documents are already tagged with the query that found them
+            industry_data.update(documents)
             
             msg.append(f"\n✓ Found {len(industry_data)} documents")
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message=f"Used Tavily Search to find {len(industry_data)} documents",
-                        result={
-                            "step": "Searching",
-                            "analyst_type": "Industry Analyst",
-                            "queries": queries
-                        }
-                    )
+            emit(
+                status="processing",
+                message=f"Used Tavily Search to find {len(industry_data)} documents",
+                result={
+                    "step": "Searching",
+                    "analyst_type": "Industry Analyst",
+                    "queries": queries
+                }
+            )
         except Exception as e:
             msg.append(f"\n⚠️ Error during research: {str(e)}")
         
-        # Update state with our findings
-        messages = state.get('messages', [])
+        # Only this branch's updates are returned; parallel branches merge
         messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        state['industry_data'] = industry_data
         
         return {
             'message': msg,
+            'messages': messages,
             'industry_data': industry_data
         }
 
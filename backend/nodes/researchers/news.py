@@ -3,10 +3,19 @@ from typing import Any, Dict
 from langchain_core.messages import AIMessage
 
 from ...classes import ResearchState
+from ...services.progress import emit
 from .base import BaseResearcher
 
 
 class NewsScanner(BaseResearcher):
+    # Topic of this analyst's research queries; also used by the query planner
+    query_prompt = """
+    Generate queries on the recent news coverage of {company} such as:
+    - Recent company announcements
+    - Press releases
+    - New partnerships
+    """
+
     def __init__(self) -> None:
         super().__init__()
         self.analyst_type = "news_analyzer"
@@ -15,65 +24,43 @@ class NewsScanner(BaseResearcher):
         company = state.get('company', 'Unknown Company')
         msg = [f"📰 News Scanner analyzing {company}"]
         
-        # Generate search queries using LLM
-        queries = await self.generate_queries(state, """
-        Generate queries on the recent news coverage of {company} such as:
-        - Recent company announcements
-        - Press releases
-        - New partnerships
-        """)
+        # Generate search queries using LLM; each search starts as soon as its query is complete
+        queries, documents = await self.generate_and_search(state, self.query_prompt)
 
         subqueries_msg = "🔍 Subqueries for news analysis:\n" + "\n".join([f"• {query}" for query in queries])
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content=subqueries_msg))
-        state['messages'] = messages
+        messages = [AIMessage(content=subqueries_msg)]
         
         news_data = {}
         
-        # If we have site_scrape data, include it first
-        if site_scrape := state.get('site_scrape'):
+        # Reference the company website first; its text stays in site_scrape
+        if site_ref := self.site_reference(state, f'News and announcements about {company}'):
             msg.append("\n📊 Including site scrape data in company analysis...")
-            company_url = state.get('company_url', 'company-website')
-            news_data[company_url] = {
-                'title': state.get('company', 'Unknown Company'),
-                'raw_content': site_scrape,
-                'query': f'News and announcements about {company}'  # Add a default query for site scrape
-            }
+            news_data.update(site_ref)
         
         # Perform additional research with recent time filter
         try:
-            # Store documents with their respective queries
-            for query in queries:
-                documents = await self.search_documents(state, [query])
-                if documents:  # Only process if we got results
-                    for url, doc in documents.items():
-                        doc['query'] = query  # Associate each document with its query
-                        news_data[url] = doc
+            # Documents are already tagged with the query that found them
+            news_data.update(documents)
             
             msg.append(f"\n✓ Found {len(news_data)} documents")
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message=f"Used Tavily Search to find {len(news_data)} documents",
-                        result={
-                            "step": "Searching",
-                            "analyst_type": "News Scanner",
-                            "queries": queries
-                        }
-                    )
+            emit(
+                status="processing",
+                message=f"Used Tavily Search to find {len(news_data)} documents",
+                result={
+                    "step": "Searching",
+                    "analyst_type": "News Scanner",
+                    "queries": queries
+                }
+            )
         except Exception as e:
             msg.append(f"\n⚠️ Error during research: {str(e)}")
         
-        # Update state with our findings
-        messages = state.get('messages', [])
+        # Only this branch's updates are returned; parallel branches merge
         messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        state['news_data'] = news_data
         
         return {
             'message': msg,
+            'messages': messages,
             'news_data': news_data
         }
 
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+# Checkpoints of a job that neither completed nor resumed for this long are deleted
+CHECKPOINT_TTL = float(os.getenv("CHECKPOINT_TTL_HOURS", "72")) * 3600
+
+
+def create_checkpointer() -> Optional[Any]:
+    """Create the checkpointer for the research graph.
+
+    Uses a local SQLite file (``CHECKPOINT_DB``) when
+    ``langgraph-checkpoint-sqlite`` is installed and falls back to an
+    in-memory saver otherwise. Returns None outside a running event loop
+    (e.g. when the LangGraph server imports the graph and brings its own
+    persistence).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+    try:
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        logger.warning("langgraph-checkpoint-sqlite is not installed; checkpoints are kept in memory only")
+        return MemorySaver()
+
+    logger.info(f"Checkpointing research jobs to {CHECKPOINT_DB}")
+    return AsyncSqliteSaver(aiosqlite.connect(CHECKPOINT_DB))
+
+
+async def close_checkpointer(checkpointer: Optional[Any]) -> None:
+    """Close the checkpointer's database connection, if it has one."""
+    if conn := getattr(checkpointer, "conn", None):
+        await conn.close()
+
+
+async def thread_ids(checkpointer: Any) -> List[str]:
+    """IDs of every thread that has checkpoints."""
+    if getattr(checkpointer, "conn", None) is not None:
+        await checkpointer.setup()
+        async with checkpointer.lock, checkpointer.conn.execute(
+                "SELECT DISTINCT thread_id FROM checkpoints") as cursor:
+            return [row[0] async for row in cursor]
+    return list(getattr(checkpointer, "storage", {}))
+
+
+async def expired_threads(checkpointer: Any, ttl: float = CHECKPOINT_TTL) -> List[str]:
+    """Threads whose latest checkpoint is older than ``ttl`` seconds."""
+    now = datetime.now(timezone.utc)
+    expired = []
+    for thread_id in await thread_ids(checkpointer):
+        latest = await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id}})
+        if latest is None:
+            continue
+        saved = datetime.fromisoformat(latest.checkpoint["ts"])
+        if (now - saved).total_seconds() > ttl:
+            expired.append(thread_id)
+    return expired
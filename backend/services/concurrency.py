@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_CONCURRENCY_INITIAL = int(os.getenv("PROVIDER_CONCURRENCY_INITIAL", "4"))
+PROVIDER_CONCURRENCY_MIN = int(os.getenv("PROVIDER_CONCURRENCY_MIN", "1"))
+# A latency this many times the usual one counts as congestion and stops the limit from growing
+PROVIDER_CONCURRENCY_TOLERANCE = float(os.getenv("PROVIDER_CONCURRENCY_TOLERANCE", "2"))
+
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "provider_concurrency_limit", "Current adaptive concurrency limit per provider endpoint",
+    ["provider", "endpoint"])
+CONCURRENCY_WAITING = REGISTRY.gauge(
+    "provider_concurrency_waiting", "Requests queued for a concurrency slot", ["provider", "endpoint"])
+CONCURRENCY_DECREASES = REGISTRY.counter(
+    "provider_concurrency_decreases_total", "Limit cuts after rate limiting or timeouts", ["provider", "endpoint"])
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit for one provider endpoint.
+
+    Every request that used the whole limit and came back within
+    ``tolerance`` times the usual latency widens it: by one until the
+    first overload (slow start, doubling per round of requests), then by
+    ``1 / limit``, about one per round. A 429, 503 or timeout halves it, at
+    most once per usual latency so one burst of rejections counts once.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, provider: str, endpoint: str, initial: int = PROVIDER_CONCURRENCY_INITIAL,
+                 min_limit: int = PROVIDER_CONCURRENCY_MIN, max_limit: int = 20,
+                 tolerance: float = PROVIDER_CONCURRENCY_TOLERANCE, decrease: float = 0.5) -> None:
+        self.provider = provider
+        self.endpoint = endpoint
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.tolerance = tolerance
+        self.decrease = decrease
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # moving average of uncongested latency
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._slow_start = True
+        CONCURRENCY_LIMIT.set(int(self.limit), provider=provider, endpoint=endpoint)
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """Wait for a slot; raises ``asyncio.TimeoutError`` after ``timeout`` seconds without one."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        CONCURRENCY_WAITING.inc(provider=self.provider, endpoint=self.endpoint)
+        try:
+            # Shielded so a timeout leaves the waiter to the cleanup below, like a cancellation
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just before giving up; hand it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            raise
+        finally:
+            CONCURRENCY_WAITING.dec(provider=self.provider, endpoint=self.endpoint)
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """Free a slot; ``latency`` of a successful request, ``overloaded`` after a 429, 503 or timeout."""
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        if overloaded:
+            self._shrink()
+        elif latency is not None:
+            self._observe(latency, saturated)
+        self._wake()
+
+    def _observe(self, latency: float, saturated: bool) -> None:
+        if self.latency is None:
+            self.latency = latency
+        if latency > self.latency * self.tolerance:
+            return
+        self.latency += 0.1 * (latency - self.latency)
+        # An unused limit says nothing about the capacity beyond it
+        if saturated and self.limit < self.max_limit:
+            self._set(min(self.max_limit, self.limit + (1 if self._slow_start else 1 / self.limit)))
+
+    def _shrink(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency or 1.0):
+            return
+        self._last_decrease = now
+        self._slow_start = False
+        CONCURRENCY_DECREASES.inc(provider=self.provider, endpoint=self.endpoint)
+        self._set(max(self.min_limit, self.limit * self.decrease))
+        logger.warning(f"{self.provider} {self.endpoint} is overloaded; concurrency limit lowered to {int(self.limit)}")
+
+    def _set(self, limit: float) -> None:
+        self.limit = limit
+        CONCURRENCY_LIMIT.set(int(limit), provider=self.provider, endpoint=self.endpoint)
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+        }
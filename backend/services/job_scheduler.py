@@ -0,0 +1,178 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"Research queue is full, retry after {retry_after}s")
+
+
+@dataclass(order=True)
+class QueuedJob:
+    priority: int
+    seq: int
+    job_id: str = field(compare=False)
+    payload: Any = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(pct * len(ordered)) - 1)]
+
+
+class JobScheduler:
+    """Bounded priority queue of research jobs served by a fixed number of worker slots.
+
+    Lower ``priority`` values run first; jobs with equal priority run in
+    submission order. Queued jobs receive their queue position over their
+    WebSocket whenever it changes: when a job is queued ahead of them and
+    when a job leaves the queue to run.
+    """
+
+    def __init__(self, runner: Callable[[str, Any], Awaitable[None]], worker_slots: int = 2,
+                 max_queue: int = 20, websocket_manager=None) -> None:
+        self.runner = runner
+        self.worker_slots = worker_slots
+        self.max_queue = max_queue
+        self.websocket_manager = websocket_manager
+
+        self._pending: List[QueuedJob] = []
+        self._seq = itertools.count()
+        self._ready = asyncio.Condition()
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, float] = {}
+        # Fire-and-forget notifications; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Recent history used for statistics and Retry-After estimates
+        self._wait_times = deque(maxlen=500)
+        self._run_times = deque(maxlen=100)
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_slots)]
+            logger.info(f"Job scheduler started with {self.worker_slots} worker slots, queue size {self.max_queue}")
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, job_id: str, payload: Any, priority: int = 0) -> int:
+        """Queue a job and return its 1-based queue position."""
+        if len(self._pending) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+        job = QueuedJob(priority, next(self._seq), job_id, payload)
+        heapq.heappush(self._pending, job)
+        self._spawn(self._notify_ready())
+        # Jobs of lower priority moved back by one
+        self._spawn(self._broadcast_positions(behind=job))
+        return self.queue_position(job_id)
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Scheduler notification failed: {task.exception()!r}")
+
+    async def _notify_ready(self) -> None:
+        async with self._ready:
+            self._ready.notify()
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        for position, job in enumerate(sorted(self._pending), start=1):
+            if job.job_id == job_id:
+                return position
+        return None
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up."""
+        if not self._run_times:
+            return 30
+        mean_run = statistics.mean(self._run_times)
+        return max(1, math.ceil(mean_run * max(1, len(self._pending)) / self.worker_slots))
+
+    async def _worker(self, slot: int) -> None:
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: bool(self._pending))
+                job = heapq.heappop(self._pending)
+
+            started = time.monotonic()
+            self._wait_times.append(started - job.enqueued_at)
+            self._running[job.job_id] = started
+            self._spawn(self._broadcast_positions())
+            try:
+                await self.runner(job.job_id, job.payload)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Job {job.job_id} failed in worker slot {slot}: {e}", exc_info=True)
+            finally:
+                self._running.pop(job.job_id, None)
+                self._run_times.append(time.monotonic() - started)
+
+    async def send_position(self, job_id: str) -> None:
+        """Push a queued job's current position to its WebSocket clients."""
+        position = self.queue_position(job_id)
+        if position is None or not self.websocket_manager:
+            return
+        await self.websocket_manager.send_status_update(
+            job_id=job_id,
+            status="queued",
+            message=f"Waiting in queue (position {position} of {len(self._pending)})",
+            result={
+                "queue_position": position,
+                "queue_depth": len(self._pending)
+            }
+        )
+
+    async def _broadcast_positions(self, behind: Optional[QueuedJob] = None) -> None:
+        """Send every queued job its position, or only the jobs queued behind ``behind``."""
+        for job in sorted(self._pending):
+            if behind is None or job > behind:
+                await self.send_position(job.job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = list(self._wait_times)
+        return {
+            "worker_slots": self.worker_slots,
+            "busy_slots": len(self._running),
+            "queue_depth": len(self._pending),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_seconds": {
+                "mean": round(statistics.mean(waits), 3) if waits else 0.0,
+                "p50": round(_percentile(waits, 0.50), 3),
+                "p95": round(_percentile(waits, 0.95), 3),
+                "max": round(max(waits), 3) if waits else 0.0,
+            },
+            "run_seconds_mean": round(statistics.mean(self._run_times), 3) if self._run_times else 0.0,
+        }
@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the cache
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+# Request parameters that make sampling non-deterministic or the answer non-textual
+_UNCACHEABLE = ("n", "tools", "functions", "logprobs", "seed")
+
+CACHE_HITS = REGISTRY.counter(
+    "llm_cache_hits_total", "Chat completions answered from the LLM response cache", ["model"])
+CACHE_MISSES = REGISTRY.counter(
+    "llm_cache_misses_total", "Cacheable chat completions sent to the provider", ["model"])
+CACHE_BYTES = REGISTRY.gauge(
+    "llm_cache_bytes", "Size of the completion texts held in the LLM response cache")
+
+# Streams closed early, still being read so their completion can be cached
+_finishing: Set[asyncio.Task] = set()
+
+
+class LLMCache:
+    """Completion texts of deterministic (``temperature=0``) chat requests.
+
+    Keyed by a hash of the model, messages and sampling parameters; entries
+    expire after ``ttl`` seconds and the least recently used ones are evicted
+    beyond ``max_bytes`` of text.
+    """
+
+    def __init__(self, ttl: float = LLM_CACHE_TTL, max_bytes: int = LLM_CACHE_MAX_BYTES) -> None:
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def cacheable(params: Dict[str, Any]) -> bool:
+        return params.get("temperature") == 0 and not any(params.get(name) for name in _UNCACHEABLE)
+
+    @staticmethod
+    def key(params: Dict[str, Any]) -> str:
+        request = {name: value for name, value in params.items() if name not in ("stream", "stream_options")}
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str, model: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry and entry[0] >= time.time():
+            self._entries.move_to_end(key)
+            CACHE_HITS.inc(model=model)
+            return entry[1]
+        if entry:
+            self._drop(key)
+        CACHE_MISSES.inc(model=model)
+        return None
+
+    def set(self, key: str, text: str) -> None:
+        if not self.ttl or len(text) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.time() + self.ttl, text)
+        self._bytes += len(text)
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+        CACHE_BYTES.set(self._bytes)
+
+    def _drop(self, key: str) -> None:
+        _, text = self._entries.pop(key)
+        self._bytes -= len(text)
+        CACHE_BYTES.set(self._bytes)
+
+
+def _completion(text: str, model: str) -> ChatCompletion:
+    return ChatCompletion(
+        id=f"cached-{uuid.uuid4().hex}",
+        object="chat.completion",
+        created=int(time.time()),
+        model=model,
+        choices=[Choice(index=0, finish_reason="stop",
+                        message=ChatCompletionMessage(role="assistant", content=text))],
+    )
+
+
+class _ReplayStream:
+    """Replays a cached completion as stream chunks, one word at a time."""
+
+    def __init__(self, text: str, model: str) -> None:
+        self._text = text
+        self._model = model
+        self._id = f"cached-{uuid.uuid4().hex}"
+
+    def _chunk(self, delta: ChoiceDelta, finish_reason: Optional[str] = None) -> ChatCompletionChunk:
+        return ChatCompletionChunk(
+            id=self._id,
+            object="chat.completion.chunk",
+            created=int(time.time()),
+            model=self._model,
+            choices=[ChunkChoice(index=0, delta=delta, finish_reason=finish_reason)],
+        )
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        yield self._chunk(ChoiceDelta(role="assistant", content=""))
+        # Word-sized pieces keep the callers' incremental UI updates looking like a live stream
+        for piece in re.findall(r"\s*\S+\s*", self._text):
+            yield self._chunk(ChoiceDelta(content=piece))
+        yield self._chunk(ChoiceDelta(), "stop")
+
+    async def __aenter__(self) -> "_ReplayStream":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        pass
+
+
+class _RecordingStream:
+    """Passes a live stream through and caches its text once it finishes normally.
+
+    Callers often stop reading early (the query planner once it has the
+    queries it needs); closing the stream before its last chunk reads the
+    rest in the background, so the complete text is cached anyway.
+    """
+
+    def __init__(self, stream: Any, cache: LLMCache, key: str) -> None:
+        self._stream = stream
+        self._cache = cache
+        self._key = key
+        self._parts = []
+        self._finished = False
+        self._failed = False
+
+    def _record(self, chunk: ChatCompletionChunk) -> None:
+        if not chunk.choices:
+            return
+        choice = chunk.choices[0]
+        if choice.delta and choice.delta.content:
+            self._parts.append(choice.delta.content)
+        if choice.finish_reason:
+            self._finished = True
+            if choice.finish_reason == "stop":
+                self._cache.set(self._key, "".join(self._parts))
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        try:
+            async for chunk in self._stream:
+                # Recorded before yielding: callers usually stop reading at the "stop" chunk
+                self._record(chunk)
+                yield chunk
+        except (Exception, asyncio.CancelledError):
+            # A broken or abandoned response is never cached
+            self._failed = True
+            raise
+
+    async def _finish(self) -> None:
+        try:
+            async for chunk in self._stream:
+                self._record(chunk)
+                if self._finished:
+                    break
+        except Exception as e:
+            logger.warning(f"Could not read the rest of a completion for the LLM cache: {e}")
+        finally:
+            await self._stream.close()
+
+    async def __aenter__(self) -> "_RecordingStream":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._parts and not (self._finished or self._failed):
+            task = asyncio.create_task(self._finish())
+            _finishing.add(task)
+            task.add_done_callback(_finishing.discard)
+            return
+        await self._stream.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class CachedCompletions:
+    """``chat.completions`` whose deterministic requests go through the LLM cache."""
+
+    def __init__(self, completions: Any, cache: LLMCache) -> None:
+        self._completions = completions
+        self._cache = cache
+
+    async def create(self, **params) -> Any:
+        if not self._cache.ttl or not self._cache.cacheable(params):
+            return await self._completions.create(**params)
+
+        key = self._cache.key(params)
+        model = params.get("model", "")
+        if (text := self._cache.get(key, model)) is not None:
+            return _ReplayStream(text, model) if params.get("stream") else _completion(text, model)
+
+        response = await self._completions.create(**params)
+        if params.get("stream"):
+            return _RecordingStream(response, self._cache, key)
+        choice = response.choices[0] if response.choices else None
+        if choice and choice.finish_reason == "stop" and choice.message.content:
+            self._cache.set(key, choice.message.content)
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._completions, name)
+
+
+class _CachedChat:
+    def __init__(self, chat: Any, cache: LLMCache) -> None:
+        self.completions = CachedCompletions(chat.completions, cache)
+        self._chat = chat
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._chat, name)
+
+
+class CachedOpenAI:
+    """AsyncOpenAI client whose chat completions are served from the LLM cache when possible."""
+
+    def __init__(self, client: Any, cache: LLMCache) -> None:
+        self._client = client
+        self.cache = cache
+        self.chat = _CachedChat(client.chat, cache)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -0,0 +1,296 @@
+import functools
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; node runs and provider calls range from a few
+# milliseconds (cache hits) to minutes (deep Tavily searches, scrapers)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._samples: Dict[Tuple[str, ...], Any] = {}
+        # Samples may also be written from executor threads
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _copy(self, value: Any) -> Any:
+        return value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = {key: self._copy(value) for key, value in self._samples.items()}
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labels": self.labelnames,
+            "samples": samples,
+        }
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._samples[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _copy(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        return {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                # One slot per bucket plus +Inf; made cumulative when rendered
+                sample = self._samples[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            sample["counts"][index] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = self.buckets
+        return snapshot
+
+
+class MetricsRegistry:
+    """Process-local metric registry rendered in the Prometheus text format.
+
+    Snapshots are plain data, so worker processes can ship theirs to the
+    API process, which merges them into its own ``/metrics`` output.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def render(self, *extra: Dict[str, Dict[str, Any]]) -> str:
+        """Render this registry, plus any snapshots from other processes."""
+        return render_snapshot(merge_snapshots([self.snapshot(), *extra]))
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Sum several registry snapshots sample by sample."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for key, value in metric["samples"].items():
+                current = target["samples"].get(key)
+                if metric["type"] == "histogram":
+                    if current is None:
+                        current = target["samples"][key] = {"counts": [0] * len(value["counts"]), "sum": 0.0, "count": 0}
+                    current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                    current["sum"] += value["sum"]
+                    current["count"] += value["count"]
+                else:
+                    target["samples"][key] = (current or 0.0) + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_snapshot(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    lines: List[str] = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labels"]
+        for key, value in sorted(metric["samples"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], "+Inf"], value["counts"]):
+                cumulative += count
+                le = 'le="%s"' % (bound if bound == "+Inf" else _number(bound))
+                lines.append(f"{name}_bucket{_labels(names, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(value['sum'])}")
+            lines.append(f"{name}_count{_labels(names, key)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+NODE_SECONDS = REGISTRY.histogram(
+    "research_node_duration_seconds", "Time spent in each research graph node", ["node"])
+NODE_ERRORS = REGISTRY.counter(
+    "research_node_errors_total", "Graph node runs that raised or reported an error", ["node"])
+NODE_IN_FLIGHT = REGISTRY.gauge(
+    "research_node_in_flight", "Graph node runs currently executing", ["node"])
+
+STEP_SECONDS = REGISTRY.histogram(
+    "research_step_duration_seconds", "Time spent in expensive steps inside a node", ["step"])
+STEP_ERRORS = REGISTRY.counter(
+    "research_step_errors_total", "Steps inside a node that failed", ["step"])
+
+PROVIDER_SECONDS = REGISTRY.histogram(
+    "provider_request_duration_seconds", "Outbound provider request time, including the response body",
+    ["provider", "endpoint"])
+PROVIDER_REQUESTS = REGISTRY.counter(
+    "provider_requests_total", "Outbound provider requests by HTTP status", ["provider", "endpoint", "status"])
+PROVIDER_ERRORS = REGISTRY.counter(
+    "provider_request_errors_total", "Outbound provider requests that failed or returned HTTP >= 400",
+    ["provider", "endpoint"])
+PROVIDER_IN_FLIGHT = REGISTRY.gauge(
+    "provider_requests_in_flight", "Outbound provider requests awaiting a complete response", ["provider"])
+PROVIDER_RETRIES = REGISTRY.counter(
+    "provider_request_retries_total", "Outbound provider requests retried after a transient failure", ["provider"])
+
+
+class JobMetrics:
+    """Timings collected for a single research job, stored with its record."""
+
+    def __init__(self) -> None:
+        self._started = time.monotonic()
+        self.sections: Dict[str, Dict[str, Dict[str, Any]]] = {"nodes": {}, "steps": {}, "provider_calls": {}}
+
+    def record(self, section: str, key: str, seconds: float, failed: bool = False) -> None:
+        entry = self.sections[section].setdefault(key, {"count": 0, "seconds": 0.0, "errors": 0})
+        entry["count"] += 1
+        entry["seconds"] += seconds
+        entry["errors"] += int(failed)
+
+    def summary(self) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"total_seconds": round(time.monotonic() - self._started, 3)}
+        for section, entries in self.sections.items():
+            summary[section] = {
+                key: {**entry, "seconds": round(entry["seconds"], 3)}
+                for key, entry in sorted(entries.items(), key=lambda item: -item[1]["seconds"])
+            }
+        return summary
+
+
+_job_metrics: ContextVar[Optional[JobMetrics]] = ContextVar("job_metrics", default=None)
+
+
+def start_job_metrics() -> JobMetrics:
+    """Collect timings for the job running in the current context (and tasks it spawns)."""
+    job = JobMetrics()
+    _job_metrics.set(job)
+    return job
+
+
+def record_job(section: str, key: str, seconds: float, failed: bool = False) -> None:
+    if job := _job_metrics.get():
+        job.record(section, key, seconds, failed)
+
+
+class _Span:
+    failed = False
+
+
+@asynccontextmanager
+async def track_node(node: str):
+    """Time a graph node run; set ``span.failed`` for errors reported in state."""
+    span = _Span()
+    NODE_IN_FLIGHT.inc(node=node)
+    started = time.perf_counter()
+    try:
+        yield span
+    except Exception:
+        span.failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        NODE_IN_FLIGHT.dec(node=node)
+        NODE_SECONDS.observe(elapsed, node=node)
+        if span.failed:
+            NODE_ERRORS.inc(node=node)
+        record_job("nodes", node, elapsed, span.failed)
+
+
+@asynccontextmanager
+async def track_step(step: str):
+    """Time an expensive step inside a node (a scraper, a social link lookup, ...)."""
+    span = _Span()
+    started = time.perf_counter()
+    try:
+        yield span
+    except Exception:
+        span.failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STEP_SECONDS.observe(elapsed, step=step)
+        if span.failed:
+            STEP_ERRORS.inc(step=step)
+        record_job("steps", step, elapsed, span.failed)
+
+
+def timed_step(step: str):
+    """Decorator form of ``track_step`` for async methods."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with track_step(step):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Events waiting for delivery; past this, new events are dropped rather
+# than making the nodes wait for slow subscribers
+MAX_PENDING_EVENTS = 10000
+
+EVENTS_DROPPED = REGISTRY.counter(
+    "progress_events_dropped_total", "Progress events dropped because the bus was full")
+
+
+@dataclass
+class StatusEvent:
+    """A step of a job's progress, shown in the UI's status feed."""
+    job_id: str
+    status: str
+    message: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+    def to_message(self) -> Dict[str, Any]:
+        return {
+            "type": "status_update",
+            "data": {
+                "status": self.status,
+                "message": self.message,
+                "error": self.error,
+                "result": self.result
+            }
+        }
+
+
+@dataclass
+class StateEvent:
+    """A graph node finished and wrote the listed state keys."""
+    job_id: str
+    node: str
+    keys: List[str] = field(default_factory=list)
+    progress: int = 0
+
+    def to_message(self) -> Dict[str, Any]:
+        return {
+            "type": "state_update",
+            "data": {
+                "current_node": self.node,
+                "progress": self.progress,
+                "keys": self.keys
+            }
+        }
+
+
+ProgressEvent = Union[StatusEvent, StateEvent]
+Subscriber = Callable[[ProgressEvent], Awaitable[None]]
+
+
+class ProgressBus:
+    """In-process side channel between the pipeline and whoever reports progress.
+
+    Nodes publish events without awaiting delivery; a dispatcher task hands
+    them, in order, to every subscriber (the WebSocket manager in the API
+    process, the event queue in a worker process).
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING_EVENTS) -> None:
+        self.max_pending = max_pending
+        self._subscribers: List[Subscriber] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Sequence numbers let drain() wait for earlier events only, even
+        # while other jobs keep publishing
+        self._published = 0
+        self._delivered = 0
+        self._progress: Optional[asyncio.Event] = None
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        if subscriber not in self._subscribers:
+            self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def _ensure_dispatcher(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._progress = asyncio.Event()
+            self._published = self._delivered = 0
+            self._dispatcher = loop.create_task(self._dispatch(self._queue))
+        return self._queue
+
+    def publish(self, event: ProgressEvent) -> None:
+        """Queue an event for the subscribers and return immediately."""
+        if not self._subscribers:
+            return
+        try:
+            self._ensure_dispatcher().put_nowait(event)
+        except RuntimeError:
+            # No running event loop: nobody could deliver the event
+            return
+        except asyncio.QueueFull:
+            EVENTS_DROPPED.inc()
+            return
+        self._published += 1
+
+    async def _dispatch(self, queue: asyncio.Queue) -> None:
+        while True:
+            event = await queue.get()
+            try:
+                for subscriber in list(self._subscribers):
+                    try:
+                        await subscriber(event)
+                    except Exception as e:
+                        logger.error(f"Progress subscriber failed for job {event.job_id}: {e}")
+            finally:
+                self._delivered += 1
+                self._progress.set()
+
+    async def drain(self) -> None:
+        """Wait until every event published so far has been delivered."""
+        target = self._published
+        while self._delivered < target and self._dispatcher and not self._dispatcher.done():
+            self._progress.clear()
+            await self._progress.wait()
+
+
+_bus: Optional[ProgressBus] = None
+
+# Job whose pipeline runs in the current context; copied into every task
+# the graph spawns, so nodes can emit without looking up the job ID
+_current_job: ContextVar[Optional[str]] = ContextVar("progress_job", default=None)
+
+
+def get_progress_bus() -> ProgressBus:
+    """Return the process-wide progress bus, creating it on first use."""
+    global _bus
+    if _bus is None:
+        _bus = ProgressBus()
+    return _bus
+
+
+def bind_job(job_id: Optional[str]) -> None:
+    """Attribute events emitted from the current context to job_id."""
+    _current_job.set(job_id)
+
+
+def emit(status: str, message: str = None, error: str = None, result: dict = None) -> None:
+    """Publish a status update for the current job without blocking."""
+    if job_id := _current_job.get():
+        get_progress_bus().publish(StatusEvent(job_id, status, message, error, result))
+
+
+def emit_event(event: ProgressEvent) -> None:
+    get_progress_bus().publish(event)
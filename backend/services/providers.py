@@ -0,0 +1,398 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+from openai import AsyncOpenAI
+
+from .concurrency import AdaptiveLimit
+from .metrics import (PROVIDER_ERRORS, PROVIDER_IN_FLIGHT, PROVIDER_REQUESTS, PROVIDER_RETRIES, PROVIDER_SECONDS,
+                      record_job)
+from .llm_cache import CachedOpenAI, LLMCache
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+TAVILY_BASE_URL = os.getenv("TAVILY_BASE_URL", "https://api.tavily.com")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+SERPAPI_BASE_URL = os.getenv("SERPAPI_BASE_URL", "https://serpapi.com")
+SERPAPI_TIMEOUT = float(os.getenv("SERPAPI_TIMEOUT", "20"))
+SERPAPI_MAX_RETRIES = int(os.getenv("SERPAPI_MAX_RETRIES", "3"))
+SERPAPI_MAX_CONCURRENCY = int(os.getenv("SERPAPI_MAX_CONCURRENCY", "5"))
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# HTTP statuses that mean the provider wants less concurrency
+OVERLOAD_STATUSES = {429, 503}
+
+
+class ProviderError(Exception):
+    """Raised when a provider API returns an unusable response."""
+
+    def __init__(self, provider: str, status_code: int, detail: str = ""):
+        self.provider = provider
+        self.status_code = status_code
+        super().__init__(f"{provider} returned HTTP {status_code}: {detail}".rstrip(": "))
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response stream that releases its pool and concurrency slots once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "TrackedTransport",
+                 endpoint: str, status_code: int, started: float):
+        self._stream = stream
+        self._transport = transport
+        self._endpoint = endpoint
+        self._status_code = status_code
+        self._started = started
+        # Time to the response headers; unlike the body it does not grow with the answer's length
+        self._latency = time.perf_counter() - started
+        self._timed_out = False
+        self._released = False
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except httpx.TimeoutException:
+            self._timed_out = True
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._transport.in_flight -= 1
+        overloaded = self._timed_out or self._status_code in OVERLOAD_STATUSES
+        self._transport.limit(self._endpoint).release(
+            None if self._status_code >= 400 else self._latency, overloaded)
+        # Streamed completions are only done once the body is consumed
+        self._transport.observe(self._endpoint, self._started, self._status_code)
+
+    def __del__(self) -> None:
+        # A caller dropped the response without closing it: free its slot and pooled
+        # connection here, otherwise every later request to the endpoint would queue behind it
+        if self._released:
+            return
+        logger.warning(f"{self._transport.name} {self._endpoint} response was not closed; releasing it")
+        self._release()
+        try:
+            task = asyncio.get_running_loop().create_task(self._stream.aclose())
+        except RuntimeError:
+            return
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+
+# Keeps the close tasks of abandoned responses alive until they finish
+_closing: set = set()
+
+
+class TrackedTransport(httpx.AsyncBaseTransport):
+    """Pooled HTTP transport that counts in-flight requests against its connection limit.
+
+    Requests also wait for a slot of the endpoint's adaptive concurrency
+    limit, shared by every node and job in the process.
+    """
+
+    def __init__(self, name: str, max_connections: int, max_keepalive: int, http2: bool,
+                 max_concurrency: Optional[int] = None):
+        self.name = name
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency or max_connections
+        self.http2 = http2
+        self.limits: Dict[str, AdaptiveLimit] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.failed_requests = 0
+        self._transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=60,
+            ),
+            http2=http2,
+        )
+
+    @staticmethod
+    def _endpoint(request: httpx.Request) -> str:
+        # "/search.json" -> "search", "/v1/chat/completions" -> "completions",
+        # "/v1beta/models/gemini-2.0-flash:generateContent" -> "generateContent"
+        segment = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        return segment.rsplit(":", 1)[-1].split(".", 1)[0] or "root"
+
+    def limit(self, endpoint: str) -> AdaptiveLimit:
+        if endpoint not in self.limits:
+            self.limits[endpoint] = AdaptiveLimit(self.name, endpoint, max_limit=self.max_concurrency)
+        return self.limits[endpoint]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.extensions.get("warmup"):
+            # Only opens a pooled connection; the provider's answer is not a real call
+            return await self._transport.handle_async_request(request)
+        endpoint = self._endpoint(request)
+        # Waiting for a slot counts against the request's pool timeout, like waiting for a connection
+        pool_timeout = request.extensions.get("timeout", {}).get("pool")
+        try:
+            await self.limit(endpoint).acquire(pool_timeout)
+        except asyncio.TimeoutError:
+            self.failed_requests += 1
+            raise httpx.PoolTimeout(f"No {self.name} {endpoint} concurrency slot within {pool_timeout}s",
+                                    request=request) from None
+        started = time.perf_counter()
+        self.in_flight += 1
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        PROVIDER_IN_FLIGHT.inc(provider=self.name)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException as e:
+            self.in_flight -= 1
+            self.failed_requests += 1
+            self.limit(endpoint).release(overloaded=isinstance(e, httpx.TimeoutException))
+            self.observe(endpoint, started, None)
+            raise
+        response.stream = _TrackedStream(response.stream, self, endpoint, response.status_code, started)
+        return response
+
+    def observe(self, endpoint: str, started: float, status_code: Optional[int]) -> None:
+        """Record one finished request; ``status_code`` is None for transport errors."""
+        elapsed = time.perf_counter() - started
+        failed = status_code is None or status_code >= 400
+        PROVIDER_IN_FLIGHT.dec(provider=self.name)
+        PROVIDER_SECONDS.observe(elapsed, provider=self.name, endpoint=endpoint)
+        PROVIDER_REQUESTS.inc(provider=self.name, endpoint=endpoint, status=status_code or "error")
+        if failed:
+            PROVIDER_ERRORS.inc(provider=self.name, endpoint=endpoint)
+        record_job("provider_calls", f"{self.name}.{endpoint}", elapsed, failed)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_connections": self.max_connections,
+            "saturation": round(self.in_flight / self.max_connections, 3),
+            "total_requests": self.total_requests,
+            "failed_requests": self.failed_requests,
+            "http2": self.http2,
+            "concurrency": {endpoint: limit.stats() for endpoint, limit in self.limits.items()},
+        }
+
+
+class TavilyClient:
+    """Minimal async Tavily client that reuses a pooled HTTP client."""
+
+    def __init__(self, http_client: httpx.AsyncClient, api_key: Optional[str]):
+        self._http = http_client
+        self._api_key = api_key
+        self._flights = SingleFlight("tavily")
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        async def call() -> Dict[str, Any]:
+            response = await self._http.post(
+                path,
+                content=json.dumps(payload),
+                headers={"Authorization": f"Bearer {self._api_key}"},
+            )
+            if response.status_code != 200:
+                raise ProviderError("tavily", response.status_code, response.text[:200])
+            return response.json()
+
+        # Jobs researching the same brand at once share one request
+        return await self._flights.do(path.strip("/"), payload, call)
+
+    async def search(self, query: str, search_depth: str = "basic", topic: str = "general",
+                     max_results: int = 5, include_raw_content: bool = False, **kwargs) -> Dict[str, Any]:
+        payload = {
+            "query": query,
+            "search_depth": search_depth,
+            "topic": topic,
+            "max_results": max_results,
+            "include_raw_content": include_raw_content,
+            **kwargs,
+        }
+        return await self._post("/search", payload)
+
+    async def extract(self, urls: Union[str, List[str]], extract_depth: str = "basic", **kwargs) -> Dict[str, Any]:
+        return await self._post("/extract", {"urls": urls, "extract_depth": extract_depth, **kwargs})
+
+
+class GeminiClient:
+    """Async Gemini REST client (generateContent) on a pooled HTTP client."""
+
+    def __init__(self, http_client: httpx.AsyncClient, api_key: Optional[str]):
+        self._http = http_client
+        self._api_key = api_key
+
+    async def generate_content(self, prompt: str, model: str = "gemini-2.0-flash") -> str:
+        response = await self._http.post(
+            f"/v1beta/models/{model}:generateContent",
+            json={"contents": [{"role": "user", "parts": [{"text": prompt}]}]},
+            headers={"x-goog-api-key": self._api_key or ""},
+        )
+        if response.status_code != 200:
+            raise ProviderError("gemini", response.status_code, response.text[:200])
+        candidates = response.json().get("candidates") or []
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+
+def _backoff(attempt: int, retry_after: Optional[str] = None, base: float = 0.5, cap: float = 10.0) -> float:
+    """Seconds to wait before retry ``attempt`` (1-based): the server's Retry-After, else full-jitter backoff."""
+    if retry_after:
+        try:
+            return min(float(retry_after), cap)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class SerpApiClient:
+    """Async SerpAPI client on a pooled HTTP client.
+
+    Requests have their own timeout, and timeouts, connection errors, 429
+    and 5xx answers are retried with exponential backoff. Concurrency is
+    limited by the transport, up to ``SERPAPI_MAX_CONCURRENCY``.
+    """
+
+    def __init__(self, http_client: httpx.AsyncClient, api_key: Optional[str],
+                 timeout: float = SERPAPI_TIMEOUT, max_retries: int = SERPAPI_MAX_RETRIES):
+        self._http = http_client
+        self._api_key = api_key
+        self._flights = SingleFlight("serpapi")
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5))
+        self.max_retries = max_retries
+
+    async def _get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = await self._http.get(
+                    "/search.json",
+                    params={**params, "api_key": self._api_key},
+                    timeout=self.timeout,
+                )
+                if response.status_code == 200:
+                    return response.json()
+                error = ProviderError("serpapi", response.status_code, response.text[:200])
+                if response.status_code not in RETRY_STATUSES:
+                    raise error
+                retry_after = response.headers.get("Retry-After")
+            except httpx.TransportError as e:
+                error = e
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise error
+            delay = _backoff(attempt, retry_after)
+            logger.warning(f"SerpAPI request failed ({error}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            PROVIDER_RETRIES.inc(provider="serpapi")
+            await asyncio.sleep(delay)
+
+    async def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._flights.do("search", params, lambda: self._get(params))
+
+
+def _http2_enabled() -> bool:
+    if os.getenv("PROVIDER_HTTP2", "").lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("PROVIDER_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+class ProviderClients:
+    """Process-wide clients for every external provider.
+
+    Each provider gets one pooled ``httpx.AsyncClient`` with keep-alive
+    connections and its own per-host connection limit, so TLS sessions are
+    reused across nodes and jobs.
+    """
+
+    def __init__(self) -> None:
+        max_connections = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "20"))
+        max_keepalive = int(os.getenv("PROVIDER_MAX_KEEPALIVE", "10"))
+        http2 = _http2_enabled()
+
+        self.transports: Dict[str, TrackedTransport] = {}
+        self.http_clients: Dict[str, httpx.AsyncClient] = {}
+
+        def http_client(name: str, base_url: str, max_concurrency: Optional[int] = None,
+                        **kwargs) -> httpx.AsyncClient:
+            transport = TrackedTransport(name, max_connections, max_keepalive, http2, max_concurrency)
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                transport=transport,
+                timeout=httpx.Timeout(180, connect=10),
+                **kwargs
+            )
+            self.transports[name] = transport
+            self.http_clients[name] = client
+            return client
+
+        self.tavily = TavilyClient(
+            http_client("tavily", TAVILY_BASE_URL, headers={"Content-Type": "application/json"}),
+            os.getenv("TAVILY_API_KEY"),
+        )
+        # Deterministic completions are replayed from the LLM cache
+        self.openai = CachedOpenAI(
+            AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client("openai", os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")),
+            ),
+            LLMCache(),
+        )
+        self.gemini = GeminiClient(http_client("gemini", GEMINI_BASE_URL), os.getenv("GEMINI_API_KEY"))
+        self.serpapi = SerpApiClient(
+            http_client("serpapi", SERPAPI_BASE_URL, max_concurrency=SERPAPI_MAX_CONCURRENCY),
+            os.getenv("SERP_API_KEY"),
+        )
+
+    async def warmup(self) -> None:
+        """Resolve DNS and open a TLS connection to every provider host."""
+        for name, client in self.http_clients.items():
+            try:
+                # Marked so it bypasses request tracking and the adaptive limits
+                await client.head("/", timeout=5, extensions={"warmup": True})
+                logger.info(f"Warmed up {name} connection pool")
+            except Exception as e:
+                logger.warning(f"Warm-up of {name} connection pool failed: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Pool saturation and concurrency limits per provider."""
+        return {name: transport.stats() for name, transport in self.transports.items()}
+
+    async def aclose(self) -> None:
+        for client in self.http_clients.values():
+            await client.aclose()
+
+
+_providers: Optional[ProviderClients] = None
+
+
+def get_providers() -> ProviderClients:
+    """Return the process-wide provider clients, creating them on first use."""
+    global _providers
+    if _providers is None:
+        _providers = ProviderClients()
+    return _providers
@@ -0,0 +1,167 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+# Unset keeps the cache in memory, per process
+SEARCH_CACHE_DB = os.getenv("SEARCH_CACHE_DB")
+
+# Seconds a result stays fresh, by Tavily topic: news goes stale within the
+# hour, financial and industry coverage changes over days
+TOPIC_TTLS = {
+    "news": float(os.getenv("SEARCH_CACHE_TTL_NEWS", "900")),
+    "finance": float(os.getenv("SEARCH_CACHE_TTL_FINANCE", "86400")),
+    "general": float(os.getenv("SEARCH_CACHE_TTL_GENERAL", "43200")),
+}
+
+CACHE_HITS = REGISTRY.counter(
+    "search_cache_hits_total", "Tavily searches answered from the cache", ["tier", "topic"])
+CACHE_MISSES = REGISTRY.counter(
+    "search_cache_misses_total", "Tavily searches that went to the API", ["topic"])
+CACHE_ENTRIES = REGISTRY.gauge(
+    "search_cache_entries", "Tavily search results held in the in-memory cache")
+
+
+class _SqliteTier:
+    """Search results in a SQLite file, shared by every process on the host."""
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM search_cache WHERE expires_at < ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, payload FROM search_cache WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def set(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, expires_at, payload) VALUES (?, ?, ?)",
+                (key, expires_at, payload),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SearchCache:
+    """Tavily search results shared across jobs.
+
+    Keyed by the query and the parameters that change the answer (topic,
+    search depth, result count). Lookups go to an in-memory LRU first, then
+    to the optional SQLite file, and only then to the API. Entries expire
+    after the TTL of their topic.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_SIZE, db_path: Optional[str] = SEARCH_CACHE_DB,
+                 ttls: Optional[Dict[str, float]] = None) -> None:
+        self.max_entries = max_entries
+        self.ttls = ttls or TOPIC_TTLS
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._sqlite: Optional[_SqliteTier] = None
+        if db_path:
+            try:
+                self._sqlite = _SqliteTier(db_path)
+                logger.info(f"Caching Tavily search results in {db_path}")
+            except sqlite3.Error as e:
+                logger.warning(f"Search cache database {db_path} unavailable, caching in memory only: {e}")
+
+    @staticmethod
+    def key(query: str, topic: str, search_depth: str, max_results: int, **params) -> str:
+        normalized = " ".join(query.lower().split())
+        raw = json.dumps([normalized, topic, search_depth, max_results, params], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+        CACHE_ENTRIES.set(len(self._memory))
+
+    async def get(self, key: str, topic: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry and entry[0] >= time.time():
+            self._memory.move_to_end(key)
+            CACHE_HITS.inc(tier="memory", topic=topic)
+            return copy.deepcopy(entry[1])
+        if entry:
+            del self._memory[key]
+
+        if self._sqlite:
+            try:
+                entry = await asyncio.to_thread(self._sqlite.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"Search cache read failed: {e}")
+                entry = None
+            if entry:
+                self._remember(key, *entry)
+                CACHE_HITS.inc(tier="sqlite", topic=topic)
+                return copy.deepcopy(entry[1])
+
+        CACHE_MISSES.inc(topic=topic)
+        return None
+
+    async def set(self, key: str, topic: str, value: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttls.get(topic, self.ttls["general"])
+        self._remember(key, expires_at, copy.deepcopy(value))
+        if self._sqlite:
+            try:
+                await asyncio.to_thread(self._sqlite.set, key, expires_at, value)
+            except sqlite3.Error as e:
+                logger.warning(f"Search cache write failed: {e}")
+
+    async def search(self, client: Any, query: str, topic: str = "general", search_depth: str = "basic",
+                     max_results: int = 5, **params) -> Dict[str, Any]:
+        """Return ``client.search(...)`` for these parameters, from the cache when fresh."""
+        key = self.key(query, topic, search_depth, max_results, **params)
+        if (cached := await self.get(key, topic)) is not None:
+            return cached
+
+        results = await client.search(query, search_depth=search_depth, topic=topic,
+                                      max_results=max_results, **params)
+        # Empty answers are often transient; let the next job ask again
+        if results.get("results"):
+            await self.set(key, topic, results)
+        return results
+
+    def close(self) -> None:
+        if self._sqlite:
+            self._sqlite.close()
+            self._sqlite = None
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache, creating it on first use."""
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache()
+    return _search_cache
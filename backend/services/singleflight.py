@@ -0,0 +1,48 @@
+import asyncio
+import copy
+import json
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from .metrics import REGISTRY
+
+DEDUPLICATED = REGISTRY.counter(
+    "singleflight_deduplicated_total", "Provider calls served by an identical call already in flight",
+    ["provider", "operation"])
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls to one provider.
+
+    While a call for an (operation, parameters) pair is in flight, further
+    calls with the same pair wait for its result instead of issuing their
+    own request. Nothing is kept once the call finishes; caching is left to
+    the callers.
+    """
+
+    def __init__(self, provider: str) -> None:
+        self.provider = provider
+        self._calls: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def _forget(self, key: Tuple[str, str], task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the error as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, operation: str, params: Any, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``await call()``, sharing it with identical calls in flight."""
+        key = (operation, json.dumps(params, sort_keys=True, default=str))
+        task = self._calls.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            DEDUPLICATED.inc(provider=self.provider, operation=operation)
+
+        # Shielded so a cancelled caller does not cancel the call for the others
+        result = await asyncio.shield(task)
+        # Followers get their own copy, so no caller sees another's edits
+        return result if leader else copy.deepcopy(result)
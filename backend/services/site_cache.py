@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.urls import canonical_url
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SITE_CACHE_TTL = float(os.getenv("SITE_CACHE_TTL", "21600"))
+SITE_CACHE_SIZE = int(os.getenv("SITE_CACHE_SIZE", "256"))
+
+CACHE_HITS = REGISTRY.counter(
+    "site_cache_hits_total", "Company website extractions answered from the cache")
+CACHE_MISSES = REGISTRY.counter(
+    "site_cache_misses_total", "Company website extractions sent to Tavily")
+CACHE_DOCUMENTS = REGISTRY.gauge(
+    "site_cache_documents", "Distinct website texts held in the site cache")
+
+
+@dataclass(frozen=True)
+class SiteDocument:
+    """Extracted text of a company website, identified by a hash of the text."""
+    id: str
+    url: str
+    content: str
+
+
+class SiteCache:
+    """Company website extractions shared across jobs.
+
+    URLs map to the content hash of their extracted text, so sites reached
+    through several URLs (``www.`` or not, trailing slash, tracking
+    parameters) keep a single copy. URL entries expire after ``ttl``
+    seconds; a text is dropped with the last URL that points to it.
+    """
+
+    def __init__(self, ttl: float = SITE_CACHE_TTL, max_entries: int = SITE_CACHE_SIZE) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._urls: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._documents: Dict[str, str] = {}
+
+    @staticmethod
+    def key(url: str) -> str:
+        return canonical_url(url)
+
+    @staticmethod
+    def document_id(content: str) -> str:
+        return "site-" + hashlib.sha256(content.encode()).hexdigest()[:16]
+
+    def get(self, url: str) -> Optional[SiteDocument]:
+        key = self.key(url)
+        entry = self._urls.get(key)
+        if entry and entry[0] >= time.time():
+            self._urls.move_to_end(key)
+            CACHE_HITS.inc()
+            return SiteDocument(entry[1], url, self._documents[entry[1]])
+        if entry:
+            self._drop(key)
+        CACHE_MISSES.inc()
+        return None
+
+    def set(self, url: str, content: str) -> SiteDocument:
+        key = self.key(url)
+        doc_id = self.document_id(content)
+        if key in self._urls:
+            self._drop(key)
+        self._documents[doc_id] = content
+        self._urls[key] = (time.time() + self.ttl, doc_id)
+        while len(self._urls) > self.max_entries:
+            self._drop(next(iter(self._urls)))
+        CACHE_DOCUMENTS.set(len(self._documents))
+        return SiteDocument(doc_id, url, content)
+
+    def _drop(self, key: str) -> None:
+        _, doc_id = self._urls.pop(key)
+        if not any(other == doc_id for _, other in self._urls.values()):
+            self._documents.pop(doc_id, None)
+        CACHE_DOCUMENTS.set(len(self._documents))
+
+    async def extract(self, client: Any, url: str, **params) -> Optional[SiteDocument]:
+        """Extracted text of ``url``, from the cache when fresh; None if the site has no text."""
+        if self.ttl and (cached := self.get(url)) is not None:
+            return cached
+
+        extraction = await client.extract(url, **params)
+        raw_contents = [item["raw_content"] for item in extraction.get("results", []) if item.get("raw_content")]
+        if not raw_contents:
+            # Often a transient failure of the site; let the next job try again
+            return None
+        content = "\n\n".join(raw_contents)
+        if not self.ttl:
+            return SiteDocument(self.document_id(content), url, content)
+        logger.info(f"Caching {len(raw_contents)} extracted sections of {url}")
+        return self.set(url, content)
+
+
+_site_cache: Optional[SiteCache] = None
+
+
+def get_site_cache() -> SiteCache:
+    """Return the process-wide site cache, creating it on first use."""
+    global _site_cache
+    if _site_cache is None:
+        _site_cache = SiteCache()
+    return _site_cache
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SOCIAL_INDEX_DB = os.getenv("SOCIAL_INDEX_DB", "social_index.sqlite")
+# Discovered profiles are looked up again after this long; manual overrides never expire
+SOCIAL_INDEX_TTL = float(os.getenv("SOCIAL_INDEX_TTL_DAYS", "7")) * 86400
+
+PLATFORMS = ("youtube", "facebook", "tiktok")
+
+# Legal-form words that do not tell brands apart
+_LEGAL_WORDS = {"inc", "ltd", "llc", "co", "corp", "corporation", "company", "jsc", "plc", "limited",
+                "gmbh", "tnhh", "official"}
+_VN_PREFIX = re.compile(r"^cong ty( co phan| tnhh)?\s+")
+
+INDEX_LOOKUPS = REGISTRY.counter(
+    "social_index_lookups_total", "Brand social profile index lookups by outcome", ["result"])
+
+
+def normalize_brand(name: str) -> str:
+    """Lower-case, accent-free brand name without legal-form words."""
+    text = unicodedata.normalize("NFKD", name.lower().replace("đ", "d"))
+    text = text.encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    text = _VN_PREFIX.sub("", text)
+    words = [word for word in text.split() if word not in _LEGAL_WORDS]
+    return " ".join(words) or text
+
+
+@dataclass
+class SocialProfile:
+    """Resolved social profile URLs of one brand."""
+    brand: str
+    links: Dict[str, str]
+    source: str = "serpapi"  # or "manual" for admin overrides
+    verified_at: float = 0.0
+    aliases: List[str] = field(default_factory=list)
+
+    @property
+    def stale(self) -> bool:
+        return self.source != "manual" and time.time() - self.verified_at > SOCIAL_INDEX_TTL
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "stale": self.stale}
+
+
+class SocialIndex:
+    """Persistent map from brand names and aliases to social profile URLs.
+
+    Lets the company analyst skip SerpAPI for brands it has already
+    resolved. A name matches a brand only if it normalises to the brand's
+    name or to one of its aliases: similar names ("Vinamilk" and
+    "Vinamik", "Acme" and "Acne") are often different brands, and serving
+    one brand's profiles for another would skew the whole report. The
+    SQLite file is shared by worker processes.
+    """
+
+    def __init__(self, path: str = SOCIAL_INDEX_DB) -> None:
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS brands (key TEXT PRIMARY KEY, name TEXT NOT NULL, "
+                "youtube TEXT, facebook TEXT, tiktok TEXT, source TEXT NOT NULL, verified_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, key TEXT NOT NULL)"
+            )
+
+    def _profile(self, key: str) -> Optional[SocialProfile]:
+        row = self._conn.execute(
+            "SELECT name, youtube, facebook, tiktok, source, verified_at FROM brands WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+        aliases = [alias for (alias,) in self._conn.execute("SELECT alias FROM aliases WHERE key = ?", (key,))]
+        links = {platform: url for platform, url in zip(PLATFORMS, row[1:4]) if url}
+        return SocialProfile(row[0], links, row[4], row[5], aliases)
+
+    def _resolve(self, key: str) -> Optional[str]:
+        """Key of the brand that ``key`` names, directly or as an alias."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM brands WHERE key = ?", (key,)).fetchone():
+                return key
+            if row := self._conn.execute("SELECT key FROM aliases WHERE alias = ?", (key,)).fetchone():
+                return row[0]
+        return None
+
+    def _lookup(self, brand: str) -> Optional[SocialProfile]:
+        key = normalize_brand(brand)
+        resolved = self._resolve(key)
+        with self._lock:
+            profile = self._profile(resolved) if resolved else None
+        if profile is None:
+            INDEX_LOOKUPS.inc(result="miss")
+        elif profile.stale:
+            INDEX_LOOKUPS.inc(result="stale")
+        else:
+            INDEX_LOOKUPS.inc(result="exact" if resolved == key else "alias")
+        return profile
+
+    def _save(self, brand: str, links: Dict[str, str], source: str, aliases: List[str], replace_manual: bool) -> bool:
+        key = normalize_brand(brand)
+        with self._lock:
+            current = self._conn.execute("SELECT source FROM brands WHERE key = ?", (key,)).fetchone()
+            if current and current[0] == "manual" and not replace_manual:
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO brands (key, name, youtube, facebook, tiktok, source, verified_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, brand, *(links.get(platform) or None for platform in PLATFORMS), source, time.time()),
+            )
+            for alias in aliases:
+                if (alias_key := normalize_brand(alias)) != key:
+                    self._conn.execute("INSERT OR REPLACE INTO aliases (alias, key) VALUES (?, ?)", (alias_key, key))
+        return True
+
+    def _delete(self, brand: str) -> bool:
+        key = normalize_brand(brand)
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM brands WHERE key = ?", (key,)).rowcount
+            self._conn.execute("DELETE FROM aliases WHERE key = ?", (key,))
+        return bool(deleted)
+
+    def _list(self) -> List[SocialProfile]:
+        with self._lock:
+            keys = [key for (key,) in self._conn.execute("SELECT key FROM brands ORDER BY key")]
+            return [self._profile(key) for key in keys]
+
+    async def lookup(self, brand: str) -> Optional[SocialProfile]:
+        """Profile of ``brand`` or the brand it is an alias of; check ``stale`` before trusting it.
+
+        There is deliberately no fuzzy matching: a close spelling is often
+        another brand, so name variants resolve only through aliases pinned
+        with ``override``. Case, accents and legal-form words are ignored
+        (see ``normalize_brand``).
+        """
+        try:
+            return await asyncio.to_thread(self._lookup, brand)
+        except sqlite3.Error as e:
+            # The index only saves lookups; research goes on without it
+            logger.warning(f"Social index lookup for {brand} failed: {e}")
+            return None
+
+    async def record(self, brand: str, links: Dict[str, str]) -> bool:
+        """Store discovered links; never replaces a manual override."""
+        try:
+            return await asyncio.to_thread(self._save, brand, links, "serpapi", [], False)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to index social links of {brand}: {e}")
+            return False
+
+    async def override(self, brand: str, links: Dict[str, str], aliases: Optional[List[str]] = None) -> None:
+        """Pin links for a brand (and its aliases) until deleted."""
+        await asyncio.to_thread(self._save, brand, links, "manual", aliases or [], True)
+
+    async def delete(self, brand: str) -> bool:
+        return await asyncio.to_thread(self._delete, brand)
+
+    async def profiles(self) -> List[SocialProfile]:
+        return await asyncio.to_thread(self._list)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_social_index: Optional[SocialIndex] = None
+
+
+def get_social_index() -> SocialIndex:
+    """Return the process-wide social profile index, opening it on first use."""
+    global _social_index
+    if _social_index is None:
+        _social_index = SocialIndex()
+    return _social_index
+
+
+def close_social_index() -> None:
+    global _social_index
+    if _social_index is not None:
+        _social_index.close()
+        _social_index = None
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 from datetime import datetime
@@ -5,25 +6,52 @@ from typing import Dict, Set
 
 from fastapi import WebSocket
 
+from .metrics import REGISTRY
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Messages a client may fall behind by before it is disconnected; the UI
+# reconnects and gets the job's current status again
+MAX_PENDING_MESSAGES = 1000
+
+CLIENTS_DROPPED = REGISTRY.counter(
+    "websocket_clients_dropped_total", "WebSocket clients disconnected for falling too far behind")
+
+
 class WebSocketManager:
+    """Per-job WebSocket fan-out.
+
+    Each connection has its own bounded outbox and sender task, so a
+    broadcast only queues the message and one slow client never holds up
+    the others or the progress dispatcher.
+    """
+
     def __init__(self):
         # Store active connections for each job
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        self._outboxes: Dict[WebSocket, asyncio.Queue] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        self._closing: Set[asyncio.Task] = set()
         
     async def connect(self, websocket: WebSocket, job_id: str):
         """Connect a new client to a specific job."""
         if job_id not in self.active_connections:
             self.active_connections[job_id] = set()
         self.active_connections[job_id].add(websocket)
+        outbox = asyncio.Queue(MAX_PENDING_MESSAGES)
+        self._outboxes[websocket] = outbox
+        self._senders[websocket] = asyncio.create_task(self._send_loop(websocket, job_id, outbox))
         logger.info(f"New WebSocket connection for job {job_id}")
         logger.info(f"Total connections for job: {len(self.active_connections[job_id])}")
         logger.info(f"All active jobs: {list(self.active_connections.keys())}")
         
     def disconnect(self, websocket: WebSocket, job_id: str):
         """Disconnect a client from a specific job."""
+        self._outboxes.pop(websocket, None)
+        sender = self._senders.pop(websocket, None)
+        if sender and sender is not asyncio.current_task():
+            sender.cancel()
         if job_id in self.active_connections:
             self.active_connections[job_id].discard(websocket)
             if not self.active_connections[job_id]:
@@ -31,9 +59,20 @@ class WebSocketManager:
             logger.info(f"WebSocket disconnected for job {job_id}")
             logger.info(f"Remaining connections for job: {len(self.active_connections.get(job_id, set()))}")
             logger.info(f"Remaining active jobs: {list(self.active_connections.keys())}")
-                
+
+    async def _send_loop(self, websocket: WebSocket, job_id: str, outbox: asyncio.Queue):
+        """Write queued messages to one client, in order, until it goes away."""
+        while True:
+            message_str = await outbox.get()
+            try:
+                await websocket.send_text(message_str)
+            except Exception as e:
+                logger.error(f"Error sending message to client: {str(e)}", exc_info=True)
+                self.disconnect(websocket, job_id)
+                return
+
     async def broadcast_to_job(self, job_id: str, message: dict):
-        """Send a message to all clients connected to a specific job."""
+        """Queue a message for all clients connected to a specific job."""
         if job_id not in self.active_connections:
             logger.warning(f"No active connections for job {job_id}")
             return
@@ -45,20 +84,31 @@ class WebSocketManager:
         message_str = json.dumps(message)
         logger.info(f"Message content: {message_str}")
         
-        # Send to all connected clients for this job
-        success_count = 0
-        disconnected = set()
+        # Queue for all connected clients for this job
+        lagging = set()
         for connection in self.active_connections[job_id]:
             try:
-                await connection.send_text(message_str)
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Error sending message to client: {str(e)}", exc_info=True)
-                disconnected.add(connection)
-        
-        # Clean up disconnected clients
-        for connection in disconnected:
+                self._outboxes[connection].put_nowait(message_str)
+            except asyncio.QueueFull:
+                lagging.add(connection)
+        # Let the senders run between messages of a burst
+        await asyncio.sleep(0)
+
+        # Drop clients that stopped reading rather than buffer for them without bound
+        for connection in lagging:
+            logger.warning(f"WebSocket client for job {job_id} is {MAX_PENDING_MESSAGES} messages behind; disconnecting")
+            CLIENTS_DROPPED.inc()
             self.disconnect(connection, job_id)
+            task = asyncio.create_task(self._close(connection))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            # 1013: try again later
+            await websocket.close(code=1013)
+        except Exception:
+            pass
             
     async def send_status_update(self, job_id: str, status: str, message: str = None, error: str = None, result: dict = None):
         """Helper method to send formatted status updates."""
@@ -72,4 +122,8 @@ class WebSocketManager:
             }
         }
         #logger.info(f"Status: {status}, Message: {message}")
-        await self.broadcast_to_job(job_id, update)
\ No newline at end of file
+        await self.broadcast_to_job(job_id, update)
+
+    async def send_event(self, event):
+        """Deliver a progress event published by the research pipeline."""
+        await self.broadcast_to_job(event.job_id, event.to_message())
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import queue
+from typing import Any, Dict, List, Optional
+
+from .progress import ProgressEvent, get_progress_bus
+
+logger = logging.getLogger(__name__)
+
+# How often a busy worker ships its metric snapshot to the API process
+METRICS_INTERVAL = 5.0
+# How often the API process checks that its workers are alive
+LIVENESS_INTERVAL = 1.0
+
+
+class QueueProgressSink:
+    """Progress bus subscriber of a worker process.
+
+    Forwards every progress event to the API process over the event queue,
+    where the pool hands it to the WebSocket manager.
+    """
+
+    def __init__(self, events: mp.Queue):
+        self.events = events
+
+    async def __call__(self, event: ProgressEvent) -> None:
+        self.events.put(("progress", event.job_id, event))
+
+
+def _worker_main(jobs: mp.Queue, events: mp.Queue) -> None:
+    """Entry point of a research worker process."""
+    logging.basicConfig(level=logging.INFO, format=f"[worker {os.getpid()}] %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_serve(jobs, events))
+
+
+async def _serve(jobs: mp.Queue, events: mp.Queue) -> None:
+    from backend.graph import get_graph, run_research
+    from backend.services.metrics import REGISTRY
+    from backend.services.providers import get_providers
+    from backend.services.search_cache import get_search_cache
+    from backend.services.social_index import close_social_index
+
+    get_graph()
+    await get_providers().warmup()
+    get_progress_bus().subscribe(QueueProgressSink(events))
+    loop = asyncio.get_running_loop()
+    running = set()
+
+    async def handle(job_id: str, request: Dict[str, Any], resume: bool) -> None:
+        events.put(("started", job_id, os.getpid()))
+        try:
+            result = await run_research(job_id, request, resume=resume)
+            events.put(("result", job_id, result))
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            events.put(("error", job_id, str(e)))
+        finally:
+            events.put(("metrics", os.getpid(), REGISTRY.snapshot()))
+
+    async def report_metrics() -> None:
+        # Keeps in-flight gauges current while long jobs run
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            if running:
+                events.put(("metrics", os.getpid(), REGISTRY.snapshot()))
+
+    reporter = asyncio.create_task(report_metrics())
+    # Every worker sweeps; deleting an abandoned job twice is harmless
+    maintenance = asyncio.create_task(get_graph().maintain())
+    while True:
+        item = await loop.run_in_executor(None, jobs.get)
+        if item is None:
+            break
+        task = asyncio.create_task(handle(*item))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    await asyncio.gather(*running, return_exceptions=True)
+    reporter.cancel()
+    maintenance.cancel()
+    await get_graph().aclose()
+    await get_providers().aclose()
+    get_search_cache().close()
+    close_social_index()
+
+
+class WorkerPool:
+    """Runs research jobs in separate worker processes.
+
+    The API process only enqueues jobs and relays the progress events the
+    workers send back; the graph, the provider clients and every blocking
+    call live in the workers. Jobs and events travel over local
+    multiprocessing queues. Each worker has its own job queue, so the pool
+    knows which jobs a worker holds and fails them if it dies.
+    """
+
+    def __init__(self, processes: int, websocket_manager=None) -> None:
+        self.processes = processes
+        self.websocket_manager = websocket_manager
+        self._ctx = mp.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._workers: List[mp.Process] = []
+        # Job queue of each worker, by PID
+        self._job_queues: Dict[int, mp.Queue] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+        # Worker PID of every dispatched job that has not finished
+        self._assigned: Dict[str, int] = {}
+        self._relay: Optional[asyncio.Task] = None
+        self._monitor: Optional[asyncio.Task] = None
+        # Latest metric snapshot per worker PID, merged into /metrics
+        self._metrics: Dict[int, Dict[str, Any]] = {}
+
+    def _spawn(self) -> mp.Process:
+        jobs = self._ctx.Queue()
+        process = self._ctx.Process(target=_worker_main, args=(jobs, self._events), daemon=True)
+        process.start()
+        self._job_queues[process.pid] = jobs
+        return process
+
+    async def start(self) -> None:
+        self._workers = [self._spawn() for _ in range(self.processes)]
+        self._relay = asyncio.create_task(self._relay_events())
+        self._monitor = asyncio.create_task(self._monitor_workers())
+        logger.info(f"Started {self.processes} research worker processes")
+
+    async def stop(self) -> None:
+        if self._monitor:
+            self._monitor.cancel()
+        for process in self._workers:
+            self._job_queues[process.pid].put(None)
+        for process in self._workers:
+            await asyncio.to_thread(process.join, 10)
+            if process.is_alive():
+                process.terminate()
+        if self._relay:
+            self._relay.cancel()
+        self._workers = []
+        self._job_queues.clear()
+
+    async def run(self, job_id: str, request: Dict[str, Any], resume: bool = False) -> Dict[str, Any]:
+        """Hand a job to the least busy worker and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._futures[job_id] = future
+        load = {process.pid: 0 for process in self._workers}
+        for pid in self._assigned.values():
+            if pid in load:
+                load[pid] += 1
+        pid = min(load, key=load.get)
+        self._assigned[job_id] = pid
+        self._job_queues[pid].put((job_id, request, resume))
+        try:
+            return await future
+        finally:
+            self._futures.pop(job_id, None)
+            self._assigned.pop(job_id, None)
+
+    async def _relay_events(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                kind, job_id, payload = await loop.run_in_executor(None, self._events.get, True, 1.0)
+            except queue.Empty:
+                continue
+
+            if kind == "progress":
+                if self.websocket_manager:
+                    await self.websocket_manager.send_event(payload)
+            elif kind == "started":
+                logger.info(f"Job {job_id} started in worker {payload}")
+            elif kind == "result":
+                self._resolve(job_id, result=payload)
+            elif kind == "error":
+                self._resolve(job_id, error=RuntimeError(payload))
+            elif kind == "metrics":
+                # Sent per worker rather than per job: job_id holds the PID
+                self._metrics[job_id] = payload
+
+    def metric_snapshots(self) -> List[Dict[str, Any]]:
+        """Metric snapshots reported by current and past worker processes."""
+        return list(self._metrics.values())
+
+    def _resolve(self, job_id: str, result: Any = None, error: Exception = None) -> None:
+        future = self._futures.get(job_id)
+        if not future or future.done():
+            return
+        if error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def _monitor_workers(self) -> None:
+        # Independent of event traffic: a busy event queue must not hide a dead worker
+        while True:
+            await asyncio.sleep(LIVENESS_INTERVAL)
+            try:
+                self._replace_dead_workers()
+            except Exception as e:
+                logger.error(f"Checking research workers failed: {e}", exc_info=True)
+
+    def _replace_dead_workers(self) -> None:
+        for i, process in enumerate(self._workers):
+            if process.is_alive():
+                continue
+            logger.error(f"Research worker {process.pid} exited with code {process.exitcode}, restarting")
+            # Keep the dead worker's counters but not its in-flight gauges
+            for metric in self._metrics.get(process.pid, {}).values():
+                if metric["type"] == "gauge":
+                    metric["samples"] = {}
+            # Jobs it had started and jobs still waiting in its queue alike
+            for job_id, pid in list(self._assigned.items()):
+                if pid == process.pid:
+                    self._resolve(job_id, error=RuntimeError("Research worker process died"))
+            self._job_queues.pop(process.pid).close()
+            self._workers[i] = self._spawn()
@@ -1,4 +1,5 @@
 from .utils import generate_pdf_from_md, clean_text
+from .urls import canonical_url
 from .references import (
     extract_domain_name, 
     extract_title_from_url_path, 
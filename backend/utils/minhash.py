@@ -0,0 +1,66 @@
+import re
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+_MAX_HASH = (1 << 32) - 1
+
+
+class MinHashIndex:
+    """Near-duplicate lookup of short texts by the Jaccard similarity of their word sets.
+
+    Texts are summarised by MinHash signatures; LSH banding only compares
+    texts that agree on at least one band of the signature, and a match
+    needs an estimated similarity of at least ``threshold``. Texts of
+    fewer than ``min_words`` distinct words are too short to compare.
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, bands: int = 16, seed: int = 1,
+                 min_words: int = 8) -> None:
+        self.threshold = threshold
+        self.min_words = min_words
+        self.bands = bands
+        self._rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # Multiply-add-shift permutations of 32-bit word hashes, wrapping at 2**64
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+        self._buckets: Dict[Tuple[int, bytes], List[Tuple[np.ndarray, Hashable]]] = {}
+
+    def signatures(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """MinHash signatures of the words of each text; None for texts too short to compare."""
+        word_sets = [set(_WORD.findall(text.lower())) for text in texts]
+        signatures: List[Optional[np.ndarray]] = [None] * len(texts)
+        comparable = [i for i, words in enumerate(word_sets) if len(words) >= self.min_words]
+        if not comparable:
+            return signatures
+
+        # All texts are hashed and permuted in one array, then reduced per text.
+        # str hashes differ between processes; signatures are only compared within one index
+        counts = np.array([len(word_sets[i]) for i in comparable])
+        hashes = np.fromiter((hash(word) & _MAX_HASH for i in comparable for word in word_sets[i]),
+                             dtype=np.uint64, count=int(counts.sum()))
+        permuted = (np.outer(hashes, self._a) + self._b) >> np.uint64(32)
+        minima = np.minimum.reduceat(permuted, np.cumsum(counts) - counts, axis=0)
+        for row, i in enumerate(comparable):
+            signatures[i] = minima[row]
+        return signatures
+
+    def _keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self._rows:(band + 1) * self._rows].tobytes()
+
+    def find(self, signature: np.ndarray) -> Optional[Hashable]:
+        """Key of the most similar indexed text at or above the threshold, if any."""
+        best, best_similarity = None, self.threshold
+        for bucket in self._keys(signature):
+            for other, key in self._buckets.get(bucket, ()):
+                similarity = float(np.mean(signature == other))
+                if similarity >= best_similarity:
+                    best, best_similarity = key, similarity
+        return best
+
+    def add(self, signature: np.ndarray, key: Hashable) -> None:
+        for bucket in self._keys(signature):
+            self._buckets.setdefault(bucket, []).append((signature, key))
@@ -1,8 +1,11 @@
+import heapq
 import logging
 import re
 from typing import Any, Dict, List, Tuple
 from urllib.parse import urlparse
 
+from .urls import canonical_url
+
 logger = logging.getLogger(__name__)
 
 def extract_domain_name(url: str) -> str:
@@ -89,22 +92,8 @@ def clean_title(title: str) -> str:
     return title
 
 def normalize_url(url: str) -> str:
-    """Normalize a URL by removing query parameters and fragments."""
-    try:
-        if not url:
-            return ""
-            
-        # Ensure URL has a scheme
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-            
-        parsed = urlparse(url)
-        normalized_url = parsed._replace(query='', fragment='').geturl().rstrip('/')
-        
-        return normalized_url
-    except Exception as e:
-        logger.error(f"Error normalizing URL {url}: {e}")
-        return url
+    """Normalize a URL to its canonical form (see ``canonical_url``)."""
+    return canonical_url(url) if url else ""
 
 def extract_website_name_from_domain(domain: str) -> str:
     """Extract a readable website name from a domain."""
@@ -123,120 +112,73 @@ def extract_website_name_from_domain(domain: str) -> str:
     
     return website_name
 
-def process_references_from_search_results(state: Dict[str, Any]) -> Tuple[List[str], Dict[str, str], Dict[str, Dict[str, Any]]]:
-    """Process references from search results and return top references, titles, and info."""
-    all_top_references = []
-    
-    # Collect references with scores from all data types
+def _reference_score(doc: Dict[str, Any]) -> float:
+    """Curator evaluation score of a document, falling back to its search score."""
+    if 'evaluation' in doc and 'overall_score' in doc['evaluation']:
+        return float(doc['evaluation']['overall_score'])
+    return float(doc.get('score', 0))
+
+def process_references_from_search_results(state: Dict[str, Any], top_k: int = 10) -> Tuple[List[str], Dict[str, str], Dict[str, Dict[str, Any]]]:
+    """Process references from search results and return top references, titles, and info.
+
+    Every curated document is visited once: each normalized URL keeps its
+    highest-scoring document (the earliest one on ties), titles are looked
+    up in a URL index, and the ``top_k`` references are picked with a heap.
+    """
     data_types = ['curated_company_data', 'curated_industry_data', 'curated_financial_data', 'curated_news_data']
-    
-    # Log the start of reference processing
-    logger.info("Starting to process references from search results")
-    
+
+    best = {}  # normalized URL -> (score, position, URL the document was found at)
+    titles = {}  # normalized URL -> non-empty document titles, in category order
+    # Other URLs carrying the same content, recorded by the curator's near-duplicate detection
+    alternate_urls = {}
+    collected = 0
     for data_type in data_types:
-        if curated_data := state.get(data_type, {}):
-            for url, doc in curated_data.items():
-                try:
-                    # Ensure we have a valid score
-                    if 'evaluation' in doc and 'overall_score' in doc['evaluation']:
-                        score = float(doc['evaluation']['overall_score'])
-                    else:
-                        # Fallback to raw score if available
-                        score = float(doc.get('score', 0))
-                    
-                    logger.info(f"Found reference in {data_type}: URL={url}, Score={score:.4f}")
-                    all_top_references.append((url, score))
-                except (KeyError, ValueError, TypeError) as e:
-                    logger.warning(f"Error processing score for {url} in {data_type}: {e}")
-                    continue
-    
-    logger.info(f"Collected a total of {len(all_top_references)} references before deduplication")
-    
-    # Sort references by score in descending order
-    all_top_references.sort(key=lambda x: float(x[1]), reverse=True)
-    
-    # Log top 20 references before deduplication to verify sorting
-    logger.info("Top 20 references by score before deduplication:")
-    for i, (url, score) in enumerate(all_top_references[:20]):
-        logger.info(f"{i+1}. Score: {score:.4f} - URL: {url}")
-    
-    # Use a set to store unique URLs, keeping only the highest scored version of each URL
-    seen_urls = set()
-    unique_references = []
+        for url, doc in (state.get(data_type) or {}).items():
+            if doc.get('title'):
+                titles.setdefault(normalize_url(doc.get('url') or url), []).append(doc['title'])
+            try:
+                score = _reference_score(doc)
+            except (KeyError, ValueError, TypeError) as e:
+                logger.warning(f"Error processing score for {url} in {data_type}: {e}")
+                continue
+            collected += 1
+            if not url or not url.startswith(('http://', 'https://')):
+                logger.debug(f"Skipping invalid URL: {url}")
+                continue
+            normalized_url = normalize_url(url)
+            if alternates := doc.get('alternates'):
+                alternate_urls[normalized_url] = [alt['url'] for alt in alternates if alt.get('url')]
+            current = best.get(normalized_url)
+            if current is None or score > current[0]:
+                best[normalized_url] = (score, collected, doc.get('url') or url)
+
     reference_titles = {}  # Store titles for references
     reference_info = {}  # Store additional information for MLA-style references
-    
-    for url, score in all_top_references:
-        # Skip if URL is not valid
-        if not url or not url.startswith(('http://', 'https://')):
-            logger.info(f"Skipping invalid URL: {url}")
-            continue
+    for normalized_url, (score, _, url) in best.items():
+        domain = urlparse(url).netloc
+        title = None
+        for raw_title in titles.get(normalized_url, ()):
+            # Titles that clean up to nothing fall through to the next document
+            if title := clean_title(raw_title):
+                if title.strip() and title != url:
+                    reference_titles[normalized_url] = title
+                break
+        reference_info[normalized_url] = {
+            'title': title or '',
+            'domain': domain,
+            'website': extract_website_name_from_domain(domain),
+            'url': url,
+            'score': score,
+            'alternates': alternate_urls.get(normalized_url, [])
+        }
+
+    top_references = heapq.nlargest(top_k, best.items(), key=lambda item: (item[1][0], -item[1][1]))
+    top_reference_urls = [normalized_url for normalized_url, _ in top_references]
+
+    logger.info(f"Selected {len(top_reference_urls)} of {len(best)} unique references ({collected} collected)")
+    for i, (normalized_url, (score, *_)) in enumerate(top_references, 1):
+        logger.debug(f"{i}. Score: {score:.4f} - URL: {normalized_url}")
 
-        # Normalize URL
-        normalized_url = normalize_url(url)
-        
-        if normalized_url not in seen_urls:
-            seen_urls.add(normalized_url)
-            unique_references.append((normalized_url, score))
-            
-            # Extract domain name for website citation
-            parsed = urlparse(url)
-            domain = parsed.netloc
-            
-            # Find and store the title and other info for this URL
-            title = None
-            website_name = None
-            
-            # Look for the document info in all data types
-            for data_type in data_types:
-                if not title and (curated_data := state.get(data_type, {})):
-                    for doc in curated_data.values():
-                        if doc.get('url') == url:
-                            title = doc.get('title', '')
-                            if title:
-                                # Clean up the title
-                                title = clean_title(title)
-                                if title and title.strip() and title != url:
-                                    reference_titles[normalized_url] = title
-                                    logger.info(f"Found title for URL {url}: '{title}'")
-                                    break
-            
-            # If no title was found, log it
-            if not title:
-                logger.info(f"No valid title found for URL {url}")
-            
-            # Extract a better website name from the domain
-            website_name = extract_website_name_from_domain(domain)
-            
-            # Store additional information for MLA citation
-            reference_info[normalized_url] = {
-                'title': title or '',
-                'domain': domain,
-                'website': website_name,
-                'url': normalized_url,
-                'score': score
-            }
-            logger.info(f"Stored reference info for {normalized_url} with score {score:.4f}")
-    
-    # Sort unique references by score again to ensure proper ordering
-    unique_references.sort(key=lambda x: float(x[1]), reverse=True)
-    
-    # Log unique references by score to verify sorting
-    logger.info(f"Found {len(unique_references)} unique references after deduplication")
-    logger.info("Unique references by score (sorted):")
-    for i, (url, score) in enumerate(unique_references):
-        logger.info(f"{i+1}. Score: {score:.4f} - URL: {url}")
-    
-    # Take exactly 10 unique references (or all if less than 10)
-    top_references = unique_references[:10]
-    top_reference_urls = [url for url, _ in top_references]
-    
-    # Log final top 10 references
-    logger.info(f"Final top {len(top_reference_urls)} references selected:")
-    for i, url in enumerate(top_reference_urls):
-        score = next((s for u, s in unique_references if u == url), 0)
-        logger.info(f"{i+1}. Score: {score:.4f} - URL: {url}")
-    
     return top_reference_urls, reference_titles, reference_info
 
 def format_reference_for_markdown(reference_entry: Dict[str, Any]) -> str:
@@ -331,11 +273,11 @@ def format_references_section(references: List[str], reference_info: Dict[str, D
             website = extract_domain_name(ref)
             logger.info(f"No website name found for {ref}, extracted: {website}")
         
-        # Create a reference entry with all information
+        # Create a reference entry with all information; link the URL the page was found at
         entry = {
             'website': website,
             'title': title,
-            'url': ref,
+            'url': info.get('url') or ref,
             'domain': domain,
             'score': score
         }
@@ -0,0 +1,67 @@
+import re
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that identify a campaign, click or share, or ask for the AMP copy; never the page
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid", "twclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "cmpid", "spm",
+    "ref", "ref_src", "ref_url", "amp", "outputtype",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+# Host prefixes of the desktop, mobile and AMP copies of a site; all map to the bare host
+MIRROR_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+# "/story/amp", "/story/amp/" and "/story.amp.html" are the AMP copies of "/story" and "/story.html"
+_AMP_PATH = re.compile(r"(?:/amp/?|\.amp)(?=\.html?$|$)")
+# Google's AMP cache serves https://example.com/story as https://example-com.cdn.ampproject.org/c/s/example.com/story
+_AMP_CACHE_PATH = re.compile(r"^/[a-z]/(s/)?(.+)$")
+_DEFAULT_PORTS = {80, 443}
+# "mailto:", "tel:" and the like; "example.com:8080" is a host and port
+_OTHER_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*:(?!\d)", re.IGNORECASE)
+
+URL_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def canonical_url(url: str) -> str:
+    """Canonical form of a web URL, used to key and compare documents.
+
+    The scheme becomes https, the host is lowercased without its ``www``,
+    mobile or AMP prefix, AMP paths and cache URLs map to the original
+    page, tracking parameters, fragments and trailing slashes are dropped
+    and the remaining query parameters are sorted. Input that is not an
+    http(s) URL is returned stripped but otherwise unchanged.
+    """
+    url = url.strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        if _OTHER_SCHEME.match(url):
+            return url
+        url = "https://" + url.lstrip("/")
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip(".")
+    if host.endswith(".cdn.ampproject.org") and (cached := _AMP_CACHE_PATH.match(parts.path)):
+        original = cached.group(2) + (f"?{parts.query}" if parts.query else "")
+        return canonical_url(original)
+    # Keep at least a registrable name: "m.co" or "www.io" are sites of their own
+    while host.count(".") > 1 and host.startswith(MIRROR_HOST_PREFIXES):
+        host = host.split(".", 1)[1]
+    if port and port not in _DEFAULT_PORTS:
+        host = f"{host}:{port}"
+
+    path = _AMP_PATH.sub("", parts.path).rstrip("/")
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ))
+    return urlunsplit(("https", host, path, query, ""))
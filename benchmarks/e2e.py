@@ -0,0 +1,222 @@
+"""End-to-end throughput of the research API against local fake providers.
+
+Starts ``benchmarks.fake_providers`` in a subprocess, points every provider
+base URL at it, swaps the scrapers for ``benchmarks/fake_scrape`` and then
+drives ``application.app`` in-process with N concurrent jobs. Runs offline.
+
+Run from the repository root:
+
+    python -m benchmarks.e2e --jobs 20
+    python -m benchmarks.e2e --jobs 40 --slots 8 --processes 2 --latency openai=2.0:0.5
+
+Reports jobs/sec, per-job latency percentiles (submit to final status),
+peak RSS and event-loop lag of the API process.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))]
+
+
+def _peak_rss_mb(pid: str = "self") -> float:
+    """High-water RSS of a live process (Linux)."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+def configure_environment(args, port: int, workdir: Path) -> None:
+    """Point the application at the fakes; must run before it is imported."""
+    base = f"http://127.0.0.1:{port}"
+    scrape_dir = workdir / "scrape"
+    shutil.copytree(ROOT / "benchmarks" / "fake_scrape", scrape_dir)
+    os.environ.update({
+        "TAVILY_API_KEY": "benchmark",
+        "OPENAI_API_KEY": "benchmark",
+        "GEMINI_API_KEY": "benchmark",
+        "SERP_API_KEY": "benchmark",
+        "TAVILY_BASE_URL": f"{base}/tavily",
+        "OPENAI_BASE_URL": f"{base}/openai/v1",
+        "GEMINI_BASE_URL": f"{base}/gemini",
+        "SERPAPI_BASE_URL": f"{base}/serpapi",
+        "SCRAPE_PYTHON": sys.executable,
+        "SCRAPE_DIR": str(scrape_dir),
+        "FAKE_SCRAPE_SECONDS": str(args.scrape_seconds),
+        "RESEARCH_WORKER_SLOTS": str(args.slots or args.jobs),
+        "RESEARCH_QUEUE_SIZE": str(args.jobs),
+        "RESEARCH_WORKER_PROCESSES": str(args.processes),
+        "CHECKPOINT_DB": str(workdir / "checkpoints.sqlite"),
+        "SOCIAL_INDEX_DB": str(workdir / "social_index.sqlite"),
+    })
+    os.environ.pop("MONGODB_URI", None)
+
+
+def start_fake_providers(args, port: int) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.fake_providers", "--port", str(port),
+               "--token-interval", str(args.token_interval)]
+    for spec in args.latency or []:
+        command += ["--latency", spec]
+    process = subprocess.Popen(command, cwd=ROOT)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Fake providers did not start")
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a task that sleeps ``interval``."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        self._task.cancel()
+
+
+async def drive(args) -> dict:
+    import httpx
+    import application
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    app = application.app
+    terminal = {"completed", "failed"}
+    async with app.router.lifespan_context(app):
+        monitor = LoopLagMonitor()
+        monitor.start()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            started = time.perf_counter()
+            submitted = {}
+
+            async def submit(i: int) -> None:
+                response = await client.post("/research", json={
+                    "company": f"Acme{i}",
+                    "company_url": f"https://acme{i}.example.com",
+                    "industry": "Consumer goods",
+                    "hq_location": "Hanoi",
+                })
+                response.raise_for_status()
+                submitted[response.json()["job_id"]] = time.perf_counter()
+
+            await asyncio.gather(*(submit(i) for i in range(args.jobs)))
+
+            finished = {}
+            while len(finished) < len(submitted):
+                now = time.perf_counter()
+                for job_id, at in submitted.items():
+                    if job_id not in finished and application.job_status[job_id]["status"] in terminal:
+                        finished[job_id] = now - at
+                await asyncio.sleep(0.05)
+            elapsed = time.perf_counter() - started
+        monitor.stop()
+        # Read while the worker processes are still alive
+        workers = application.worker_pool._workers if application.worker_pool else []
+        worker_rss = [_peak_rss_mb(str(process.pid)) for process in workers]
+
+    latencies = list(finished.values())
+    statuses = [application.job_status[job_id]["status"] for job_id in finished]
+    return {
+        "jobs": args.jobs,
+        "completed": statuses.count("completed"),
+        "failed": statuses.count("failed"),
+        "wall_seconds": round(elapsed, 3),
+        "jobs_per_second": round(args.jobs / elapsed, 3),
+        "latency_seconds": {
+            "p50": round(_percentile(latencies, 0.50), 3),
+            "p95": round(_percentile(latencies, 0.95), 3),
+            "p99": round(_percentile(latencies, 0.99), 3),
+            "max": round(max(latencies), 3),
+        },
+        "loop_lag_ms": {
+            "mean": round(statistics.mean(monitor.lags) * 1000, 2) if monitor.lags else 0.0,
+            "p99": round(_percentile(monitor.lags, 0.99) * 1000, 2),
+            "max": round(max(monitor.lags, default=0.0) * 1000, 2),
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_worker_rss_mb": worker_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20, help="jobs submitted at once")
+    parser.add_argument("--slots", type=int, default=0, help="RESEARCH_WORKER_SLOTS (default: one per job)")
+    parser.add_argument("--processes", type=int, default=0, help="RESEARCH_WORKER_PROCESSES")
+    parser.add_argument("--latency", action="append", metavar="NAME=MEDIAN[:SIGMA]",
+                        help="provider latency, e.g. tavily=0.8:0.4 (repeatable)")
+    parser.add_argument("--token-interval", type=float, default=0.01, help="seconds between streamed chunks")
+    parser.add_argument("--scrape-seconds", type=float, default=5.0, help="median fake scraper run time")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the application's INFO logging")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="research-bench-") as workdir:
+        configure_environment(args, port, Path(workdir))
+        providers = start_fake_providers(args, port)
+        try:
+            results = asyncio.run(drive(args))
+        finally:
+            providers.terminate()
+            providers.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"jobs            {results['completed']}/{results['jobs']} completed, {results['failed']} failed")
+    print(f"throughput      {results['jobs_per_second']} jobs/s over {results['wall_seconds']} s")
+    latency = results["latency_seconds"]
+    print(f"job latency     p50={latency['p50']} s  p95={latency['p95']} s  p99={latency['p99']} s  max={latency['max']} s")
+    lag = results["loop_lag_ms"]
+    print(f"event loop lag  mean={lag['mean']} ms  p99={lag['p99']} ms  max={lag['max']} ms")
+    workers = "  ".join(f"worker={rss} MB" for rss in results["peak_worker_rss_mb"])
+    print(f"peak RSS        api={results['peak_rss_mb']} MB  {workers}".rstrip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Local stand-ins for Tavily, OpenAI, Gemini and SerpAPI.
+
+Serves every provider from one port under its own path prefix, answering
+with realistic payloads after a latency drawn from a log-normal
+distribution per provider:
+
+    python -m benchmarks.fake_providers --port 8790 --latency tavily=0.8:0.4 --latency openai=1.5
+
+Point the application at it with
+
+    TAVILY_BASE_URL=http://127.0.0.1:8790/tavily
+    OPENAI_BASE_URL=http://127.0.0.1:8790/openai/v1
+    GEMINI_BASE_URL=http://127.0.0.1:8790/gemini
+    SERPAPI_BASE_URL=http://127.0.0.1:8790/serpapi
+
+``--latency name=median[:sigma]`` sets the median response time in
+seconds (and the spread of the distribution) for one provider. Streamed
+OpenAI completions wait the drawn latency before the first token, then
+emit a chunk every ``--token-interval`` seconds.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Dict, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_LATENCY = {
+    "tavily": (0.8, 0.4),
+    "openai": (1.2, 0.4),
+    "gemini": (2.0, 0.3),
+    "serpapi": (0.6, 0.3),
+}
+
+PARAGRAPH = (
+    "{company} reported steady growth across its core product lines this year, "
+    "with customers highlighting delivery speed and support quality while some "
+    "reviews mention pricing pressure from regional competitors. Analysts expect "
+    "the brand to keep investing in marketing and new distribution partnerships. "
+)
+
+REPORT = """# {company} Reputation Report
+
+## Social Media & User Engagement
+### YouTube
+{company} publishes product videos weekly with stable view counts.
+### Facebook
+Posts receive consistent reactions and a moderate number of shares.
+
+## Competitors
+### Regional players
+Several local brands compete on price in the same segments.
+"""
+
+
+def _draw(latency: Dict[str, Tuple[float, float]], provider: str) -> float:
+    median, sigma = latency[provider]
+    return median * random.lognormvariate(0, sigma) if sigma else median
+
+
+def _slug(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()[:10]
+
+
+def create_app(latency: Dict[str, Tuple[float, float]], token_interval: float = 0.01) -> FastAPI:
+    app = FastAPI(title="Fake providers")
+
+    async def wait(provider: str) -> None:
+        await asyncio.sleep(_draw(latency, provider))
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    # Tavily ---------------------------------------------------------------
+    @app.post("/tavily/search")
+    async def tavily_search(request: Request):
+        body = await request.json()
+        await wait("tavily")
+        query = body.get("query", "")
+        company = query.split()[0] if query else "Company"
+        results = [
+            {
+                "url": f"https://news{i}.example.com/{_slug(query)}/{i}",
+                "title": f"{query.title()} - Source {i}",
+                "content": PARAGRAPH.format(company=company) * 3,
+                "score": round(random.uniform(0.3, 0.95), 3),
+                "raw_content": None,
+            }
+            for i in range(body.get("max_results", 5))
+        ]
+        return {"query": query, "results": results, "response_time": 0.0}
+
+    @app.post("/tavily/extract")
+    async def tavily_extract(request: Request):
+        body = await request.json()
+        await wait("tavily")
+        urls = body.get("urls") or []
+        if isinstance(urls, str):
+            urls = [urls]
+        results = [{"url": url, "raw_content": PARAGRAPH.format(company="The company") * 20} for url in urls]
+        return {"results": results, "failed_results": [], "response_time": 0.0}
+
+    # OpenAI ---------------------------------------------------------------
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            # Query plan: three queries for each analyst
+            text = json.dumps({
+                topic: [f"Acme {topic} query {i} {_slug(prompt)}" for i in range(1, 4)]
+                for topic in ("financial", "news", "industry")
+            })
+        elif "Youtube: [link]" in prompt:
+            text = "Youtube: https://www.youtube.com/@acme\nFacebook: https://www.facebook.com/acme\nTiktok: https://www.tiktok.com/@acme\n"
+        else:
+            text = REPORT.format(company="Acme")
+        completion_id = f"chatcmpl-{_slug(prompt)}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4.1")
+
+        if not body.get("stream"):
+            await wait("openai")
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                          "total_tokens": (len(prompt) + len(text)) // 4},
+            }
+
+        def chunk(delta: Dict[str, str], finish_reason=None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }) + "\n\n"
+
+        async def events():
+            await wait("openai")
+            yield chunk({"role": "assistant", "content": ""})
+            for i in range(0, len(text), 16):
+                yield chunk({"content": text[i:i + 16]})
+                await asyncio.sleep(token_interval)
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # Gemini ---------------------------------------------------------------
+    @app.post("/gemini/v1beta/models/{model_action}")
+    async def generate_content(model_action: str, request: Request):
+        await request.json()
+        await wait("gemini")
+        text = "\n".join(f"* {PARAGRAPH.format(company='Acme').strip()}" for _ in range(4))
+        return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}]}
+
+    # SerpAPI --------------------------------------------------------------
+    @app.get("/serpapi/search.json")
+    async def serpapi_search(q: str = ""):
+        await wait("serpapi")
+        brand = q.split()[-1].lower() if q else "acme"
+        return JSONResponse({
+            "search_metadata": {"status": "Success"},
+            "organic_results": [
+                {"position": 1, "link": f"https://www.youtube.com/@{brand}"},
+                {"position": 2, "link": f"https://www.facebook.com/{brand}"},
+                {"position": 3, "link": f"https://www.tiktok.com/@{brand}"},
+                {"position": 4, "link": f"https://www.facebook.com/{brand}/posts/1"},
+            ],
+        })
+
+    return app
+
+
+def parse_latency(specs) -> Dict[str, Tuple[float, float]]:
+    latency = dict(DEFAULT_LATENCY)
+    for spec in specs or []:
+        name, _, value = spec.partition("=")
+        median, _, sigma = value.partition(":")
+        if name not in latency:
+            raise SystemExit(f"Unknown provider {name!r}; expected one of {', '.join(latency)}")
+        latency[name] = (float(median), float(sigma) if sigma else latency[name][1])
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency", action="append", metavar="NAME=MEDIAN[:SIGMA]")
+    parser.add_argument("--token-interval", type=float, default=0.01)
+    args = parser.parse_args()
+    app = create_app(parse_latency(args.latency), args.token_interval)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
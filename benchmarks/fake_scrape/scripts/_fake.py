@@ -0,0 +1,28 @@
+"""Shared body of the fake scrapers used by benchmarks.e2e.
+
+Accepts the same arguments as the real scrapers, sleeps for a browser-like
+duration (median ``FAKE_SCRAPE_SECONDS``) and writes output in the same
+format to ``--output-dir``.
+"""
+import argparse
+import os
+import random
+import time
+
+
+def run(filename: str, header: dict, section: str, item) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--link')
+    parser.add_argument('--output-dir', default='data')
+    args = parser.parse_args()
+
+    median = float(os.getenv("FAKE_SCRAPE_SECONDS", "5"))
+    time.sleep(median * random.lognormvariate(0, 0.3))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, filename), "w", encoding="utf-8") as f:
+        for key, value in header.items():
+            f.write(f"{key}: {value}\n")
+        f.write(f"\n=== {section} ===\n")
+        for i in range(10 if "10" in section else 5):
+            f.write(f"{item(args.link, i)}\n")
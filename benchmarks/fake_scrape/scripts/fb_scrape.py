@@ -0,0 +1,8 @@
+import _fake
+
+_fake.run(
+    "fb.txt",
+    {"Followers": "2.4M followers", "Likes": "2.3M likes"},
+    "10 Recent Post",
+    lambda link, i: {"num_reaction": str(900 + i * 37), "num_comment": str(40 + i), "num_share": str(10 + i)},
+)
@@ -0,0 +1,8 @@
+import _fake
+
+_fake.run(
+    "tiktok.txt",
+    {"Followers": "530K", "Likes": "8.1M"},
+    "10 Recent Videos",
+    lambda link, i: {"url": f"{link}/video/{7300000000 + i}", "likes": f"{i + 3}.2K", "comments": str(40 + i), "shares": str(12 + i)},
+)
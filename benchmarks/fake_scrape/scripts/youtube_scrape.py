@@ -0,0 +1,8 @@
+import _fake
+
+_fake.run(
+    "youtube.txt",
+    {"Subscribers": "1.2M subscribers", "Total Videos": "845 videos", "Total Views": "310,442,118 views"},
+    "5 Recent Videos",
+    lambda link, i: {"title": f"Video {i}", "url": f"{link}/videos/{i}", "views": f"{(i + 1) * 12}K views"},
+)
@@ -0,0 +1,60 @@
+"""Per-job graph setup cost: fresh graph per job vs. the shared compiled graph.
+
+Run from the repository root:
+
+    python -m benchmarks.graph_setup --jobs 50
+
+No network calls are made; placeholder API keys are used when none are set.
+"""
+import argparse
+import os
+import statistics
+import time
+
+for key in ("TAVILY_API_KEY", "OPENAI_API_KEY", "GEMINI_API_KEY"):
+    os.environ.setdefault(key, "benchmark-placeholder")
+
+from backend.graph import Graph, build_input_state, get_graph  # noqa: E402
+
+
+def per_job_fresh_graph(job_id: str):
+    """Previous behaviour: every job built all nodes and compiled the workflow."""
+    graph = Graph()
+    return graph.compile(), build_input_state(company="Acme", job_id=job_id)
+
+
+def per_job_shared_graph(job_id: str):
+    """Current behaviour: jobs reuse the process-wide compiled graph."""
+    return get_graph().compile(), build_input_state(company="Acme", job_id=job_id)
+
+
+def measure(setup, jobs: int):
+    timings = []
+    for i in range(jobs):
+        start = time.perf_counter()
+        setup(f"job-{i}")
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<22} mean={statistics.mean(timings):8.3f} ms  "
+          f"p50={statistics.median(timings):8.3f} ms  p95={p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50)
+    args = parser.parse_args()
+
+    # Warm the shared graph so its one-off build is not counted per job
+    get_graph()
+
+    report("fresh graph per job", measure(per_job_fresh_graph, args.jobs))
+    report("shared compiled graph", measure(per_job_shared_graph, args.jobs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Reference selection time on synthetic curated documents.
+
+Builds four curated categories with URLs repeated across categories and
+near-duplicate alternates, then times the indexed
+``process_references_from_search_results`` against the baseline
+implementation, loaded from git (the repository's first commit unless
+``--baseline`` names another revision). It also checks that both select
+the same references, titles and reference info. The baseline predates
+``alternates``, so that field is left out of the comparison.
+
+Run from the repository root:
+
+    python -m benchmarks.references --docs 10000
+"""
+import argparse
+import random
+import statistics
+import subprocess
+import sys
+import time
+import types
+
+from benchmarks.e2e import ROOT
+
+CATEGORIES = ['curated_company_data', 'curated_industry_data', 'curated_financial_data', 'curated_news_data']
+
+
+def synthetic_state(docs: int, seed: int) -> dict:
+    """``docs`` curated documents, about a fifth of them on a URL another category also kept."""
+    rng = random.Random(seed)
+    pages = max(1, int(docs * 0.8))
+    state = {category: {} for category in CATEGORIES}
+    for i in range(docs):
+        page = rng.randrange(pages)
+        url = f"https://news{page % 97}.example.com/2025/article-{page}"
+        doc = {
+            'url': url,
+            'title': f"Article {page} | News {page % 97}" if rng.random() > 0.05 else "",
+            'evaluation': {'overall_score': str(round(rng.random(), 4))},
+        }
+        if rng.random() < 0.1:
+            doc['alternates'] = [{'url': f"https://mirror.example.org/{page}", 'title': doc['title']}]
+        state[CATEGORIES[i % len(CATEGORIES)]][url] = doc
+    return state
+
+
+def baseline_process_references(revision: str):
+    """``process_references_from_search_results`` exactly as committed at ``revision``.
+
+    The module is loaded from git rather than copied here, so the baseline
+    cannot drift from the code it stands for.
+    """
+    source = subprocess.run(
+        ["git", "show", f"{revision}:backend/utils/references.py"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    module = types.ModuleType("baseline_references")
+    exec(compile(source, f"{revision}:backend/utils/references.py", "exec"), module.__dict__)
+    return module.process_references_from_search_results
+
+
+def root_revision() -> str:
+    return subprocess.run(
+        ["git", "rev-list", "--max-parents=0", "HEAD"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout.split()[0]
+
+
+def measure(label: str, process, state: dict, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = process(state)
+        timings.append(time.perf_counter() - started)
+    return {"label": label, "median_ms": round(statistics.median(timings) * 1000, 2), "result": result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10_000, help="curated documents across the four categories")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", help="git revision of the baseline (default: the first commit)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    from backend.utils.references import process_references_from_search_results
+
+    revision = args.baseline or root_revision()
+    state = synthetic_state(args.docs, args.seed)
+    baseline, indexed = [
+        measure(f"baseline {revision[:7]}", baseline_process_references(revision), state, args.repeat),
+        measure("indexed", process_references_from_search_results, state, args.repeat),
+    ]
+
+    print(f"{args.docs} documents, {len(baseline['result'][2])} unique references")
+    for result in (baseline, indexed):
+        print(f"{result['label']:<16} median={result['median_ms']:10.2f} ms")
+
+    (old_refs, old_titles, old_info), (refs, titles, info) = baseline["result"], indexed["result"]
+    info = {url: {key: value for key, value in entry.items() if key != 'alternates'} for url, entry in info.items()}
+    print("same references:", old_refs == refs)
+    print("same titles:", old_titles == titles)
+    print("same reference info (without alternates):", old_info == info)
+
+
+if __name__ == "__main__":
+    main()
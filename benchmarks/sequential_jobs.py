@@ -0,0 +1,98 @@
+"""Regression check: more sequential jobs than provider connections must all finish.
+
+A response body left open keeps its pooled connection and its adaptive
+concurrency slot. Each job that leaks one brings the process closer to a
+point where every later request to that provider waits forever. This
+runs ``PROVIDER_MAX_CONNECTIONS + 2`` jobs one after another against
+the local fake providers and fails if a job does not finish in time or
+a provider slot is still held once they are all done.
+
+Run from the repository root:
+
+    python -m benchmarks.sequential_jobs --max-connections 3
+
+Exits with status 1 on failure. Runs offline.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.e2e import ROOT, _free_port, configure_environment, start_fake_providers
+
+
+async def run_jobs(args) -> list:
+    import httpx
+    import application
+    from backend.services.providers import get_providers
+
+    logging.getLogger().setLevel(logging.WARNING)
+    app = application.app
+    failures = []
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            for i in range(args.jobs):
+                response = await client.post("/research", json={
+                    "company": f"Acme{i}",
+                    "company_url": f"https://acme{i}.example.com",
+                    "industry": "Consumer goods",
+                    "hq_location": "Hanoi",
+                })
+                response.raise_for_status()
+                job_id = response.json()["job_id"]
+                deadline = time.monotonic() + args.job_timeout
+                while application.job_status[job_id]["status"] not in ("completed", "failed"):
+                    if time.monotonic() > deadline:
+                        failures.append(f"job {i + 1}/{args.jobs} did not finish within {args.job_timeout}s")
+                        return failures
+                    await asyncio.sleep(0.05)
+                status = application.job_status[job_id]["status"]
+                print(f"job {i + 1}/{args.jobs} {status}")
+                if status != "completed":
+                    failures.append(f"job {i + 1}/{args.jobs} {status}")
+
+        # Every response has been read by now; a slot still taken was never released
+        for provider, stats in get_providers().stats().items():
+            for endpoint, limit in stats["concurrency"].items():
+                if limit["in_flight"] or limit["waiting"]:
+                    failures.append(f"{provider} {endpoint}: {limit['in_flight']} slots held, "
+                                    f"{limit['waiting']} waiting after all jobs finished")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-connections", type=int, default=3, help="PROVIDER_MAX_CONNECTIONS")
+    parser.add_argument("--jobs", type=int, default=0, help="jobs to run (default: max connections + 2)")
+    parser.add_argument("--job-timeout", type=float, default=60, help="seconds a single job may take")
+    args = parser.parse_args()
+    args.jobs = args.jobs or args.max_connections + 2
+    # Settings read by configure_environment and start_fake_providers
+    args.slots, args.processes, args.latency = 1, 0, None
+    args.token_interval, args.scrape_seconds = 0.001, 0.1
+
+    sys.path.insert(0, str(ROOT))
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="research-check-") as workdir:
+        configure_environment(args, port, Path(workdir))
+        os.environ["PROVIDER_MAX_CONNECTIONS"] = str(args.max_connections)
+        providers = start_fake_providers(args, port)
+        try:
+            failures = asyncio.run(run_jobs(args))
+        finally:
+            providers.terminate()
+            providers.wait()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: {args.jobs} sequential jobs with {args.max_connections} connections per provider")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Event-loop lag while concurrent jobs look up social links on SerpAPI.
+
+Compares the previous blocking lookup (``requests.get`` called inside the
+async node) with the async ``SerpApiClient`` against the local fake
+providers, while a probe task measures how late the event loop wakes it.
+
+Run from the repository root:
+
+    python -m benchmarks.serpapi_loop_lag --jobs 20 --latency serpapi=0.6:0.3
+
+Runs offline; ``requests`` is only needed for the blocking baseline.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from benchmarks.e2e import ROOT, LoopLagMonitor, _free_port, _percentile, start_fake_providers
+
+
+def lookup_params(i: int):
+    return {"q": f"site:facebook.com OR site:youtube.com OR site:tiktok.com Acme{i}", "num": 10}
+
+
+async def blocking_lookup(base_url: str, i: int) -> dict:
+    """Previous behaviour: a synchronous HTTP call on the event loop thread."""
+    import requests
+
+    response = requests.get(f"{base_url}/search.json", params={**lookup_params(i), "api_key": "benchmark"})
+    return response.json()
+
+
+async def async_lookup(client, i: int) -> dict:
+    """Current behaviour: the pooled, non-blocking SerpApiClient."""
+    return await client.search(lookup_params(i))
+
+
+async def measure(label: str, jobs: int, lookup) -> dict:
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    # Let the probe start sleeping before the lookups can block the loop
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(lookup(i) for i in range(jobs)))
+    elapsed = time.perf_counter() - started
+    # A probe stuck behind blocking calls records its lag once it wakes up
+    await asyncio.sleep(monitor.interval * 2)
+    monitor.stop()
+    lags = monitor.lags or [0.0]
+    return {
+        "label": label,
+        "wall_seconds": round(elapsed, 3),
+        "lag_mean_ms": round(statistics.mean(lags) * 1000, 2),
+        "lag_p99_ms": round(_percentile(lags, 0.99) * 1000, 2),
+        "lag_max_ms": round(max(lags) * 1000, 2),
+    }
+
+
+async def run(args, base_url: str) -> list:
+    from backend.services.providers import get_providers
+
+    providers = get_providers()
+    results = []
+    try:
+        if not args.skip_blocking:
+            results.append(await measure("blocking requests.get", args.jobs,
+                                         lambda i: blocking_lookup(base_url, i)))
+        results.append(await measure("async SerpApiClient", args.jobs,
+                                     lambda i: async_lookup(providers.serpapi, i)))
+    finally:
+        await providers.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20, help="concurrent social link lookups")
+    parser.add_argument("--latency", action="append", metavar="NAME=MEDIAN[:SIGMA]",
+                        help="provider latency, e.g. serpapi=0.6:0.3 (repeatable)")
+    parser.add_argument("--skip-blocking", action="store_true", help="only measure the async client")
+    args = parser.parse_args()
+    args.token_interval = 0.01
+
+    sys.path.insert(0, str(ROOT))
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}/serpapi"
+    # Must be set before the provider clients are created
+    os.environ["SERPAPI_BASE_URL"] = base_url
+    for key in ("TAVILY_API_KEY", "OPENAI_API_KEY", "GEMINI_API_KEY", "SERP_API_KEY"):
+        os.environ.setdefault(key, "benchmark-placeholder")
+
+    providers = start_fake_providers(args, port)
+    try:
+        results = asyncio.run(run(args, base_url))
+    finally:
+        providers.terminate()
+        providers.wait()
+
+    for result in results:
+        print(f"{result['label']:<22} wall={result['wall_seconds']:7.3f} s  "
+              f"loop lag mean={result['lag_mean_ms']:8.2f} ms  p99={result['lag_p99_ms']:8.2f} ms  "
+              f"max={result['lag_max_ms']:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
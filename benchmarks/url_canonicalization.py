@@ -0,0 +1,82 @@
+"""Throughput of URL canonicalisation on search-result URLs.
+
+Generates URLs the way search results repeat them across queries and
+analysts (same pages behind ``www``/mobile/AMP hosts and tracking
+parameters) and times ``canonical_url`` with a cold and a warm memo, next
+to the previous query-stripping normalisation for reference.
+
+Run from the repository root:
+
+    python -m benchmarks.url_canonicalization --urls 200000 --pages 300
+"""
+import argparse
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+from benchmarks.e2e import ROOT
+
+HOST_VARIANTS = ("https://www.{}", "https://{}", "http://m.{}", "https://amp.{}")
+PATH_VARIANTS = ("/{}", "/{}/", "/{}/amp", "/{}?utm_source=newsletter&utm_medium=email", "/{}?fbclid=IwAR{}")
+
+
+def previous_normalize(url: str) -> str:
+    """Previous behaviour: drop query and fragment, keep everything else."""
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return urlparse(url)._replace(query='', fragment='').geturl().rstrip('/')
+
+
+def synthetic_urls(count: int, pages: int, seed: int) -> list:
+    rng = random.Random(seed)
+    hosts = [f"news{i}.example.com" for i in range(max(1, pages // 20))]
+    page_list = [(rng.choice(hosts), f"2025/article-{i}") for i in range(pages)]
+    urls = []
+    for _ in range(count):
+        host, path = rng.choice(page_list)
+        urls.append(rng.choice(HOST_VARIANTS).format(host)
+                    + rng.choice(PATH_VARIANTS).format(path, rng.randrange(3)))
+    return urls
+
+
+def measure(label: str, urls: list, normalize) -> dict:
+    started = time.perf_counter()
+    distinct = len({normalize(url) for url in urls})
+    elapsed = time.perf_counter() - started
+    return {
+        "label": label,
+        "seconds": round(elapsed, 4),
+        "urls_per_second": round(len(urls) / elapsed),
+        "distinct": distinct,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=200_000, help="URLs to canonicalise")
+    parser.add_argument("--pages", type=int, default=300, help="distinct pages behind those URLs")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    from backend.utils.urls import canonical_url
+
+    urls = synthetic_urls(args.urls, args.pages, args.seed)
+    canonical_url.cache_clear()
+    results = [
+        measure("previous normalize_url", urls, previous_normalize),
+        measure("canonical_url (cold)", urls, canonical_url),
+        measure("canonical_url (warm)", urls, canonical_url),
+    ]
+    info = canonical_url.cache_info()
+
+    print(f"{args.urls} URLs for {args.pages} pages")
+    for result in results:
+        print(f"{result['label']:<24} {result['seconds']:8.4f} s  "
+              f"{result['urls_per_second']:>10,} URLs/s  distinct={result['distinct']}")
+    print(f"memo: hits={info.hits} misses={info.misses} size={info.currsize}/{info.maxsize}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
 # langgraph_entry.py
-from backend.graph import Graph
+from backend.graph import get_graph
 
-graph = Graph().compile()
\ No newline at end of file
+graph = get_graph().compile()
\ No newline at end of file
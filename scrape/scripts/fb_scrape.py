@@ -44,6 +44,7 @@ def get_likes_followers(driver):
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--link')
+    parser.add_argument('--output-dir', default='data')
     args = parser.parse_args()
 
     options = uc.ChromeOptions()
@@ -129,7 +130,7 @@ def main():
         post_data.append(res)
 
     # Ghi ra file
-    with open("data/fb.txt", "w", encoding="utf-8") as f:
+    with open(os.path.join(args.output_dir, "fb.txt"), "w", encoding="utf-8") as f:
         f.write(f"Followers: {followers}\n")
         f.write(f"Likes: {likes}\n\n")
         f.write("=== 10 Recent Post ===\n")
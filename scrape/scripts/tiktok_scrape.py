@@ -14,6 +14,7 @@ def human_scroll(driver, steps=5):
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--link')
+    parser.add_argument('--output-dir', default='data')
     args = parser.parse_args()
 
     # === STEP 1: Setup với cookies ===
@@ -84,7 +85,7 @@ def main():
 
 
         # Ghi ra file
-        with open("data/tiktok.txt", "w", encoding="utf-8") as f:
+        with open(os.path.join(args.output_dir, "tiktok.txt"), "w", encoding="utf-8") as f:
             f.write(f"Followers: {followers}\n")
             f.write(f"Likes: {likes}\n\n")
             f.write("=== 10 Recent Videos ===\n")
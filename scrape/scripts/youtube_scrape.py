@@ -161,6 +161,7 @@ def get_recent_videos(driver, channel_url):
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--link')
+    parser.add_argument('--output-dir', default='data')
     args = parser.parse_args()
 
     channel_url = args.link
@@ -185,7 +186,7 @@ def main():
         videos = get_recent_videos(driver, channel_url)
 
         # Ghi ra files
-        with open("data/youtube.txt", "w", encoding="utf-8") as f:
+        with open(os.path.join(args.output_dir, "youtube.txt"), "w", encoding="utf-8") as f:
             f.write(f"Subscribers: {subs}\n")
             f.write(f"Total Videos: {num_videos}\n")
             f.write(f"Total Views: {total_views}\n\n")
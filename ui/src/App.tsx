@@ -477,24 +477,21 @@ function App() {
               }));
             }
           }
-          // Increment the kept count for a specific category
-          else if (statusData.status === "document_kept") {
+          // Set the initial and kept counts of a curated category
+          else if (statusData.status === "category_curated") {
             const docType = statusData.result?.doc_type as keyof DocCounts;
-            setResearchState((prev) => {
-              if (docType && prev.docCounts?.[docType]) {
-                return {
-                  ...prev,
-                  docCounts: {
-                    ...prev.docCounts,
-                    [docType]: {
-                      initial: prev.docCounts[docType].initial,
-                      kept: prev.docCounts[docType].kept + 1,
-                    },
-                  } as DocCounts,
-                };
-              }
-              return prev;
-            });
+            if (docType) {
+              setResearchState((prev) => ({
+                ...prev,
+                docCounts: {
+                  ...prev.docCounts,
+                  [docType]: {
+                    initial: statusData.result.initial_count,
+                    kept: statusData.result.kept,
+                  } as DocCount,
+                } as DocCounts,
+              }));
+            }
           }
           // Update final doc counts when curation is complete
           else if (